@@ -0,0 +1,263 @@
+from psycopg import errors
+
+from app.statements import statement
+
+# Intentos cuando otra transacción asignó la misma copia al mismo tiempo
+MAX_ALLOCATION_ATTEMPTS = 5
+
+# Validación, asignación de copia, inserción, acumulados de reportes
+# (ver app/rollups.py) y datos de respuesta en una sola sentencia.
+CHECKOUT_SQL = statement('rentals.checkout', """
+    WITH customer_row AS (
+        SELECT customer_id, CONCAT(first_name, ' ', last_name) AS customer_name
+        FROM customer WHERE customer_id = %(customer_id)s
+    ),
+    staff_row AS (
+        SELECT staff_id, CONCAT(first_name, ' ', last_name) AS staff_name
+        FROM staff WHERE staff_id = %(staff_id)s
+    ),
+    film_row AS (
+        SELECT film_id, title, rental_rate, rental_duration
+        FROM film WHERE film_id = %(film_id)s
+    ),
+    free_copy AS (
+        SELECT i.inventory_id
+        FROM inventory i
+        WHERE i.film_id = %(film_id)s
+        AND EXISTS (SELECT 1 FROM customer_row)
+        AND EXISTS (SELECT 1 FROM staff_row)
+        AND NOT EXISTS (SELECT 1 FROM open_rental o WHERE o.inventory_id = i.inventory_id)
+        LIMIT 1
+        FOR UPDATE OF i SKIP LOCKED
+    ),
+    new_rental AS (
+        INSERT INTO rental (rental_date, inventory_id, customer_id, staff_id, due_date)
+        SELECT %(rental_date)s, fc.inventory_id, c.customer_id, s.staff_id,
+               %(rental_date)s + f.rental_duration * INTERVAL '1 day'
+        FROM free_copy fc, customer_row c, staff_row s, film_row f
+        RETURNING rental_id, rental_date, inventory_id, customer_id, staff_id
+    ),
+    film_stats AS (
+        INSERT INTO film_rental_stats (film_id, total_rentals)
+        SELECT f.film_id, 1 FROM new_rental, film_row f
+        ON CONFLICT (film_id) DO UPDATE
+        SET total_rentals = film_rental_stats.total_rentals + 1
+    ),
+    staff_stats AS (
+        INSERT INTO staff_revenue_stats (staff_id, total_rentals)
+        SELECT staff_id, 1 FROM new_rental
+        ON CONFLICT (staff_id) DO UPDATE
+        SET total_rentals = staff_revenue_stats.total_rentals + 1
+    ),
+    customer_stats AS (
+        INSERT INTO customer_rental_stats (customer_id, total_rentals, active_rentals, last_rental_date)
+        SELECT customer_id, 1, 1, rental_date FROM new_rental
+        ON CONFLICT (customer_id) DO UPDATE
+        SET total_rentals = customer_rental_stats.total_rentals + 1,
+            active_rentals = customer_rental_stats.active_rentals + 1,
+            last_rental_date = GREATEST(customer_rental_stats.last_rental_date, EXCLUDED.last_rental_date)
+    )
+    SELECT
+        CASE
+            WHEN c.customer_id IS NULL THEN 'customer_not_found'
+            WHEN s.staff_id IS NULL THEN 'staff_not_found'
+            WHEN f.film_id IS NULL THEN 'film_not_found'
+            WHEN nr.rental_id IS NULL THEN 'no_stock'
+            ELSE 'created'
+        END AS status,
+        nr.rental_id,
+        nr.rental_date,
+        nr.customer_id,
+        nr.inventory_id,
+        f.film_id,
+        nr.staff_id,
+        f.title AS film_title,
+        f.rental_rate,
+        f.rental_duration,
+        c.customer_name,
+        s.staff_name
+    FROM (SELECT 1) AS request
+    LEFT JOIN customer_row c ON true
+    LEFT JOIN staff_row s ON true
+    LEFT JOIN film_row f ON true
+    LEFT JOIN new_rental nr ON true
+""")
+
+
+async def checkout(cursor, customer_id, film_id, staff_id, rental_date):
+    """
+    Crear una renta en un solo viaje a la base de datos.
+
+    La copia libre se busca en open_rental (upgrade-009) y se bloquea con
+    FOR UPDATE SKIP LOCKED, así que las transacciones concurrentes toman
+    copias distintas sin esperarse. El bloqueo no vuelve a revisar que la
+    copia siga libre: la garantía es la llave primaria de open_rental, que
+    los triggers de rental llenan al insertar. Si dos transacciones llegan a
+    la misma copia, la segunda falla con unique_violation al insertar y se
+    reintenta la sentencia completa.
+
+    Debe ser la primera sentencia de la transacción (el reintento hace rollback).
+    Regresa la fila con `status`: created, customer_not_found,
+    staff_not_found, film_not_found o no_stock.
+    """
+    params = {
+        'customer_id': customer_id,
+        'film_id': film_id,
+        'staff_id': staff_id,
+        'rental_date': rental_date,
+    }
+    for attempt in range(MAX_ALLOCATION_ATTEMPTS):
+        try:
+            await cursor.execute(CHECKOUT_SQL, params)
+            return await cursor.fetchone()
+        except errors.UniqueViolation:
+            await cursor.connection.rollback()
+
+    return {'status': 'no_stock'}
+
+
+# Versión por lote de CHECKOUT_SQL: una fila por renta pedida, en el orden
+# del lote. De cada película se bloquean a lo más tantas copias libres como
+# rentas la piden, y se reparten entre ellas según su posición.
+BATCH_CHECKOUT_SQL = statement('rentals.batch_checkout', """
+    WITH req AS (
+        SELECT t.idx, t.customer_id, t.film_id, t.staff_id
+        FROM unnest(%(customer_ids)s::int[], %(film_ids)s::int[], %(staff_ids)s::int[])
+             WITH ORDINALITY AS t(customer_id, film_id, staff_id, idx)
+    ),
+    checked AS (
+        SELECT
+            req.idx,
+            c.customer_id,
+            CONCAT(c.first_name, ' ', c.last_name) AS customer_name,
+            s.staff_id,
+            CONCAT(s.first_name, ' ', s.last_name) AS staff_name,
+            f.film_id,
+            f.title,
+            f.rental_rate,
+            f.rental_duration
+        FROM req
+        LEFT JOIN customer c ON c.customer_id = req.customer_id
+        LEFT JOIN staff s ON s.staff_id = req.staff_id
+        LEFT JOIN film f ON f.film_id = req.film_id
+    ),
+    wanted AS (
+        SELECT idx, customer_id, staff_id, film_id,
+               row_number() OVER (PARTITION BY film_id ORDER BY idx) AS copy_rank
+        FROM checked
+        WHERE customer_id IS NOT NULL
+        AND staff_id IS NOT NULL
+        AND film_id IS NOT NULL
+    ),
+    wanted_film AS (
+        SELECT film_id, COUNT(*) AS qty
+        FROM wanted
+        GROUP BY film_id
+    ),
+    -- Solo tantas copias por película como rentas la piden: el resto queda
+    -- libre para las asignaciones concurrentes
+    locked_copy AS MATERIALIZED (
+        SELECT lc.inventory_id, wf.film_id
+        FROM wanted_film wf
+        CROSS JOIN LATERAL (
+            SELECT i.inventory_id
+            FROM inventory i
+            WHERE i.film_id = wf.film_id
+            AND NOT EXISTS (SELECT 1 FROM open_rental o WHERE o.inventory_id = i.inventory_id)
+            LIMIT wf.qty
+            FOR UPDATE OF i SKIP LOCKED
+        ) lc
+    ),
+    free_copy AS (
+        SELECT inventory_id, film_id,
+               row_number() OVER (PARTITION BY film_id ORDER BY inventory_id) AS copy_rank
+        FROM locked_copy
+    ),
+    assigned AS (
+        SELECT w.idx, w.customer_id, w.staff_id, w.film_id, fc.inventory_id
+        FROM wanted w
+        JOIN free_copy fc ON fc.film_id = w.film_id AND fc.copy_rank = w.copy_rank
+    ),
+    new_rental AS (
+        INSERT INTO rental (rental_date, inventory_id, customer_id, staff_id, due_date)
+        SELECT %(rental_date)s, a.inventory_id, a.customer_id, a.staff_id,
+               %(rental_date)s + ch.rental_duration * INTERVAL '1 day'
+        FROM assigned a
+        JOIN checked ch ON ch.idx = a.idx
+        RETURNING rental_id, rental_date, inventory_id
+    ),
+    film_stats AS (
+        INSERT INTO film_rental_stats (film_id, total_rentals)
+        SELECT a.film_id, COUNT(*)
+        FROM new_rental nr JOIN assigned a ON a.inventory_id = nr.inventory_id
+        GROUP BY a.film_id
+        ON CONFLICT (film_id) DO UPDATE
+        SET total_rentals = film_rental_stats.total_rentals + EXCLUDED.total_rentals
+    ),
+    staff_stats AS (
+        INSERT INTO staff_revenue_stats (staff_id, total_rentals)
+        SELECT a.staff_id, COUNT(*)
+        FROM new_rental nr JOIN assigned a ON a.inventory_id = nr.inventory_id
+        GROUP BY a.staff_id
+        ON CONFLICT (staff_id) DO UPDATE
+        SET total_rentals = staff_revenue_stats.total_rentals + EXCLUDED.total_rentals
+    ),
+    customer_stats AS (
+        INSERT INTO customer_rental_stats (customer_id, total_rentals, active_rentals, last_rental_date)
+        SELECT a.customer_id, COUNT(*), COUNT(*), MAX(nr.rental_date)
+        FROM new_rental nr JOIN assigned a ON a.inventory_id = nr.inventory_id
+        GROUP BY a.customer_id
+        -- Mismo orden de bloqueo en todos los lotes (evita deadlocks entre ellos)
+        ORDER BY a.customer_id
+        ON CONFLICT (customer_id) DO UPDATE
+        SET total_rentals = customer_rental_stats.total_rentals + EXCLUDED.total_rentals,
+            active_rentals = customer_rental_stats.active_rentals + EXCLUDED.active_rentals,
+            last_rental_date = GREATEST(customer_rental_stats.last_rental_date, EXCLUDED.last_rental_date)
+    )
+    SELECT
+        ch.idx - 1 AS index,
+        CASE
+            WHEN ch.customer_id IS NULL THEN 'customer_not_found'
+            WHEN ch.staff_id IS NULL THEN 'staff_not_found'
+            WHEN ch.film_id IS NULL THEN 'film_not_found'
+            WHEN nr.rental_id IS NULL THEN 'no_stock'
+            ELSE 'created'
+        END AS status,
+        nr.rental_id,
+        nr.rental_date,
+        ch.customer_id,
+        nr.inventory_id,
+        ch.film_id,
+        ch.staff_id,
+        ch.title AS film_title,
+        ch.rental_rate,
+        ch.rental_duration,
+        ch.customer_name,
+        ch.staff_name
+    FROM checked ch
+    LEFT JOIN assigned a ON a.idx = ch.idx
+    LEFT JOIN new_rental nr ON nr.inventory_id = a.inventory_id
+    ORDER BY ch.idx
+""")
+
+
+async def checkout_batch(cursor, items, rental_date):
+    """
+    Crear varias rentas en una sola sentencia (ver checkout).
+    items: lista de objetos con customer_id, film_id y staff_id.
+    Regresa una fila por item, en el mismo orden, con `index` y `status`.
+    """
+    params = {
+        'customer_ids': [item.customer_id for item in items],
+        'film_ids': [item.film_id for item in items],
+        'staff_ids': [item.staff_id for item in items],
+        'rental_date': rental_date,
+    }
+    for attempt in range(MAX_ALLOCATION_ATTEMPTS):
+        try:
+            await cursor.execute(BATCH_CHECKOUT_SQL, params)
+            return await cursor.fetchall()
+        except errors.UniqueViolation:
+            await cursor.connection.rollback()
+
+    return [{'index': n, 'status': 'no_stock'} for n in range(len(items))]
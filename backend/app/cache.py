@@ -0,0 +1,248 @@
+import functools
+import hashlib
+import inspect
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+from app.responses import dumps
+from app.replicas import require_current_reads
+from app.singleflight import flights
+from app.streaming import stream_format
+
+# Configuración del cache de respuestas
+CACHE_CONFIG = {
+    'enabled': os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true',
+    'max_entries': int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 2048)),
+    # Vigencia por defecto (segundos) de una respuesta cacheada
+    'ttl': float(os.getenv('RESPONSE_CACHE_TTL', 300)),
+}
+
+
+class CacheEntry:
+    __slots__ = ('body', 'etag', 'status_code')
+
+    def __init__(self, body, etag, status_code=200):
+        self.body = body
+        self.etag = etag
+        self.status_code = status_code
+
+
+class CacheBackend:
+    """
+    Interfaz de almacenamiento del cache de respuestas.
+    Los métodos son asíncronos para que un backend de red (Redis o similar)
+    pueda implementarla igual que el backend en memoria.
+    """
+
+    async def get(self, key):
+        raise NotImplementedError
+
+    async def set(self, key, entry, ttl, tags):
+        raise NotImplementedError
+
+    async def invalidate_tags(self, *tags):
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """
+    Backend LRU en proceso con expiración por entrada e índice de tags.
+    Cada entrada guarda sus tags, así al expirar, ser desalojada o
+    reemplazada se quita también del índice.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tags = {}
+
+    def _discard(self, key):
+        item = self._entries.pop(key, None)
+        if item is None:
+            return
+        for tag in item[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    async def get(self, key):
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        entry, expires_at, _ = item
+        if expires_at <= time.monotonic():
+            self._discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key, entry, ttl, tags):
+        self._discard(key)
+        tags = tuple(tags)
+        self._entries[key] = (entry, time.monotonic() + ttl, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._discard(next(iter(self._entries)))
+
+    async def invalidate_tags(self, *tags):
+        for tag in tags:
+            for key in tuple(self._tags.get(tag, ())):
+                self._discard(key)
+
+    async def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+
+
+response_cache = MemoryCache(CACHE_CONFIG['max_entries'])
+
+# Se incrementa en cada invalidación; una respuesta calculada mientras hubo
+# una invalidación no se guarda, porque pudo leer datos ya reemplazados.
+_invalidations = 0
+
+
+def configure_cache(backend):
+    """Reemplazar el backend del cache (p. ej. uno compartido entre réplicas)"""
+    global response_cache
+    response_cache = backend
+
+
+async def invalidate_tags(*tags):
+    """
+    Descartar las respuestas cacheadas con cualquiera de los tags.
+    Con MemoryCache solo afecta al worker que hace la escritura; los
+    endpoints que escriben otros workers (app/server.py) o réplicas usan
+    además una versión guardada en PostgreSQL (ver cached(version=...)).
+    Los tags de películas se invalidan en cada worker al recargar el
+    catálogo (catalog_version).
+    """
+    global _invalidations
+    _invalidations += 1
+    await response_cache.invalidate_tags(*tags)
+
+
+def make_etag(body):
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(request, etag):
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(',')]
+    return '*' in candidates or etag in candidates
+
+
+def query_names(signature):
+    """Parámetros de query que lee el endpoint (con su alias, p. ej. cursor)"""
+    return frozenset(
+        getattr(param.default, 'alias', None) or name
+        for name, param in signature.parameters.items()
+    )
+
+
+def cache_key(request, names):
+    """
+    Llave de cache: ruta + parámetros de query ordenados.
+    Solo cuentan los parámetros en names: los desconocidos no cambian la
+    respuesta y no deben crear entradas nuevas.
+    """
+    query = '&'.join(
+        f'{k}={v}' for k, v in sorted(request.query_params.multi_items()) if k in names
+    )
+    return f'{request.url.path}?{query}'
+
+
+def build_response(request, entry):
+    if entry.status_code != 200:
+        # Solo llega aquí sin cachear (p. ej. compartida por single-flight)
+        return Response(content=entry.body, status_code=entry.status_code, media_type='application/json')
+    headers = {'ETag': entry.etag, 'Cache-Control': 'no-cache'}
+    if etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type='application/json', headers=headers)
+
+
+def cached(ttl=None, tags=(), version=None):
+    """
+    Cachear la respuesta de un endpoint GET y responder con ETag fuerte.
+
+    ttl: segundos de vigencia de la respuesta (default RESPONSE_CACHE_TTL).
+    tags: plantillas formateadas con los parámetros del endpoint, p. ej.
+          ("films", "film:{film_id}"); las escrituras invalidan por tag.
+    version: corrutina que recibe los parámetros del endpoint y lee de la
+             base la versión de sus datos; la versión es parte de la llave,
+             así una escritura hecha en cualquier worker o réplica deja de
+             servir la respuesta anterior. Cuesta una lectura por request.
+    Un If-None-Match que coincide con el ETag responde 304 sin cuerpo.
+    Los misses concurrentes de la misma llave comparten una ejecución
+    (app/singleflight.py).
+    Las excepciones (404, etc.), las respuestas con status distinto de 200
+    y las exportaciones en streaming (ver app/streaming.py) no se cachean.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        # Si el endpoint ya recibe el Request se usa ese; FastAPI solo llena uno
+        request_param = next(
+            (name for name, param in signature.parameters.items() if param.annotation is Request),
+            None
+        )
+        names = query_names(signature)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request = kwargs[request_param] if request_param else kwargs.pop('_cache_request')
+            if not CACHE_CONFIG['enabled'] or stream_format(request):
+                return await func(*args, **kwargs)
+
+            key = cache_key(request, names)
+            if version is not None:
+                # La versión debe incluir las escrituras de este proceso y
+                # del cliente (cookie db_lsn), igual que la respuesta
+                require_current_reads()
+                key = f'{key}#{await version(kwargs)}'
+            entry = await response_cache.get(key)
+            if entry is None:
+                # Con réplicas: no guardar datos anteriores a las escrituras
+                # que invalidaron la respuesta
+                require_current_reads()
+                # Los misses concurrentes de la misma llave calculan una vez
+                entry, _ = await flights.do(
+                    ('cache', key), lambda: fill(key, args, kwargs), generation=_invalidations
+                )
+
+            return build_response(request, entry)
+
+        async def fill(key, args, kwargs):
+            generation = _invalidations
+            result = await func(*args, **kwargs)
+            # Los endpoints de lectura ya regresan la respuesta serializada
+            if isinstance(result, Response):
+                body, status_code = result.body, result.status_code
+            else:
+                body, status_code = dumps(result), 200
+            entry = CacheEntry(body, make_etag(body), status_code)
+            if status_code == 200 and generation == _invalidations:
+                await response_cache.set(
+                    key, entry, ttl or CACHE_CONFIG['ttl'],
+                    [tag.format(**kwargs) for tag in tags]
+                )
+            return entry
+
+        # FastAPI lee la firma: se agrega el Request que usa el cache
+        if request_param is None:
+            wrapper.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter('_cache_request', inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+            ])
+        return wrapper
+
+    return decorator
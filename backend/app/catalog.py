@@ -0,0 +1,192 @@
+import asyncio
+import os
+
+from psycopg.rows import tuple_row
+
+from app.cache import invalidate_tags
+from app.database import get_db_connection
+
+# Configuración del catálogo en memoria
+CATALOG_CONFIG = {
+    'enabled': os.getenv('CATALOG_ENABLED', 'true').lower() == 'true',
+    # Segundos entre consultas de catalog_version (upgrade-005-catalog-version.sql)
+    'refresh_interval': float(os.getenv('CATALOG_REFRESH_INTERVAL', 5)),
+}
+
+
+class FilmRecord:
+    """Película del catálogo con su categoría y actores"""
+
+    __slots__ = (
+        'film_id', 'title', 'description', 'release_year',
+        'rental_rate', 'length', 'rating', 'category', 'actors'
+    )
+
+    def __init__(self, film_id, title, description, release_year, rental_rate, length, rating):
+        self.film_id = film_id
+        self.title = title
+        self.description = description
+        self.release_year = release_year
+        self.rental_rate = rental_rate
+        self.length = length
+        self.rating = rating
+        self.category = None
+        self.actors = ()
+
+    def summary(self):
+        """Campos de los listados (mismas llaves que SELECT ... FROM film)"""
+        return {
+            'film_id': self.film_id,
+            'title': self.title,
+            'description': self.description,
+            'release_year': self.release_year,
+            'rental_rate': self.rental_rate,
+            'length': self.length,
+            'rating': self.rating,
+        }
+
+    def detail(self):
+        """Campos de GET /api/films/{id}"""
+        data = self.summary()
+        data['category'] = self.category
+        data['actors'] = list(self.actors)
+        return data
+
+
+class CatalogSnapshot:
+    """
+    Copia inmutable del catálogo.
+    by_id: lista indexada por film_id (None donde no hay película).
+    ordered: películas en el orden de los listados (title, film_id).
+    positions: film_id -> índice en ordered, para paginar por cursor.
+    categories: nombre en minúsculas -> (nombre, películas en orden de título).
+    """
+
+    __slots__ = ('version', 'by_id', 'ordered', 'positions', 'categories')
+
+    def __init__(self, version, films, film_categories, film_actors):
+        self.version = version
+        self.ordered = tuple(films)
+        self.by_id = [None] * (max((f.film_id for f in films), default=0) + 1)
+        self.positions = {}
+        for position, film in enumerate(self.ordered):
+            self.by_id[film.film_id] = film
+            self.positions[film.film_id] = position
+
+        members = {}
+        for film_id, name in film_categories:
+            film = self.film(film_id)
+            if film is None:
+                continue
+            film.category = film.category or name
+            members.setdefault(name, set()).add(film_id)
+        self.categories = {
+            name.lower(): (name, tuple(f for f in self.ordered if f.film_id in ids))
+            for name, ids in members.items()
+        }
+
+        actors = {}
+        for film_id, name in film_actors:
+            actors.setdefault(film_id, []).append(name)
+        for film_id, names in actors.items():
+            film = self.film(film_id)
+            if film is not None:
+                film.actors = tuple(names)
+
+    def film(self, film_id):
+        if 0 <= film_id < len(self.by_id):
+            return self.by_id[film_id]
+        return None
+
+    def category(self, name):
+        """(nombre, películas) de la categoría, sin distinguir mayúsculas"""
+        return self.categories.get(name.lower())
+
+    def page_start(self, title, film_id):
+        """
+        Índice siguiente al cursor (title, film_id) o None si la película ya
+        no existe o cambió de título (el router pagina entonces en la base).
+        """
+        position = self.positions.get(film_id)
+        if position is None or self.ordered[position].title != title:
+            return None
+        return position + 1
+
+
+class Catalog:
+    """
+    Catálogo de películas en memoria del proceso.
+    Se carga en el lifespan y se recarga cuando cambia catalog_version.
+    Mientras no hay snapshot (deshabilitado o falló la carga) los routers
+    consultan PostgreSQL.
+    """
+
+    def __init__(self):
+        self.snapshot = None
+
+    async def current_version(self, cursor):
+        await cursor.execute("SELECT version FROM catalog_version WHERE id = 1")
+        return (await cursor.fetchone())[0]
+
+    async def load(self):
+        async with get_db_connection() as conn:
+            async with conn.cursor(row_factory=tuple_row) as cursor:
+                # Todas las lecturas ven el mismo estado de la base
+                await cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+                version = await self.current_version(cursor)
+                await cursor.execute("""
+                    SELECT film_id, title, description, release_year,
+                           rental_rate, length, rating
+                    FROM film
+                    ORDER BY title, film_id
+                """)
+                films = [FilmRecord(*row) for row in await cursor.fetchall()]
+                await cursor.execute("""
+                    SELECT fc.film_id, c.name
+                    FROM film_category fc
+                    JOIN category c ON fc.category_id = c.category_id
+                    ORDER BY fc.film_id, c.name
+                """)
+                film_categories = await cursor.fetchall()
+                await cursor.execute("""
+                    SELECT DISTINCT fa.film_id, CONCAT(a.first_name, ' ', a.last_name) AS name
+                    FROM film_actor fa
+                    JOIN actor a ON fa.actor_id = a.actor_id
+                    ORDER BY fa.film_id, name
+                """)
+                film_actors = await cursor.fetchall()
+
+        self.snapshot = CatalogSnapshot(version, films, film_categories, film_actors)
+        await invalidate_tags("films")
+        return self.snapshot
+
+    async def refresh(self):
+        """Recargar si catalog_version cambió; regresa True si recargó"""
+        async with get_db_connection() as conn:
+            async with conn.cursor(row_factory=tuple_row) as cursor:
+                version = await self.current_version(cursor)
+        if self.snapshot is not None and self.snapshot.version == version:
+            return False
+        await self.load()
+        return True
+
+    async def refresh_loop(self):
+        """Tarea de fondo iniciada en el lifespan"""
+        while True:
+            await asyncio.sleep(CATALOG_CONFIG['refresh_interval'])
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️  Error recargando el catálogo: {e}")
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            'loaded': snapshot is not None,
+            'version': snapshot.version if snapshot else None,
+            'films': len(snapshot.ordered) if snapshot else 0,
+            'categories': len(snapshot.categories) if snapshot else 0,
+        }
+
+
+catalog = Catalog()
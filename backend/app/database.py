@@ -1,57 +1,87 @@
 import os
-from contextlib import contextmanager
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from psycopg2.pool import SimpleConnectionPool
+from contextlib import asynccontextmanager, AsyncExitStack
+from psycopg.conninfo import make_conninfo
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from app.pool import create_pool, PoolMonitor
+from app.replicas import replica_set
+
 # Configuración de la base de datos
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'localhost'),
     'port': int(os.getenv('DB_PORT', 5432)),
     'user': os.getenv('DB_USER', 'postgres'),
     'password': os.getenv('DB_PASSWORD', 'postgres'),
-    'database': os.getenv('DB_NAME', 'dvdrental')
+    'dbname': os.getenv('DB_NAME', 'dvdrental')
 }
 
-# Pool de conexiones
-connection_pool = SimpleConnectionPool(
-    minconn=1,
-    maxconn=20,
-    **DB_CONFIG
-)
+DB_CONNINFO = make_conninfo(**DB_CONFIG)
+
+# Pool de conexiones asíncrono (tamaño y timeouts configurables en app/pool.py).
+# No se crea al importar: open_pool() lo crea en el lifespan, dentro del event
+# loop de cada worker (después del fork, ver app/server.py).
+connection_pool = None
+pool_monitor = None
+
+# Commits hechos por este proceso: app/singleflight.py no comparte con un
+# request una ejecución que empezó antes de la última escritura
+write_generation = 0
+
+async def open_pool():
+    """Crear y abrir el pool del proceso (lifespan)"""
+    global connection_pool, pool_monitor
+    connection_pool = create_pool(DB_CONNINFO)
+    pool_monitor = PoolMonitor(connection_pool)
+    await connection_pool.open()
+    # Pools de las réplicas de lectura, si hay (DB_REPLICAS, ver app/replicas.py)
+    await replica_set.open(DB_CONNINFO)
+    return connection_pool
 
-@contextmanager
-def get_db_connection():
+async def close_pool():
+    """Cerrar el pool al apagar, una vez terminados los requests en curso"""
+    await replica_set.close()
+    if connection_pool is not None:
+        await connection_pool.close()
+
+@asynccontextmanager
+async def get_db_connection():
     """
-    Context manager para obtener una conexión de la base de datos.
-    Maneja automáticamente el cierre de la conexión.
+    Context manager asíncrono para obtener una conexión de la base de datos.
+    Hace commit al salir sin errores, rollback si hay excepción, y
+    devuelve la conexión al pool.
+    Con réplicas configuradas, las conexiones de los requests GET/HEAD son
+    de una réplica al día; si no hay una disponible, de la primaria.
     """
-    conn = connection_pool.getconn()
-    try:
+    async with AsyncExitStack() as stack:
+        replica = replica_set.route()
+        conn = await replica_set.connect(stack, replica) if replica is not None else None
+        if conn is None:
+            conn = await stack.enter_async_context(pool_monitor.connection())
         yield conn
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        connection_pool.putconn(conn)
-
-@contextmanager
-def get_db_cursor(commit=False):
+
+def get_pool_stats():
+    """Contadores actuales del pool (tamaño, en uso, en espera, latencia de adquisición)"""
+    return pool_monitor.stats()
+
+@asynccontextmanager
+async def get_db_cursor(commit=False):
     """
-    Context manager para obtener un cursor con formato de diccionario.
+    Context manager asíncrono para obtener un cursor con formato de diccionario.
+
+    Uso:
+        async with get_db_cursor() as cursor:
+            await cursor.execute(...)
+            rows = await cursor.fetchall()
     """
-    with get_db_connection() as conn:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        try:
+    global write_generation
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cursor:
             yield cursor
             if commit:
-                conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            cursor.close()
\ No newline at end of file
+                await conn.commit()
+                write_generation += 1
+                if replica_set.enabled:
+                    # Las lecturas siguientes del cliente deben ver este commit
+                    await replica_set.record_write(conn)
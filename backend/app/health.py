@@ -0,0 +1,83 @@
+import asyncio
+import os
+import time
+
+from psycopg_pool import PoolTimeout
+
+from app import database
+from app.database import get_pool_stats
+
+# Configuración de los health checks (probes de k8s)
+HEALTH_CONFIG = {
+    # Segundos máximos para obtener una conexión y hacer el ping
+    'timeout': float(os.getenv('READINESS_TIMEOUT', 1)),
+    # Requests esperando conexión a partir de los cuales la réplica deja de recibir tráfico
+    'max_waiting': int(os.getenv('READINESS_MAX_WAITING', 10)),
+    # Round-trip del ping (ms) a partir del cual se considera saturada
+    'max_latency_ms': float(os.getenv('READINESS_MAX_LATENCY_MS', 500)),
+}
+
+
+async def ping_database(timeout):
+    """
+    SELECT 1 con una conexión del pool.
+    Regresa (ms esperando conexión, ms de round-trip); lanza PoolTimeout,
+    TimeoutError o el error de psycopg si falla.
+    """
+    start = time.perf_counter()
+    async with database.connection_pool.connection(timeout=timeout) as conn:
+        acquired = time.perf_counter()
+        remaining = max(timeout - (acquired - start), 0.001)
+        await asyncio.wait_for(conn.execute("SELECT 1"), remaining)
+        done = time.perf_counter()
+    return (acquired - start) * 1000, (done - acquired) * 1000
+
+
+def pool_saturation(stats):
+    return {
+        'in_use': stats['in_use'],
+        'max_size': stats['max_size'],
+        'utilization': round(stats['in_use'] / stats['max_size'], 3) if stats['max_size'] else 0,
+        'waiting': stats['waiting'],
+    }
+
+
+async def check_readiness():
+    """
+    Estado para el readinessProbe: listo si hay conexión a PostgreSQL dentro
+    de READINESS_TIMEOUT y el pool no está saturado. Con la cola por encima
+    de READINESS_MAX_WAITING no se hace el ping (no suma carga) y la réplica
+    se reporta no lista para que el Service mande el tráfico a las demás.
+    """
+    pool = pool_saturation(get_pool_stats())
+    db_status = {'connected': None, 'acquire_ms': None, 'latency_ms': None}
+    reasons = []
+
+    if pool['waiting'] >= HEALTH_CONFIG['max_waiting']:
+        reasons.append('pool_saturated')
+    else:
+        try:
+            acquire_ms, latency_ms = await ping_database(HEALTH_CONFIG['timeout'])
+            db_status.update(connected=True, acquire_ms=round(acquire_ms, 2),
+                             latency_ms=round(latency_ms, 2))
+            if latency_ms > HEALTH_CONFIG['max_latency_ms']:
+                reasons.append('database_slow')
+        except PoolTimeout as e:
+            # Sin conexión en READINESS_TIMEOUT: el pool está lleno o no
+            # puede abrir conexiones nuevas porque la base no responde
+            db_status.update(error=str(e))
+            if get_pool_stats()['in_use'] >= pool['max_size']:
+                reasons.append('pool_exhausted')
+            else:
+                db_status.update(connected=False)
+                reasons.append('database_unavailable')
+        except Exception as e:
+            db_status.update(connected=False, error=str(e) or type(e).__name__)
+            reasons.append('database_unavailable')
+
+    return {
+        'status': 'not_ready' if reasons else 'ready',
+        'reasons': reasons,
+        'database': db_status,
+        'pool': pool,
+    }
@@ -1,11 +1,23 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import Response
 import os
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
+from psycopg_pool import PoolTimeout, TooManyRequests
 
 from app.routers import films, customers, staff, rentals, reports
-from app.database import connection_pool
+from app.database import open_pool, close_pool, get_pool_stats
+from app.rollups import reconcile_loop, RECONCILE_INTERVAL
+from app.partitions import maintenance_loop, PARTITION_CONFIG
+from app.catalog import catalog, CATALOG_CONFIG
+from app.health import check_readiness
+from app.slowlog import slow_queries, SLOW_QUERY_CONFIG
+from app.metrics import (
+    registry, collect, current_state, sync_loop, MetricsMiddleware, METRICS_CONFIG, PROMETHEUS_CONTENT_TYPE
+)
+from app.replicas import replica_set, ReadYourWritesMiddleware
+from app.responses import FastJSONResponse
 
 # Lifespan context manager para startup/shutdown
 @asynccontextmanager
@@ -13,10 +25,33 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Iniciando DVD Rental API...")
     print(f"📊 Conectando a PostgreSQL: {os.getenv('DB_HOST', 'localhost')}:{os.getenv('DB_PORT', 5432)}")
+    # Un pool por proceso: con varios workers (app/server.py) se crea después del fork
+    await open_pool()
+    if replica_set.enabled:
+        print(f"📖 Réplicas de lectura: {', '.join(r.name for r in replica_set.replicas)}")
+    tasks = []
+    if RECONCILE_INTERVAL > 0:
+        tasks.append(asyncio.create_task(reconcile_loop()))
+    if PARTITION_CONFIG['interval'] > 0:
+        tasks.append(asyncio.create_task(maintenance_loop()))
+    if METRICS_CONFIG['multiprocess_dir']:
+        tasks.append(asyncio.create_task(sync_loop()))
+    if CATALOG_CONFIG['enabled']:
+        try:
+            snapshot = await catalog.load()
+            print(f"📚 Catálogo en memoria: {len(snapshot.ordered)} películas")
+            tasks.append(asyncio.create_task(catalog.refresh_loop()))
+        except Exception as e:
+            # Sin catálogo los routers consultan PostgreSQL
+            print(f"⚠️  Catálogo en memoria deshabilitado: {e}")
     yield
-    # Shutdown
+    # Shutdown: uvicorn ya dejó de aceptar conexiones y terminó los requests en curso
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
     print("🛑 Cerrando conexiones de base de datos...")
-    connection_pool.closeall()
+    await close_pool()
     print("👋 DVD Rental API cerrada")
 
 # Crear aplicación FastAPI
@@ -24,7 +59,8 @@ app = FastAPI(
     title="DVD Rental API",
     description="API REST para gestión de rentas de DVDs",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Configurar CORS
@@ -34,8 +70,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-LSN"],
 )
 
+# Métricas por ruta (GET /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# Lecturas en réplicas con lectura-después-de-escritura (DB_REPLICAS)
+app.add_middleware(ReadYourWritesMiddleware)
+
 # Incluir routers
 app.include_router(films.router, prefix="/api/films", tags=["Films"])
 app.include_router(customers.router, prefix="/api/customers", tags=["Customers"])
@@ -63,7 +106,7 @@ async def root():
 # Manejador de errores global
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={
             "success": False,
@@ -72,16 +115,75 @@ async def global_exception_handler(request, exc):
         }
     )
 
-# Health check
+# Pool de conexiones agotado: el request esperó más de DB_POOL_TIMEOUT
+@app.exception_handler(PoolTimeout)
+@app.exception_handler(TooManyRequests)
+async def pool_exhausted_handler(request, exc):
+    return FastJSONResponse(
+        status_code=503,
+        content={
+            "success": False,
+            "message": "Servicio saturado, intente de nuevo",
+            "error": str(exc)
+        }
+    )
+
+# Health check (compatibilidad: docker-compose, CI y tests/test-api.sh)
 @app.get("/health")
 async def health_check():
+    readiness = await check_readiness()
+    if readiness['database']['connected'] is False:
+        return FastJSONResponse(status_code=503, content={"status": "unhealthy", "database": "disconnected"})
     return {"status": "healthy", "database": "connected"}
 
+# Liveness: el proceso responde; no depende de PostgreSQL para que k8s no
+# reinicie los pods cuando la caída es de la base
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+# Readiness: conexión del pool, latencia de PostgreSQL y saturación
+@app.get("/health/ready")
+async def readiness():
+    result = await check_readiness()
+    return FastJSONResponse(status_code=200 if result['status'] == 'ready' else 503, content=result)
+
+# Estado del pool de conexiones
+@app.get("/health/pool")
+async def pool_status():
+    return {"success": True, "data": get_pool_stats()}
+
+# Estado de las réplicas de lectura: disponibilidad, retraso y lecturas
+@app.get("/health/replicas")
+async def replicas_status():
+    return {"success": True, "data": replica_set.stats()}
+
+# Estado del catálogo en memoria
+@app.get("/health/catalog")
+async def catalog_status():
+    return {"success": True, "data": catalog.stats()}
+
+# Consultas lentas recientes (SLOW_QUERY_MS) y su resumen por consulta
+@app.get("/debug/slow-queries")
+async def slow_query_log(limit: int = Query(default=50, ge=1, le=1000)):
+    return {
+        "success": True,
+        "threshold_ms": SLOW_QUERY_CONFIG['threshold_ms'],
+        "summary": slow_queries.summary(),
+        "count": len(slow_queries.entries),
+        "data": slow_queries.recent(limit)
+    }
+
+# Métricas en formato de Prometheus (de todos los workers, ver app/metrics.collect)
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if METRICS_CONFIG['multiprocess_dir']:
+        content = await asyncio.to_thread(collect, current_state())
+    else:
+        content = registry.render(get_pool_stats())
+    return Response(content=content, media_type=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=int(os.getenv("PORT", 8000)),
-        reload=True
-    )
\ No newline at end of file
+    # Mismo arranque que producción (workers, apagado ordenado); ver app/server.py
+    from app.server import main
+    main()
@@ -0,0 +1,389 @@
+import asyncio
+import glob
+import json
+import os
+import tempfile
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+# Configuración de métricas
+METRICS_CONFIG = {
+    'enabled': os.getenv('METRICS_ENABLED', 'true').lower() == 'true',
+    # Directorio donde cada worker de app/server.py vuelca sus métricas para
+    # que GET /metrics las sume; vacío = solo las del proceso (un worker)
+    'multiprocess_dir': os.getenv('METRICS_MULTIPROC_DIR', ''),
+    # Segundos entre volcados de las métricas de cada worker
+    'sync_interval': float(os.getenv('METRICS_SYNC_INTERVAL', 5)),
+}
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Límites superiores de los histogramas
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class Histogram:
+    """Histograma acumulativo con el formato de Prometheus (buckets `le`, _sum, _count)"""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(le, conteo acumulado), ...] incluyendo +Inf"""
+        result, total = [], 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        result.append(('+Inf', self.count))
+        return result
+
+    def state(self):
+        return [self.counts, self.sum, self.count]
+
+    def merge_state(self, state):
+        counts, total, count = state
+        self.counts = [a + b for a, b in zip(self.counts, counts)]
+        self.sum += total
+        self.count += count
+
+
+class RequestDB:
+    """Request en curso y tiempo de base de datos acumulado"""
+
+    __slots__ = ('scope', 'seconds', 'queries')
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.seconds = 0.0
+        self.queries = 0
+
+    @property
+    def route(self):
+        """Plantilla de la ruta (el router de FastAPI la agrega al scope)"""
+        route = self.scope.get('route')
+        return route.path if route else None
+
+
+# Request en curso; lo fija el middleware y lo llena el cursor (app/pool.py)
+_request_db = ContextVar('request_db', default=None)
+
+
+def current_request():
+    """RequestDB del request en curso (None fuera de un request)"""
+    return _request_db.get()
+
+
+class MetricsRegistry:
+    """Contadores e histogramas en proceso, etiquetados por método y ruta"""
+
+    def __init__(self):
+        self.requests = {}
+        self.latency = {}
+        self.db_time = {}
+        self.db_queries = {}
+        self.response_size = {}
+        self.coalesced = {}
+        self.in_flight = 0
+        self.queries = Histogram(LATENCY_BUCKETS)
+
+    def observe_request(self, method, route, status, seconds, db, size):
+        key = (method, route)
+        status_key = (method, route, str(status))
+        self.requests[status_key] = self.requests.get(status_key, 0) + 1
+        if key not in self.latency:
+            self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.db_time[key] = Histogram(LATENCY_BUCKETS)
+            self.response_size[key] = Histogram(SIZE_BUCKETS)
+        self.latency[key].observe(seconds)
+        self.db_time[key].observe(db.seconds)
+        self.db_queries[key] = self.db_queries.get(key, 0) + db.queries
+        self.response_size[key].observe(size)
+
+    def observe_coalesced(self, method, route):
+        key = (method, route)
+        self.coalesced[key] = self.coalesced.get(key, 0) + 1
+
+    def observe_query(self, seconds):
+        self.queries.observe(seconds)
+        db = _request_db.get()
+        if db is not None:
+            db.seconds += seconds
+            db.queries += 1
+
+    def state(self):
+        """Contadores e histogramas como listas JSON (llaves de tupla aplanadas)"""
+        return {
+            'counters': {
+                name: [[*key, value] for key, value in getattr(self, name).items()]
+                for name in ('requests', 'db_queries', 'coalesced')
+            },
+            'histograms': {
+                name: [[*key, histogram.state()] for key, histogram in getattr(self, name).items()]
+                for name in ('latency', 'db_time', 'response_size')
+            },
+            'queries': self.queries.state(),
+            'in_flight': self.in_flight,
+        }
+
+    def merge_state(self, state, gauges=True):
+        """Sumar el estado de otro worker; gauges=False ignora sus valores instantáneos"""
+        for name, rows in state['counters'].items():
+            counter = getattr(self, name)
+            for *key, value in rows:
+                key = tuple(key)
+                counter[key] = counter.get(key, 0) + value
+        for name, rows in state['histograms'].items():
+            histograms = getattr(self, name)
+            buckets = SIZE_BUCKETS if name == 'response_size' else LATENCY_BUCKETS
+            for *key, histogram_state in rows:
+                histograms.setdefault(tuple(key), Histogram(buckets)).merge_state(histogram_state)
+        self.queries.merge_state(state['queries'])
+        if gauges:
+            self.in_flight += state['in_flight']
+
+    def render(self, pool_stats=None):
+        """Texto en formato de exposición de Prometheus"""
+        lines = []
+        _counter(lines, 'http_requests_total', 'Requests HTTP atendidos',
+                 {_labels(method=m, route=r, status=s): v for (m, r, s), v in self.requests.items()})
+        _gauge(lines, 'http_requests_in_flight', 'Requests HTTP en proceso', {'': self.in_flight})
+        _histograms(lines, 'http_request_duration_seconds', 'Duración de los requests HTTP',
+                    self.latency)
+        _histograms(lines, 'http_request_db_duration_seconds',
+                    'Tiempo en consultas a PostgreSQL por request', self.db_time)
+        _counter(lines, 'http_request_db_queries_total', 'Consultas a PostgreSQL hechas por la ruta',
+                 {_labels(method=m, route=r): v for (m, r), v in self.db_queries.items()})
+        _histograms(lines, 'http_response_size_bytes', 'Tamaño del cuerpo de la respuesta',
+                    self.response_size)
+        _counter(lines, 'http_requests_coalesced_total',
+                 'Requests que compartieron una ejecución en curso (single-flight)',
+                 {_labels(method=m, route=r): v for (m, r), v in self.coalesced.items()})
+        _histograms(lines, 'db_query_duration_seconds', 'Duración de cada consulta',
+                    {(): self.queries})
+        if pool_stats:
+            _pool_metrics(lines, pool_stats)
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Métricas del pool que son instantáneas (no contadores)
+POOL_GAUGES = ('min_size', 'max_size', 'size', 'available', 'in_use', 'waiting')
+
+
+def prepare_multiprocess_dir():
+    """
+    Preparar el directorio compartido antes del fork (app/server.py): uno
+    temporal si METRICS_MULTIPROC_DIR está vacío, sin volcados de una
+    ejecución anterior.
+    """
+    directory = METRICS_CONFIG['multiprocess_dir'] or tempfile.mkdtemp(prefix='dvdrental-metrics-')
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        os.remove(path)
+    METRICS_CONFIG['multiprocess_dir'] = directory
+    return directory
+
+
+def write_state(state):
+    """Volcar el estado de este worker (escritura atómica con os.replace)"""
+    path = os.path.join(METRICS_CONFIG['multiprocess_dir'], f'{os.getpid()}.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(path + '.tmp', path)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merge_pool(total, stats, gauges):
+    for key, value in stats.items():
+        if key == 'acquire_latency_ms':
+            acquire = total.setdefault(key, {'count': 0, 'sum_ms': 0.0, 'buckets': {}})
+            acquire['count'] += value['count']
+            acquire['sum_ms'] += value['sum_ms']
+            for bound, count in value['buckets'].items():
+                acquire['buckets'][bound] = acquire['buckets'].get(bound, 0) + count
+        elif gauges or key not in POOL_GAUGES:
+            total[key] = total.get(key, 0) + value
+        else:
+            total.setdefault(key, 0)
+
+
+def collect(state):
+    """
+    Texto de GET /metrics con varios workers (METRICS_CONFIG['multiprocess_dir']):
+    el worker que atiende el scrape vuelca su estado (current_state()) y suma
+    el de todos, los demás con hasta METRICS_SYNC_INTERVAL segundos de
+    atraso. Los contadores de workers que ya terminaron se conservan (así no
+    retroceden); sus gauges no se suman. Lee archivos: llamarla con
+    asyncio.to_thread.
+    """
+    write_state(state)
+    merged, pool = MetricsRegistry(), {}
+    for path in glob.glob(os.path.join(METRICS_CONFIG['multiprocess_dir'], '*.json')):
+        try:
+            with open(path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            continue
+        alive = _alive(int(os.path.basename(path).split('.')[0]))
+        merged.merge_state(state['registry'], gauges=alive)
+        if state['pool']:
+            _merge_pool(pool, state['pool'], gauges=alive)
+    return merged.render(pool or None)
+
+
+def current_state():
+    # Importación diferida: app.database -> app.pool -> app.metrics
+    from app.database import get_pool_stats
+    return {'registry': registry.state(), 'pool': get_pool_stats()}
+
+
+async def sync_loop():
+    """
+    Tarea de fondo (lifespan) de cada worker: volcar sus métricas cada
+    METRICS_SYNC_INTERVAL segundos y una última vez al apagarse.
+    """
+    try:
+        while True:
+            try:
+                await asyncio.to_thread(write_state, current_state())
+            except Exception as e:
+                print(f"⚠️  Error volcando métricas: {e}")
+            await asyncio.sleep(METRICS_CONFIG['sync_interval'])
+    finally:
+        write_state(current_state())
+
+
+def observe_query(seconds):
+    """Hook de la capa de base de datos: una consulta terminó"""
+    if METRICS_CONFIG['enabled']:
+        registry.observe_query(seconds)
+
+
+def observe_coalesced(method, route):
+    """Hook de app/singleflight.py: un request recibió el resultado de otro"""
+    if METRICS_CONFIG['enabled']:
+        registry.observe_coalesced(method, route)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: mide duración, estado, tamaño de respuesta y tiempo de
+    base de datos de cada request. La ruta es la plantilla de FastAPI
+    (/api/films/{film_id}) para no crear una serie por id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        # El request en curso se fija siempre: lo usa también app/slowlog.py
+        db = RequestDB(scope)
+        token = _request_db.set(db)
+        if not METRICS_CONFIG['enabled']:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _request_db.reset(token)
+            return
+
+        start = time.perf_counter()
+        status, size = 500, 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.in_flight -= 1
+            _request_db.reset(token)
+            registry.observe_request(
+                scope['method'], db.route or 'unmatched', status,
+                time.perf_counter() - start, db, size
+            )
+
+
+# ============ FORMATO DE EXPOSICIÓN ============
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+
+
+def _series(name, labels, value):
+    return f'{name}{{{labels}}} {value}' if labels else f'{name} {value}'
+
+
+def _counter(lines, name, help_text, values):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+    lines += [_series(name, labels, value) for labels, value in values.items()]
+
+
+def _gauge(lines, name, help_text, values):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+    lines += [_series(name, labels, value) for labels, value in values.items()]
+
+
+def _histograms(lines, name, help_text, histograms):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for key, histogram in histograms.items():
+        labels = _labels(method=key[0], route=key[1]) if key else ''
+        prefix = labels + ',' if labels else ''
+        for bound, count in histogram.cumulative():
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {count}')
+        lines.append(_series(f'{name}_sum', labels, round(histogram.sum, 6)))
+        lines.append(_series(f'{name}_count', labels, histogram.count))
+
+
+def _pool_metrics(lines, stats):
+    """Métricas del pool a partir de app.pool.PoolMonitor.stats()"""
+    for key in ('min_size', 'max_size', 'size', 'available', 'in_use', 'waiting'):
+        _gauge(lines, f'db_pool_{key}', f'Pool de conexiones: {key}', {'': stats[key]})
+    for key in ('requests_total', 'requests_queued', 'requests_errors', 'connections_lost'):
+        # Los contadores llevan el sufijo _total de Prometheus
+        name = f"db_pool_{key.removesuffix('_total')}_total"
+        _counter(lines, name, f'Pool de conexiones: {key}', {'': stats[key]})
+
+    acquire = stats['acquire_latency_ms']
+    name = 'db_pool_acquire_duration_seconds'
+    lines += [f'# HELP {name} Espera por una conexión del pool', f'# TYPE {name} histogram']
+    for bound, count in acquire['buckets'].items():
+        le = bound if bound == '+Inf' else float(bound) / 1000
+        lines.append(f'{name}_bucket{{le="{le}"}} {count}')
+    lines.append(f'{name}_sum {acquire["sum_ms"] / 1000}')
+    lines.append(f'{name}_count {acquire["count"]}')
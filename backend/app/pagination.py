@@ -0,0 +1,69 @@
+import base64
+import json
+from datetime import datetime, date
+
+from fastapi import HTTPException
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable en cursor: {type(value).__name__}")
+
+
+def encode_cursor(row, keys):
+    """
+    Codificar un cursor opaco con los valores de las llaves de ordenamiento
+    de la última fila de la página.
+    """
+    payload = json.dumps([row[key] for key in keys], default=_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _key_value(key, value):
+    """
+    Valor de una llave del cursor con el tipo de su columna: *_id entero,
+    *_date fecha ISO 8601 (regresa datetime), el resto texto.
+    None si el valor no tiene ese tipo.
+    """
+    if key.endswith('_id'):
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+    if not isinstance(value, str) or '\x00' in value:
+        return None
+    if key.endswith('_date'):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value
+
+
+def decode_cursor(token, keys):
+    """
+    Decodificar un cursor generado por encode_cursor.
+    Regresa la lista de valores en el orden de keys, o 400 si el cursor no es
+    válido (incluido un valor que no tiene el tipo de su llave).
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    values = [_key_value(key, value) for key, value in zip(keys, values)]
+    if None in values:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return values
+
+
+def paginate(rows, limit, keys):
+    """
+    Recortar una página consultada con LIMIT limit + 1.
+    Regresa (filas, next_cursor); next_cursor es None en la última página.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], keys)
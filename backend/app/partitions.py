@@ -0,0 +1,47 @@
+import asyncio
+import os
+
+from app.database import get_db_cursor
+
+# Mantenimiento de las particiones mensuales de rental y payment
+# (upgrade-009-partitioning.sql)
+PARTITION_CONFIG = {
+    # Segundos entre revisiones (0 = desactivado)
+    'interval': float(os.getenv('PARTITION_MAINTENANCE_INTERVAL', 86400)),
+    # Meses después del actual que deben existir de antemano
+    'months_ahead': int(os.getenv('PARTITION_MONTHS_AHEAD', 3)),
+}
+
+
+async def create_future_partitions(cursor):
+    """
+    Crear las particiones del mes actual y los siguientes que falten.
+    Regresa sus nombres; nada si las tablas no están particionadas.
+    """
+    await cursor.execute(
+        "SELECT to_regprocedure('public.create_future_partitions(integer)') IS NOT NULL AS available"
+    )
+    if not (await cursor.fetchone())['available']:
+        return []
+    await cursor.execute(
+        "SELECT create_future_partitions AS name FROM create_future_partitions(%s)",
+        (PARTITION_CONFIG['months_ahead'],)
+    )
+    return [row['name'] for row in await cursor.fetchall()]
+
+
+async def maintenance_loop():
+    """
+    Tarea de fondo iniciada en el lifespan: revisa al arrancar y luego cada
+    PARTITION_CONFIG['interval'] segundos, así las rentas y pagos de un mes
+    nuevo nunca caen en la partición DEFAULT.
+    """
+    while True:
+        try:
+            async with get_db_cursor(commit=True) as cursor:
+                created = await create_future_partitions(cursor)
+            if created:
+                print(f"🗂️  Particiones creadas: {', '.join(created)}")
+        except Exception as e:
+            print(f"⚠️  Error creando particiones: {e}")
+        await asyncio.sleep(PARTITION_CONFIG['interval'])
@@ -0,0 +1,154 @@
+import os
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from psycopg import AsyncCursor
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from app.metrics import observe_query
+from app.slowlog import slow_queries
+from app.statements import prepare_mode
+
+# Configuración del pool (se ajusta por variables de entorno, p. ej. desde el ConfigMap de k8s)
+POOL_CONFIG = {
+    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 20)),
+    # Segundos que un request espera por una conexión antes de fallar con PoolTimeout
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+    # Máximo de requests en cola (0 = sin límite); al excederlo falla con TooManyRequests
+    'max_waiting': int(os.getenv('DB_POOL_MAX_WAITING', 0)),
+    # Las conexiones se reciclan después de este tiempo de vida (segundos)
+    'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+    # Las conexiones ociosas por encima de min_size se cierran después de este tiempo (segundos)
+    'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+}
+
+# Límites superiores (ms) del histograma de latencia de adquisición
+ACQUIRE_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class AcquireHistogram:
+    """
+    Histograma acumulativo del tiempo que tarda un request en obtener una
+    conexión del pool.
+    """
+
+    def __init__(self, buckets=ACQUIRE_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def observe(self, elapsed_ms):
+        self.counts[bisect_left(self.buckets, elapsed_ms)] += 1
+        self.total += 1
+        self.sum_ms += elapsed_ms
+
+    def snapshot(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets['+Inf'] = self.total
+        return {
+            'count': self.total,
+            'sum_ms': round(self.sum_ms, 3),
+            'buckets': buckets
+        }
+
+
+class TimedCursor(AsyncCursor):
+    """
+    Cursor que reporta la duración de cada consulta a app.metrics y registra
+    las que pasan de SLOW_QUERY_MS en app.slowlog. Las sentencias registradas
+    en app.statements se ejecutan preparadas; el resto, nunca.
+    """
+
+    async def execute(self, query, params=None, **kwargs):
+        kwargs.setdefault('prepare', prepare_mode(query))
+        start = time.perf_counter()
+        error = None
+        try:
+            return await super().execute(query, params, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._observe(query, params, time.perf_counter() - start, error)
+
+    async def executemany(self, query, params_seq, **kwargs):
+        start = time.perf_counter()
+        error = None
+        try:
+            return await super().executemany(query, params_seq, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            # Se registra la forma del primer juego de parámetros
+            params = params_seq[0] if isinstance(params_seq, (list, tuple)) and params_seq else None
+            self._observe(query, params, time.perf_counter() - start, error)
+
+    def _observe(self, query, params, elapsed, error):
+        observe_query(elapsed)
+        elapsed_ms = elapsed * 1000
+        if slow_queries.enabled(elapsed_ms):
+            slow_queries.record(self, query, params, elapsed_ms, error)
+
+
+def create_pool(conninfo):
+    """
+    Crear el pool de conexiones asíncrono.
+
+    El pool crece bajo demanda de min_size a max_size y encola a los
+    requests cuando se agota. Cada conexión se valida con un ping al
+    entregarse (check_connection), así que las conexiones muertas tras un
+    reinicio de PostgreSQL se descartan y se reemplazan.
+    Se crea cerrado: se abre en el lifespan de la aplicación.
+    Los cursores son TimedCursor para medir el tiempo de base de datos.
+    """
+    return AsyncConnectionPool(
+        conninfo=conninfo,
+        kwargs={'row_factory': dict_row, 'cursor_factory': TimedCursor},
+        check=AsyncConnectionPool.check_connection,
+        open=False,
+        **POOL_CONFIG
+    )
+
+
+class PoolMonitor:
+    """Envuelve el pool para medir adquisiciones y exponer contadores"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.acquire_latency = AcquireHistogram()
+        self.in_use = 0
+
+    @asynccontextmanager
+    async def connection(self, timeout=None):
+        start = time.perf_counter()
+        async with self.pool.connection(timeout=timeout) as conn:
+            self.acquire_latency.observe((time.perf_counter() - start) * 1000)
+            self.in_use += 1
+            try:
+                yield conn
+            finally:
+                self.in_use -= 1
+
+    def stats(self):
+        stats = self.pool.get_stats()
+        return {
+            'min_size': stats.get('pool_min', 0),
+            'max_size': stats.get('pool_max', 0),
+            'size': stats.get('pool_size', 0),
+            'available': stats.get('pool_available', 0),
+            'in_use': self.in_use,
+            'waiting': stats.get('requests_waiting', 0),
+            'requests_total': stats.get('requests_num', 0),
+            'requests_queued': stats.get('requests_queued', 0),
+            'requests_errors': stats.get('requests_errors', 0),
+            'connections_lost': stats.get('connections_lost', 0),
+            'acquire_latency_ms': self.acquire_latency.snapshot()
+        }
@@ -0,0 +1,416 @@
+import asyncio
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from http.cookies import CookieError, SimpleCookie
+
+import psycopg
+from psycopg.conninfo import conninfo_to_dict, make_conninfo
+from psycopg.rows import tuple_row
+from psycopg_pool import PoolTimeout
+
+from app.pool import create_pool, PoolMonitor
+
+# Configuración de las réplicas de lectura
+REPLICA_CONFIG = {
+    # Réplicas separadas por coma: "host[:puerto]" o conninfo/URI completo.
+    # Lo que no se indique (usuario, contraseña, base) se toma de DB_CONFIG.
+    'replicas': [entry.strip() for entry in os.getenv('DB_REPLICAS', '').split(',') if entry.strip()],
+    # Retraso máximo (segundos) con el que una réplica sigue recibiendo lecturas
+    'max_lag': float(os.getenv('DB_REPLICA_MAX_LAG', 5)),
+    # Cada cuántos segundos se consulta la posición del WAL de primaria y réplicas
+    'check_interval': float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 1)),
+    # Segundos esperando conexión de una réplica antes de leer de la primaria
+    'acquire_timeout': float(os.getenv('DB_REPLICA_ACQUIRE_TIMEOUT', 1)),
+    # Vigencia (segundos) de la cookie que pide leer lo ya escrito
+    'read_your_writes_ttl': int(os.getenv('DB_READ_YOUR_WRITES_TTL', 60)),
+}
+
+# Solo estos métodos leen de réplicas; el resto usa siempre la primaria
+READ_METHODS = frozenset(('GET', 'HEAD'))
+
+# LSN de la última escritura del cliente (cookie o header)
+LSN_COOKIE = 'db_lsn'
+LSN_HEADER = b'x-db-lsn'
+
+PRIMARY_STATUS_SQL = "SELECT pg_current_wal_lsn()::text"
+REPLICA_STATUS_SQL = "SELECT pg_is_in_recovery(), pg_last_wal_replay_lsn()::text"
+
+
+def parse_lsn(value):
+    """'16/B374D848' -> entero comparable; None si no es un LSN"""
+    try:
+        high, low = value.split('/')
+        return (int(high, 16) << 32) | int(low, 16)
+    except (AttributeError, ValueError):
+        return None
+
+
+def format_lsn(lsn):
+    return f'{lsn >> 32:X}/{lsn & 0xFFFFFFFF:X}'
+
+
+def replica_conninfo(primary, entry):
+    """DSN de una réplica a partir del de la primaria y su entrada en DB_REPLICAS"""
+    if '=' in entry or '://' in entry:
+        params = conninfo_to_dict(entry)
+    else:
+        host, _, port = entry.partition(':')
+        params = {'host': host, 'port': port or None}
+    return make_conninfo(primary, **params)
+
+
+class ReadConsistency:
+    """
+    Estado del request en curso: si puede leer de réplicas, el LSN mínimo
+    que debe haber aplicado la réplica (la última escritura del cliente) y
+    el LSN de las escrituras que hizo.
+    """
+
+    __slots__ = ('read_only', 'min_lsn', 'write_lsn', 'stale')
+
+    def __init__(self, read_only, min_lsn):
+        self.read_only = read_only
+        self.min_lsn = min_lsn
+        self.write_lsn = 0
+        # Leyó de una réplica que no tenía las últimas escrituras del proceso
+        self.stale = False
+
+
+_consistency = ContextVar('read_consistency', default=None)
+
+
+class Probe:
+    """Conexión dedicada (autocommit, fuera de los pools) para los chequeos"""
+
+    def __init__(self, conninfo):
+        self.conninfo = conninfo
+        self.conn = None
+
+    async def fetchone(self, query, timeout):
+        try:
+            if self.conn is None or self.conn.closed:
+                self.conn = await asyncio.wait_for(
+                    psycopg.AsyncConnection.connect(self.conninfo, autocommit=True), timeout
+                )
+            cursor = await asyncio.wait_for(self.conn.execute(query), timeout)
+            return await cursor.fetchone()
+        except BaseException:
+            await self.close()
+            raise
+
+    async def close(self):
+        if self.conn is not None:
+            conn, self.conn = self.conn, None
+            await conn.close()
+
+
+class Replica:
+    """Pool de una réplica y su estado según el último chequeo"""
+
+    def __init__(self, conninfo):
+        params = conninfo_to_dict(conninfo)
+        self.name = f"{params.get('host', 'localhost')}:{params.get('port', 5432)}"
+        self.conninfo = conninfo
+        self.probe = Probe(conninfo)
+        self.pool = None
+        self.monitor = None
+        self.available = False
+        self.replay_lsn = 0
+        self.lag_seconds = None
+        self.last_error = None
+        self.checked_at = None
+        self.reads = 0
+
+    async def open(self):
+        self.pool = create_pool(self.conninfo)
+        self.monitor = PoolMonitor(self.pool)
+        # Si la réplica no responde el pool reintenta en segundo plano
+        await self.pool.open()
+
+    async def close(self):
+        await self.probe.close()
+        if self.pool is not None:
+            await self.pool.close()
+
+    async def check(self, timeout):
+        try:
+            in_recovery, lsn = await self.probe.fetchone(REPLICA_STATUS_SQL, timeout)
+        except Exception as e:
+            self.mark_unavailable(e)
+            return
+        self.checked_at = time.monotonic()
+        if not in_recovery:
+            # Promovida: ya no sigue a la primaria, sus datos pueden divergir
+            self.mark_unavailable('no está en recuperación (¿promovida?)')
+            return
+        self.available = True
+        self.replay_lsn = parse_lsn(lsn) or 0
+        self.last_error = None
+
+    def mark_unavailable(self, error):
+        """Sin lecturas hasta el siguiente chequeo exitoso"""
+        self.available = False
+        self.last_error = str(error) or type(error).__name__
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'available': self.available,
+            'lag_seconds': None if self.lag_seconds is None else round(self.lag_seconds, 3),
+            'replay_lsn': format_lsn(self.replay_lsn) if self.replay_lsn else None,
+            'reads': self.reads,
+            'last_error': self.last_error,
+            'checked_ago_s': round(time.monotonic() - self.checked_at, 3) if self.checked_at else None,
+            'pool': self.monitor.stats() if self.monitor else None,
+        }
+
+
+class ReplicaSet:
+    """
+    Réplicas de lectura (streaming replication) de la primaria.
+
+    Las conexiones que piden los requests GET/HEAD van a una réplica; las
+    escrituras, las tareas de fondo y el resto de métodos usan la primaria.
+    Una réplica recibe lecturas si respondió al último chequeo, su retraso
+    no pasa de DB_REPLICA_MAX_LAG y ya aplicó la última escritura del
+    cliente; entre las elegibles se turnan (round-robin) y gana la que tenga
+    menos conexiones en uso. Si ninguna califica se lee de la primaria.
+
+    El retraso se mide contra la primaria: cada DB_REPLICA_CHECK_INTERVAL se
+    guarda su posición del WAL; si una réplica no ha aplicado la posición
+    que la primaria tenía en t, va al menos now - t atrasada. A diferencia
+    de pg_last_xact_replay_timestamp() no crece cuando no hay escrituras ni
+    se queda en cero si la réplica pierde la conexión con la primaria.
+    """
+
+    def __init__(self):
+        self.replicas = []
+        self.primary = None
+        self.last_write_lsn = 0
+        self.primary_reads = 0
+        self.fallbacks = {'unavailable': 0, 'lag': 0, 'read_your_writes': 0}
+        self._samples = deque()
+        self._next = 0
+        self._task = None
+
+    @property
+    def enabled(self):
+        return bool(self.replicas)
+
+    async def open(self, primary_conninfo):
+        """Abrir los pools de las réplicas e iniciar los chequeos (lifespan)"""
+        if not REPLICA_CONFIG['replicas']:
+            return
+        self.primary = Probe(primary_conninfo)
+        replicas = [Replica(replica_conninfo(primary_conninfo, entry)) for entry in REPLICA_CONFIG['replicas']]
+        for replica in replicas:
+            await replica.open()
+        # Estado inicial antes de recibir tráfico
+        await self.check(replicas)
+        self.replicas = replicas
+        self._task = asyncio.create_task(self.check_loop())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        replicas, self.replicas = self.replicas, []
+        for replica in replicas:
+            await replica.close()
+        if self.primary is not None:
+            await self.primary.close()
+
+    async def check(self, replicas=None):
+        timeout = REPLICA_CONFIG['check_interval'] + 1
+        now = time.monotonic()
+        try:
+            row = await self.primary.fetchone(PRIMARY_STATUS_SQL, timeout)
+            self._samples.append((now, parse_lsn(row[0])))
+        except Exception:
+            # Sin primaria el retraso se calcula con las posiciones anteriores
+            pass
+        horizon = now - REPLICA_CONFIG['max_lag'] - 2 * REPLICA_CONFIG['check_interval']
+        while len(self._samples) > 1 and self._samples[0][0] < horizon:
+            self._samples.popleft()
+
+        for replica in replicas or self.replicas:
+            await replica.check(timeout)
+            if replica.available:
+                replica.lag_seconds = self.lag(replica.replay_lsn, time.monotonic())
+
+    async def check_loop(self):
+        """Tarea de fondo iniciada en open()"""
+        while True:
+            await asyncio.sleep(REPLICA_CONFIG['check_interval'])
+            try:
+                await self.check()
+            except Exception as e:
+                print(f"⚠️  Error revisando réplicas: {e}")
+
+    def lag(self, replay_lsn, now):
+        """Segundos desde la primera posición de la primaria que la réplica no ha aplicado"""
+        for sampled_at, lsn in self._samples:
+            if lsn > replay_lsn:
+                return now - sampled_at
+        return 0.0
+
+    def choose(self, min_lsn):
+        """Réplica elegible menos ocupada, o None para leer de la primaria"""
+        candidates = []
+        lagging = behind = False
+        for replica in self.replicas:
+            if not replica.available:
+                continue
+            if replica.lag_seconds > REPLICA_CONFIG['max_lag']:
+                lagging = True
+            elif replica.replay_lsn < min_lsn:
+                behind = True
+            else:
+                candidates.append(replica)
+        if not candidates:
+            reason = 'read_your_writes' if behind else 'lag' if lagging else 'unavailable'
+            self.fallbacks[reason] += 1
+            return None
+        # Round-robin entre las elegibles; con conexiones en uso gana la menos ocupada
+        self._next = (self._next + 1) % len(candidates)
+        rotated = candidates[self._next:] + candidates[:self._next]
+        return min(rotated, key=lambda replica: replica.monitor.in_use)
+
+    def route(self):
+        """Réplica para la conexión que pide el request en curso, o None (primaria)"""
+        state = _consistency.get()
+        if state is None or not state.read_only:
+            return None
+        replica = self.choose(state.min_lsn)
+        if replica is None:
+            self.primary_reads += 1
+            return None
+        if replica.replay_lsn < self.last_write_lsn:
+            state.stale = True
+        return replica
+
+    async def connect(self, stack, replica):
+        """
+        Conexión de la réplica registrada en stack (AsyncExitStack), o None si
+        no se obtuvo en DB_REPLICA_ACQUIRE_TIMEOUT: la réplica se marca no
+        disponible hasta el siguiente chequeo y el request lee de la primaria.
+        """
+        try:
+            conn = await stack.enter_async_context(
+                replica.monitor.connection(timeout=REPLICA_CONFIG['acquire_timeout'])
+            )
+        except (PoolTimeout, psycopg.OperationalError) as e:
+            replica.mark_unavailable(e)
+            self.fallbacks['unavailable'] += 1
+            self.primary_reads += 1
+            return None
+        replica.reads += 1
+        return conn
+
+    async def record_write(self, conn):
+        """Después del commit: posición del WAL que deben alcanzar las lecturas siguientes"""
+        async with conn.cursor(row_factory=tuple_row) as cursor:
+            await cursor.execute(PRIMARY_STATUS_SQL)
+            lsn = parse_lsn((await cursor.fetchone())[0])
+        self.last_write_lsn = max(self.last_write_lsn, lsn)
+        state = _consistency.get()
+        if state is not None:
+            state.write_lsn = max(state.write_lsn, lsn)
+            state.min_lsn = max(state.min_lsn, lsn)
+
+    def stats(self):
+        return {
+            'enabled': self.enabled,
+            'max_lag_seconds': REPLICA_CONFIG['max_lag'],
+            'last_write_lsn': format_lsn(self.last_write_lsn) if self.last_write_lsn else None,
+            'primary_reads': self.primary_reads,
+            'fallbacks': dict(self.fallbacks),
+            'replicas': [replica.stats() for replica in self.replicas],
+        }
+
+
+replica_set = ReplicaSet()
+
+
+def require_current_reads():
+    """
+    Las lecturas que siguen en el request deben ver todas las escrituras
+    hechas por este proceso (p. ej. antes de guardar una respuesta en un
+    cache que esas escrituras invalidaron).
+    """
+    state = _consistency.get()
+    if state is not None:
+        state.min_lsn = max(state.min_lsn, replica_set.last_write_lsn)
+
+
+def read_requirement():
+    """LSN mínimo que deben tener las lecturas del request en curso (0 = cualquiera)"""
+    state = _consistency.get()
+    return state.min_lsn if state is not None else 0
+
+
+def read_may_be_stale():
+    """True si el request leyó de una réplica sin las últimas escrituras del proceso"""
+    state = _consistency.get()
+    return state is not None and state.stale
+
+
+def client_lsn(scope):
+    """LSN de la última escritura del cliente: header X-DB-LSN o cookie db_lsn"""
+    cookie_header = None
+    for name, value in scope['headers']:
+        if name == LSN_HEADER:
+            return parse_lsn(value.decode('latin-1')) or 0
+        if name == b'cookie':
+            cookie_header = value.decode('latin-1')
+    if cookie_header:
+        try:
+            morsel = SimpleCookie(cookie_header).get(LSN_COOKIE)
+        except CookieError:
+            morsel = None
+        if morsel is not None:
+            return parse_lsn(morsel.value) or 0
+    return 0
+
+
+class ReadYourWritesMiddleware:
+    """
+    Middleware ASGI para leer lo ya escrito con réplicas (DB_REPLICAS).
+    Una respuesta cuyo request hizo commit lleva el LSN de la primaria en el
+    header X-DB-LSN y en la cookie db_lsn (DB_READ_YOUR_WRITES_TTL segundos);
+    los requests siguientes que lo envían solo leen de réplicas que ya lo
+    aplicaron, o de la primaria. Sin réplicas no hace nada.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not replica_set.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        state = ReadConsistency(scope['method'] in READ_METHODS, client_lsn(scope))
+
+        async def send_with_lsn(message):
+            if message['type'] == 'http.response.start' and state.write_lsn:
+                lsn = format_lsn(state.write_lsn)
+                cookie = (f"{LSN_COOKIE}={lsn}; Max-Age={REPLICA_CONFIG['read_your_writes_ttl']}; "
+                          "Path=/; HttpOnly; SameSite=Lax")
+                message = {**message, 'headers': [
+                    *message.get('headers', ()),
+                    (LSN_HEADER, lsn.encode('latin-1')),
+                    (b'set-cookie', cookie.encode('latin-1')),
+                ]}
+            await send(message)
+
+        token = _consistency.set(state)
+        try:
+            await self.app(scope, receive, send_with_lsn)
+        finally:
+            _consistency.reset(token)
@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(value):
+    # Decimal como texto, igual que la serialización JSON de Pydantic
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def dumps(content):
+    """JSON en bytes con orjson (datetime/date en ISO 8601, Decimal como texto)"""
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    Respuesta JSON serializada con orjson.
+
+    Es la clase de respuesta por defecto de la app. Los endpoints de lectura
+    la regresan directamente con las filas de la base, sin validación ni
+    jsonable_encoder: su modelo se declara en responses={200: {"model": ...}},
+    que solo lo documenta en OpenAPI. Un contenido en bytes ya está
+    serializado y se envía tal cual.
+    """
+
+    def render(self, content):
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -0,0 +1,104 @@
+from app.statements import statement
+
+# Devolución por lote: valida, marca return_date, cobra y actualiza los
+# acumulados de reportes (ver app/rollups.py) en una sola sentencia.
+# El monto sigue la regla de PUT /api/rentals/{id}/return:
+# rental_rate * max(días rentados, 1).
+BATCH_RETURN_SQL = statement('rentals.batch_return', """
+    WITH req AS (
+        SELECT t.idx, t.rental_id,
+               row_number() OVER (PARTITION BY t.rental_id ORDER BY t.idx) AS occurrence
+        FROM unnest(%(rental_ids)s::int[]) WITH ORDINALITY AS t(rental_id, idx)
+    ),
+    found AS MATERIALIZED (
+        SELECT r.rental_id, r.rental_date, r.return_date, r.customer_id, r.staff_id,
+               f.rental_rate
+        FROM rental r
+        JOIN inventory i ON r.inventory_id = i.inventory_id
+        JOIN film f ON i.film_id = f.film_id
+        WHERE r.rental_id IN (SELECT rental_id FROM req)
+        FOR UPDATE OF r
+    ),
+    charged AS (
+        SELECT rental_id, rental_date, customer_id, staff_id, days_rented,
+               rental_rate * GREATEST(days_rented, 1) AS amount
+        FROM (
+            SELECT found.*,
+                   EXTRACT(day FROM (%(return_date)s - rental_date))::int AS days_rented
+            FROM found
+            WHERE return_date IS NULL
+        ) pending
+    ),
+    payable AS (
+        -- payment.amount es numeric(5,2)
+        SELECT * FROM charged WHERE amount <= %(max_amount)s
+    ),
+    returned AS (
+        UPDATE rental r
+        SET return_date = %(return_date)s
+        FROM payable p
+        -- Con rental_date se actualiza solo la partición de cada renta
+        WHERE r.rental_id = p.rental_id AND r.rental_date = p.rental_date
+        RETURNING r.rental_id
+    ),
+    paid AS (
+        INSERT INTO payment (customer_id, staff_id, rental_id, amount, payment_date)
+        SELECT p.customer_id, p.staff_id, p.rental_id, p.amount, %(return_date)s
+        FROM payable p JOIN returned USING (rental_id)
+    ),
+    staff_stats AS (
+        INSERT INTO staff_revenue_stats (staff_id, total_payments, total_revenue)
+        SELECT p.staff_id, COUNT(*), SUM(p.amount)
+        FROM payable p JOIN returned USING (rental_id)
+        GROUP BY p.staff_id
+        ON CONFLICT (staff_id) DO UPDATE
+        SET total_payments = staff_revenue_stats.total_payments + EXCLUDED.total_payments,
+            total_revenue = staff_revenue_stats.total_revenue + EXCLUDED.total_revenue
+    ),
+    customer_stats AS (
+        INSERT INTO customer_rental_stats (customer_id, total_payments, total_spent)
+        SELECT p.customer_id, COUNT(*), SUM(p.amount)
+        FROM payable p JOIN returned USING (rental_id)
+        GROUP BY p.customer_id
+        -- Mismo orden de bloqueo en todos los lotes (evita deadlocks entre ellos)
+        ORDER BY p.customer_id
+        ON CONFLICT (customer_id) DO UPDATE
+        SET active_rentals = customer_rental_stats.active_rentals - EXCLUDED.total_payments,
+            total_payments = customer_rental_stats.total_payments + EXCLUDED.total_payments,
+            total_spent = customer_rental_stats.total_spent + EXCLUDED.total_spent
+    )
+    SELECT
+        req.idx - 1 AS index,
+        req.rental_id,
+        CASE
+            WHEN req.occurrence > 1 THEN 'duplicate'
+            WHEN fo.rental_id IS NULL THEN 'not_found'
+            WHEN fo.return_date IS NOT NULL THEN 'already_returned'
+            WHEN p.rental_id IS NULL THEN 'amount_out_of_range'
+            ELSE 'returned'
+        END AS status,
+        fo.customer_id,
+        p.days_rented,
+        p.amount AS total_amount
+    FROM req
+    LEFT JOIN found fo ON fo.rental_id = req.rental_id
+    LEFT JOIN payable p ON p.rental_id = req.rental_id AND req.occurrence = 1
+    ORDER BY req.idx
+""")
+
+# Máximo que cabe en payment.amount
+MAX_PAYMENT_AMOUNT = 999.99
+
+
+async def return_batch(cursor, rental_ids, return_date):
+    """
+    Devolver varias rentas en un solo viaje a la base de datos.
+    Regresa una fila por id, en el mismo orden, con `index` y `status`:
+    returned, not_found, already_returned, duplicate o amount_out_of_range.
+    """
+    await cursor.execute(BATCH_RETURN_SQL, {
+        'rental_ids': rental_ids,
+        'return_date': return_date,
+        'max_amount': MAX_PAYMENT_AMOUNT,
+    })
+    return await cursor.fetchall()
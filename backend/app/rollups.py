@@ -0,0 +1,288 @@
+import asyncio
+import os
+
+from app.database import get_db_connection
+from app.statements import statement
+
+# Segundos entre reconciliaciones de las tablas de reportes (0 = desactivado)
+RECONCILE_INTERVAL = float(os.getenv('REPORTS_RECONCILE_INTERVAL', 3600))
+
+# Llave del advisory lock para que solo una réplica reconcilie a la vez
+RECONCILE_LOCK_KEY = 5001
+
+
+# Sentencias de los acumulados; se ejecutan preparadas (ver app/statements.py)
+FILM_RENTAL_SQL = statement('rollups.film_rental', """
+    INSERT INTO film_rental_stats (film_id, total_rentals)
+    VALUES (%s, %s)
+    ON CONFLICT (film_id) DO UPDATE
+    SET total_rentals = film_rental_stats.total_rentals + EXCLUDED.total_rentals
+""")
+
+STAFF_RENTAL_SQL = statement('rollups.staff_rental', """
+    INSERT INTO staff_revenue_stats (staff_id, total_rentals)
+    VALUES (%s, %s)
+    ON CONFLICT (staff_id) DO UPDATE
+    SET total_rentals = staff_revenue_stats.total_rentals + EXCLUDED.total_rentals
+""")
+
+STAFF_PAYMENT_SQL = statement('rollups.staff_payment', """
+    INSERT INTO staff_revenue_stats (staff_id, total_payments, total_revenue)
+    VALUES (%s, 1, %s)
+    ON CONFLICT (staff_id) DO UPDATE
+    SET total_payments = staff_revenue_stats.total_payments + 1,
+        total_revenue = staff_revenue_stats.total_revenue + EXCLUDED.total_revenue
+""")
+
+CUSTOMER_RETURN_SQL = statement('rollups.customer_return', """
+    INSERT INTO customer_rental_stats (customer_id, total_payments, total_spent)
+    VALUES (%s, 1, %s)
+    ON CONFLICT (customer_id) DO UPDATE
+    SET active_rentals = customer_rental_stats.active_rentals - 1,
+        total_payments = customer_rental_stats.total_payments + 1,
+        total_spent = customer_rental_stats.total_spent + EXCLUDED.total_spent
+""")
+
+CUSTOMER_CANCELLATION_SQL = statement('rollups.customer_cancellation', """
+    UPDATE customer_rental_stats
+    SET total_rentals = total_rentals - 1,
+        active_rentals = active_rentals - 1,
+        last_rental_date = (
+            SELECT MAX(rental_date) FROM rental WHERE customer_id = %(customer_id)s
+        )
+    WHERE customer_id = %(customer_id)s
+""")
+
+CUSTOMER_STATS_SQL = statement('rollups.customer_stats', """
+    SELECT
+        c.customer_id,
+        CONCAT(c.first_name, ' ', c.last_name) as name,
+        c.email,
+        COALESCE(s.total_rentals, 0) as total_rentals,
+        COALESCE(s.active_rentals, 0) as active_rentals,
+        COALESCE(s.total_spent, 0) as total_spent,
+        s.last_rental_date
+    FROM customer c
+    LEFT JOIN customer_rental_stats s ON s.customer_id = c.customer_id
+    WHERE c.customer_id = %s
+""")
+
+CUSTOMER_VERSION_SQL = statement('rollups.customer_version', """
+    SELECT version FROM customer_rental_stats WHERE customer_id = %s
+""")
+
+
+# ============ MANTENIMIENTO INCREMENTAL ============
+# Se llaman dentro de la transacción de la escritura en app/routers/rentals.py.
+# Orden de bloqueo: film_rental_stats, staff_revenue_stats y luego
+# customer_rental_stats. Las rentas y devoluciones por lote hacen lo mismo
+# dentro de su sentencia (app/allocation.py, app/returns.py).
+
+async def record_rental(cursor, film_id, staff_id, delta=1):
+    """Sumar (o restar con delta=-1) una renta a los acumulados de película y empleado"""
+    await cursor.execute(FILM_RENTAL_SQL, (film_id, delta))
+    await cursor.execute(STAFF_RENTAL_SQL, (staff_id, delta))
+
+
+async def record_payment(cursor, staff_id, amount):
+    """Sumar un pago al empleado que atendió la renta"""
+    await cursor.execute(STAFF_PAYMENT_SQL, (staff_id, amount))
+
+
+async def record_return(cursor, customer_id, amount):
+    """Cerrar una renta del cliente y sumar su pago"""
+    await cursor.execute(CUSTOMER_RETURN_SQL, (customer_id, amount))
+
+
+async def record_cancellation(cursor, customer_id):
+    """
+    Restar una renta abierta cancelada (ya borrada de rental).
+    La última renta se vuelve a leer con idx_rental_customer_id_rental_date.
+    """
+    await cursor.execute(CUSTOMER_CANCELLATION_SQL, {'customer_id': customer_id})
+
+
+# ============ LECTURA ============
+
+async def get_customer_stats(cursor, customer_id):
+    """
+    Cliente y sus acumulados en una lectura por llave primaria.
+    Regresa None si el cliente no existe; sin fila de acumulados, ceros.
+    """
+    await cursor.execute(CUSTOMER_STATS_SQL, (customer_id,))
+    return await cursor.fetchone()
+
+
+async def get_customer_version(cursor, customer_id):
+    """
+    Versión de las rentas del cliente: la incrementa el trigger de
+    customer_rental_stats en cada escritura (upgrade-010). 0 si aún no
+    tiene fila de acumulados.
+    """
+    await cursor.execute(CUSTOMER_VERSION_SQL, (customer_id,))
+    row = await cursor.fetchone()
+    return row['version'] if row else 0
+
+
+# ============ RECONCILIACIÓN ============
+# Diferencia por fila entre el valor real (rental/payment) y el acumulado,
+# leídos en la misma foto. Solo regresan las filas que difieren.
+
+FILM_DRIFT_SQL = """
+    SELECT COALESCE(t.film_id, s.film_id) AS film_id,
+           COALESCE(t.total_rentals, 0) - COALESCE(s.total_rentals, 0) AS rentals
+    FROM (
+        SELECT i.film_id, COUNT(*) AS total_rentals
+        FROM rental r
+        JOIN inventory i ON r.inventory_id = i.inventory_id
+        GROUP BY i.film_id
+    ) t
+    FULL JOIN film_rental_stats s ON s.film_id = t.film_id
+    WHERE COALESCE(t.total_rentals, 0) <> COALESCE(s.total_rentals, 0)
+    ORDER BY 1
+"""
+
+STAFF_DRIFT_SQL = """
+    SELECT t.staff_id,
+           t.total_rentals - COALESCE(s.total_rentals, 0) AS rentals,
+           t.total_payments - COALESCE(s.total_payments, 0) AS payments,
+           t.total_revenue - COALESCE(s.total_revenue, 0) AS revenue
+    FROM (
+        SELECT s.staff_id,
+               COUNT(DISTINCT r.rental_id) AS total_rentals,
+               COUNT(p.payment_id) AS total_payments,
+               COALESCE(SUM(p.amount), 0) AS total_revenue
+        FROM staff s
+        LEFT JOIN rental r ON s.staff_id = r.staff_id
+        LEFT JOIN payment p ON r.rental_id = p.rental_id
+        GROUP BY s.staff_id
+    ) t
+    LEFT JOIN staff_revenue_stats s ON s.staff_id = t.staff_id
+    WHERE (t.total_rentals, t.total_payments, t.total_revenue)
+          IS DISTINCT FROM
+          (COALESCE(s.total_rentals, 0), COALESCE(s.total_payments, 0), COALESCE(s.total_revenue, 0))
+    ORDER BY t.staff_id
+"""
+
+CUSTOMER_DRIFT_SQL = """
+    SELECT t.customer_id,
+           t.total_rentals - COALESCE(s.total_rentals, 0) AS rentals,
+           t.active_rentals - COALESCE(s.active_rentals, 0) AS active,
+           t.total_payments - COALESCE(s.total_payments, 0) AS payments,
+           t.total_spent - COALESCE(s.total_spent, 0) AS spent,
+           t.last_rental_date,
+           s.last_rental_date AS seen_last_rental_date
+    FROM (
+        SELECT c.customer_id,
+               COALESCE(r.total_rentals, 0) AS total_rentals,
+               COALESCE(r.active_rentals, 0) AS active_rentals,
+               COALESCE(p.total_payments, 0) AS total_payments,
+               COALESCE(p.total_spent, 0) AS total_spent,
+               r.last_rental_date
+        FROM customer c
+        LEFT JOIN (
+            SELECT customer_id,
+                   COUNT(*) AS total_rentals,
+                   COUNT(*) FILTER (WHERE return_date IS NULL) AS active_rentals,
+                   MAX(rental_date) AS last_rental_date
+            FROM rental
+            GROUP BY customer_id
+        ) r ON r.customer_id = c.customer_id
+        LEFT JOIN (
+            SELECT r.customer_id, COUNT(*) AS total_payments, SUM(p.amount) AS total_spent
+            FROM payment p
+            JOIN rental r ON r.rental_id = p.rental_id
+            GROUP BY r.customer_id
+        ) p ON p.customer_id = c.customer_id
+    ) t
+    LEFT JOIN customer_rental_stats s ON s.customer_id = t.customer_id
+    WHERE (t.total_rentals, t.active_rentals, t.total_payments, t.total_spent, t.last_rental_date)
+          IS DISTINCT FROM
+          (COALESCE(s.total_rentals, 0), COALESCE(s.active_rentals, 0), COALESCE(s.total_payments, 0),
+           COALESCE(s.total_spent, 0), s.last_rental_date)
+    ORDER BY t.customer_id
+"""
+
+# Correcciones: suman la diferencia, como los incrementos de las escrituras
+STAFF_CORRECTION_SQL = statement('rollups.staff_correction', """
+    INSERT INTO staff_revenue_stats (staff_id, total_rentals, total_payments, total_revenue)
+    VALUES (%(staff_id)s, %(rentals)s, %(payments)s, %(revenue)s)
+    ON CONFLICT (staff_id) DO UPDATE
+    SET total_rentals = staff_revenue_stats.total_rentals + EXCLUDED.total_rentals,
+        total_payments = staff_revenue_stats.total_payments + EXCLUDED.total_payments,
+        total_revenue = staff_revenue_stats.total_revenue + EXCLUDED.total_revenue
+""")
+
+# last_rental_date no se puede sumar: se corrige solo si nadie lo cambió
+# después de la foto
+CUSTOMER_CORRECTION_SQL = statement('rollups.customer_correction', """
+    INSERT INTO customer_rental_stats
+        (customer_id, total_rentals, active_rentals, total_payments, total_spent, last_rental_date)
+    VALUES (%(customer_id)s, %(rentals)s, %(active)s, %(payments)s, %(spent)s, %(last_rental_date)s)
+    ON CONFLICT (customer_id) DO UPDATE
+    SET total_rentals = customer_rental_stats.total_rentals + EXCLUDED.total_rentals,
+        active_rentals = customer_rental_stats.active_rentals + EXCLUDED.active_rentals,
+        total_payments = customer_rental_stats.total_payments + EXCLUDED.total_payments,
+        total_spent = customer_rental_stats.total_spent + EXCLUDED.total_spent,
+        last_rental_date = CASE
+            WHEN customer_rental_stats.last_rental_date IS NOT DISTINCT FROM %(seen_last_rental_date)s
+            THEN EXCLUDED.last_rental_date
+            ELSE customer_rental_stats.last_rental_date
+        END
+""")
+
+
+async def reconcile(conn):
+    """
+    Corregir las tablas de reportes desde rental/payment sin bloquear las
+    escrituras. Primero calcula, en una transacción REPEATABLE READ de solo
+    lectura, la diferencia entre el valor real y el acumulado de cada fila
+    en la misma foto. Luego suma cada diferencia a su fila en una
+    transacción corta propia. Las escrituras que llegaron después de la foto
+    sumaron su incremento a ambos lados, así que la diferencia sigue siendo
+    la corrección exacta.
+    conn: conexión de psycopg fuera de transacción (dict_row).
+    Regresa el número de filas corregidas, o None si otra réplica ya está
+    reconciliando.
+    """
+    async with conn.transaction():
+        cursor = await conn.execute("SELECT pg_try_advisory_lock(%s) AS locked", (RECONCILE_LOCK_KEY,))
+        if not (await cursor.fetchone())['locked']:
+            return None
+
+    try:
+        async with conn.transaction():
+            await conn.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+            drift = []
+            for sql in (FILM_DRIFT_SQL, STAFF_DRIFT_SQL, CUSTOMER_DRIFT_SQL):
+                cursor = await conn.execute(sql)
+                drift.append(await cursor.fetchall())
+
+        # Mismo orden de tablas que las escrituras; una fila por transacción
+        films, staff, customers = drift
+        for row in films:
+            async with conn.transaction():
+                await conn.execute(FILM_RENTAL_SQL, (row['film_id'], row['rentals']))
+        for row in staff:
+            async with conn.transaction():
+                await conn.execute(STAFF_CORRECTION_SQL, row)
+        for row in customers:
+            async with conn.transaction():
+                await conn.execute(CUSTOMER_CORRECTION_SQL, row)
+        return len(films) + len(staff) + len(customers)
+    finally:
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_unlock(%s)", (RECONCILE_LOCK_KEY,))
+
+
+async def reconcile_loop():
+    """Tarea de fondo iniciada en el lifespan: reconcilia cada RECONCILE_INTERVAL segundos"""
+    while True:
+        await asyncio.sleep(RECONCILE_INTERVAL)
+        try:
+            async with get_db_connection() as conn:
+                corrected = await reconcile(conn)
+            if corrected:
+                print(f"🧮 Reportes reconciliados: {corrected} filas corregidas")
+        except Exception as e:
+            print(f"⚠️  Error reconciliando reportes: {e}")
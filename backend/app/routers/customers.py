@@ -1,48 +1,80 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
 
 from app.database import get_db_cursor
+from app.pagination import decode_cursor, paginate
+from app.streaming import FORMAT_PATTERN, stream_format, stream_query
+from app.totals import get_total
+from app.cache import cached
+from app.responses import FastJSONResponse
+from app.schemas import Customer, CustomerDetail, Item, Page
 
 router = APIRouter()
 
-@router.get("/", response_model=dict)
+PAGE_KEYS = ('last_name', 'first_name', 'customer_id')
+
+@router.get("/", responses={200: {"model": Page[Customer]}})
 async def list_customers(
+    request: Request,
     limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    page_cursor: Optional[str] = Query(default=None, alias="cursor"),
+    include_total: bool = Query(default=True),
+    export_format: Optional[str] = Query(default=None, alias="format", pattern=FORMAT_PATTERN)
 ):
-    """Listar todos los clientes"""
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT 
-                customer_id,
-                first_name,
-                last_name,
-                email,
-                active,
-                store_id
-            FROM customer
-            ORDER BY last_name, first_name
-            LIMIT %s OFFSET %s
-        """, (limit, offset))
+    """
+    Listar todos los clientes.
+    Con `cursor` (el `next_cursor` de la página anterior) pagina por llave
+    en lugar de OFFSET y se ignora `offset`.
+    Con `include_total=false` no se calcula `total`.
+    Con `format=ndjson|csv` (o Accept: application/x-ndjson) exporta todas
+    las filas en streaming; se ignoran `limit` y `offset`.
+    """
+    keyset, params = "", ()
+    if page_cursor:
+        keyset = "WHERE (last_name, first_name, customer_id) > (%s, %s, %s)"
+        params = tuple(decode_cursor(page_cursor, PAGE_KEYS))
+        offset = 0
+
+    query = f"""
+        SELECT 
+            customer_id,
+            first_name,
+            last_name,
+            email,
+            active,
+            store_id
+        FROM customer
+        {keyset}
+        ORDER BY last_name, first_name, customer_id
+    """
+
+    export = stream_format(request, export_format)
+    if export:
+        return await stream_query(query, params, export, "customers")
+
+    async with get_db_cursor() as cursor:
+        await cursor.execute(query + " LIMIT %s OFFSET %s", (*params, limit + 1, offset))
         
-        customers = cursor.fetchall()
+        customers, next_cursor = paginate(await cursor.fetchall(), limit, PAGE_KEYS)
         
-        # Contar total
-        cursor.execute("SELECT COUNT(*) as count FROM customer")
-        total = cursor.fetchone()['count']
+        # Contar total (cacheado, ver app/totals.py)
+        total = await get_total(cursor, 'customer') if include_total else None
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "count": len(customers),
             "total": total,
+            "next_cursor": next_cursor,
             "data": customers
-        }
+        })
 
-@router.get("/{customer_id}", response_model=dict)
+@router.get("/{customer_id}", responses={200: {"model": Item[CustomerDetail]}})
+@cached(tags=("customers", "customer:{customer_id}"))
 async def get_customer(customer_id: int):
     """Obtener un cliente por ID"""
-    with get_db_cursor() as cursor:
-        cursor.execute("""
+    async with get_db_cursor() as cursor:
+        await cursor.execute("""
             SELECT 
                 c.customer_id,
                 c.first_name,
@@ -61,12 +93,12 @@ async def get_customer(customer_id: int):
             WHERE c.customer_id = %s
         """, (customer_id,))
         
-        customer = cursor.fetchone()
+        customer = await cursor.fetchone()
         
         if not customer:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": customer
-        }
\ No newline at end of file
+        })
\ No newline at end of file
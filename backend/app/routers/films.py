@@ -1,113 +1,196 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
 
-from app.schemas import Film
+from app.schemas import (
+    Film, FilmDetail, FilmCategoryResponse, FilmSearchResponse, Item, Page
+)
 from app.database import get_db_cursor
+from app.pagination import decode_cursor, paginate
+from app.streaming import FORMAT_PATTERN, stream_format, stream_query
+from app.totals import get_total
+from app.cache import cached
+from app.search import SEARCH_MODES, SEARCH_SQL, search_params
+from app.catalog import catalog
+from app.responses import FastJSONResponse
+from app.statements import statement
 
 router = APIRouter()
 
-@router.get("/", response_model=dict)
+PAGE_KEYS = ('title', 'film_id')
+
+# Consultas de respaldo cuando no hay snapshot del catálogo
+FILM_DETAIL = statement('films.detail', """
+    SELECT 
+        f.film_id, f.title, f.description, f.release_year,
+        f.rental_rate, f.length, f.rating,
+        c.name as category,
+        array_agg(DISTINCT CONCAT(a.first_name, ' ', a.last_name)) as actors
+    FROM film f
+    LEFT JOIN film_category fc ON f.film_id = fc.film_id
+    LEFT JOIN category c ON fc.category_id = c.category_id
+    LEFT JOIN film_actor fa ON f.film_id = fa.film_id
+    LEFT JOIN actor a ON fa.actor_id = a.actor_id
+    WHERE f.film_id = %s
+    GROUP BY f.film_id, c.name
+""")
+
+FILMS_BY_CATEGORY = statement('films.by_category', """
+    SELECT 
+        f.film_id, f.title, f.description, f.release_year,
+        f.rental_rate, f.length, f.rating,
+        c.name as category
+    FROM film f
+    JOIN film_category fc ON f.film_id = fc.film_id
+    JOIN category c ON fc.category_id = c.category_id
+    WHERE LOWER(c.name) = LOWER(%s)
+    ORDER BY f.title
+""")
+
+@router.get("/", responses={200: {"model": Page[Film]}})
 async def list_films(
+    request: Request,
     limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    page_cursor: Optional[str] = Query(default=None, alias="cursor"),
+    include_total: bool = Query(default=True),
+    export_format: Optional[str] = Query(default=None, alias="format", pattern=FORMAT_PATTERN)
 ):
-    """Listar todas las películas"""
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT 
-                film_id, title, description, release_year,
-                rental_rate, length, rating
-            FROM film
-            ORDER BY title
-            LIMIT %s OFFSET %s
-        """, (limit, offset))
+    """
+    Listar todas las películas.
+    Con `cursor` (el `next_cursor` de la página anterior) pagina por llave
+    en lugar de OFFSET y se ignora `offset`.
+    Con `include_total=false` no se calcula `total`.
+    Con `format=ndjson|csv` (o Accept: application/x-ndjson) exporta todas
+    las filas en streaming; se ignoran `limit` y `offset`.
+    """
+    keyset, params = "", ()
+    if page_cursor:
+        keyset = "WHERE (title, film_id) > (%s, %s)"
+        params = tuple(decode_cursor(page_cursor, PAGE_KEYS))
+        offset = 0
+
+    query = f"""
+        SELECT 
+            film_id, title, description, release_year,
+            rental_rate, length, rating
+        FROM film
+        {keyset}
+        ORDER BY title, film_id
+    """
+
+    export = stream_format(request, export_format)
+    if export:
+        return await stream_query(query, params, export, "films")
+
+    # Desde el catálogo en memoria (app/catalog.py) si está cargado
+    snapshot = catalog.snapshot
+    start = snapshot.page_start(*params) if snapshot and page_cursor else offset
+    if snapshot and start is not None:
+        rows = [film.summary() for film in snapshot.ordered[start:start + limit + 1]]
+        films, next_cursor = paginate(rows, limit, PAGE_KEYS)
+        return FastJSONResponse({
+            "success": True,
+            "count": len(films),
+            "total": len(snapshot.ordered) if include_total else None,
+            "next_cursor": next_cursor,
+            "data": films
+        })
+
+    async with get_db_cursor() as cursor:
+        await cursor.execute(query + " LIMIT %s OFFSET %s", (*params, limit + 1, offset))
         
-        films = cursor.fetchall()
+        films, next_cursor = paginate(await cursor.fetchall(), limit, PAGE_KEYS)
         
-        # Contar total
-        cursor.execute("SELECT COUNT(*) as count FROM film")
-        total = cursor.fetchone()['count']
+        # Contar total (cacheado, ver app/totals.py)
+        total = await get_total(cursor, 'film') if include_total else None
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "count": len(films),
             "total": total,
+            "next_cursor": next_cursor,
+            "data": films
+        })
+
+@router.get("/search", responses={200: {"model": FilmSearchResponse}})
+async def search_films(
+    q: Optional[str] = Query(default=None, min_length=1),
+    title: Optional[str] = Query(default=None, min_length=1),
+    mode: Optional[str] = Query(default=None, pattern=f"^({'|'.join(SEARCH_MODES)})$"),
+    limit: int = Query(default=50, ge=1, le=100)
+):
+    """
+    Buscar películas, ordenadas por relevancia (`score`).
+
+    - q: texto a buscar
+    - mode: auto (default), prefix, contains, fuzzy o fulltext
+    - title: forma anterior, equivale a q con mode=contains
+    """
+    text = q or title
+    if not text:
+        raise HTTPException(status_code=400, detail="Debe indicar el texto a buscar (q)")
+    mode = mode or ('auto' if q else 'contains')
+
+    async with get_db_cursor() as cursor:
+        await cursor.execute(SEARCH_SQL[mode], search_params(text, limit))
+        films = await cursor.fetchall()
+        
+        return FastJSONResponse({
+            "success": True,
+            "query": text,
+            "mode": mode,
+            "count": len(films),
             "data": films
-        }
+        })
 
-@router.get("/{film_id}", response_model=dict)
+@router.get("/{film_id}", responses={200: {"model": Item[FilmDetail]}})
+@cached(tags=("films", "film:{film_id}"))
 async def get_film(film_id: int):
     """Obtener una película por ID"""
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT 
-                f.film_id, f.title, f.description, f.release_year,
-                f.rental_rate, f.length, f.rating,
-                c.name as category,
-                array_agg(DISTINCT CONCAT(a.first_name, ' ', a.last_name)) as actors
-            FROM film f
-            LEFT JOIN film_category fc ON f.film_id = fc.film_id
-            LEFT JOIN category c ON fc.category_id = c.category_id
-            LEFT JOIN film_actor fa ON f.film_id = fa.film_id
-            LEFT JOIN actor a ON fa.actor_id = a.actor_id
-            WHERE f.film_id = %s
-            GROUP BY f.film_id, c.name
-        """, (film_id,))
+    if catalog.snapshot:
+        film = catalog.snapshot.film(film_id)
+        if not film:
+            raise HTTPException(status_code=404, detail="Película no encontrada")
+        return FastJSONResponse({
+            "success": True,
+            "data": film.detail()
+        })
+
+    async with get_db_cursor() as cursor:
+        await cursor.execute(FILM_DETAIL, (film_id,))
         
-        film = cursor.fetchone()
+        film = await cursor.fetchone()
         
         if not film:
             raise HTTPException(status_code=404, detail="Película no encontrada")
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": film
-        }
-
-@router.get("/search", response_model=dict)
-async def search_films(title: str = Query(..., min_length=1)):
-    """Buscar películas por título"""
-    with get_db_cursor() as cursor:
-        search_pattern = f"%{title}%"
-        cursor.execute("""
-            SELECT 
-                film_id, title, description, release_year,
-                rental_rate, length, rating
-            FROM film
-            WHERE title ILIKE %s
-            ORDER BY title
-            LIMIT 50
-        """, (search_pattern,))
-        
-        films = cursor.fetchall()
-        
-        return {
+        })
+
+@router.get("/category/{category_name}", responses={200: {"model": FilmCategoryResponse}})
+@cached(tags=("films",))
+async def get_films_by_category(category_name: str):
+    """Obtener películas por categoría"""
+    if catalog.snapshot:
+        name, members = catalog.snapshot.category(category_name) or (None, ())
+        films = [dict(film.summary(), category=name) for film in members]
+        return FastJSONResponse({
             "success": True,
+            "category": category_name,
             "count": len(films),
             "data": films
-        }
+        })
 
-@router.get("/category/{category_name}", response_model=dict)
-async def get_films_by_category(category_name: str):
-    """Obtener películas por categoría"""
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT 
-                f.film_id, f.title, f.description, f.release_year,
-                f.rental_rate, f.length, f.rating,
-                c.name as category
-            FROM film f
-            JOIN film_category fc ON f.film_id = fc.film_id
-            JOIN category c ON fc.category_id = c.category_id
-            WHERE LOWER(c.name) = LOWER(%s)
-            ORDER BY f.title
-        """, (category_name,))
+    async with get_db_cursor() as cursor:
+        await cursor.execute(FILMS_BY_CATEGORY, (category_name,))
         
-        films = cursor.fetchall()
+        films = await cursor.fetchall()
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "category": category_name,
             "count": len(films),
             "data": films
-        }
\ No newline at end of file
+        })
\ No newline at end of file
@@ -1,54 +1,189 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
 from datetime import datetime, timedelta
-from decimal import Decimal
 
-from app.schemas import RentalCreate, RentalResponse, SuccessResponse
+from app.schemas import (
+    RentalCreate, RentalBatchCreate, RentalBatchReturn, RentalResponse,
+    CustomerRentalsResponse, Page
+)
 from app.database import get_db_cursor
+from app.pagination import decode_cursor, paginate
+from app.streaming import FORMAT_PATTERN, stream_format, stream_query
+from app.totals import get_total, invalidate_totals
+from app.rollups import (
+    record_rental, record_payment, record_return, record_cancellation,
+    get_customer_stats, get_customer_version
+)
+from app.cache import cached, invalidate_tags
+from app.allocation import checkout, checkout_batch
+from app.returns import return_batch
+from app.responses import FastJSONResponse
+from app.statements import statement
 
 router = APIRouter()
 
-@router.get("/", response_model=dict)
+# Resultado de app.allocation.checkout -> (status HTTP, mensaje)
+CHECKOUT_ERRORS = {
+    'customer_not_found': (404, "Cliente no encontrado"),
+    'staff_not_found': (404, "Empleado no encontrado"),
+    'film_not_found': (404, "Película no encontrada"),
+    'no_stock': (400, "No hay copias disponibles de esta película"),
+}
+
+# Resultado de app.returns.return_batch -> mensaje
+RETURN_ERRORS = {
+    'not_found': "Renta no encontrada",
+    'already_returned': "Esta renta ya fue devuelta",
+    'duplicate': "Renta repetida en el lote",
+    'amount_out_of_range': "El monto excede el máximo permitido por pago",
+}
+
+PAGE_KEYS = ('rental_date', 'rental_id')
+
+# Listado de rentas; {keyset} se llena para paginar por llave
+RENTALS_SQL = """
+    SELECT 
+        r.rental_id,
+        r.rental_date,
+        r.return_date,
+        r.customer_id,
+        r.staff_id,
+        i.film_id,
+        f.title as film_title,
+        CONCAT(c.first_name, ' ', c.last_name) as customer_name,
+        CONCAT(s.first_name, ' ', s.last_name) as staff_name,
+        f.rental_duration,
+        r.rental_date + INTERVAL '1 day' * f.rental_duration as expected_return_date
+    FROM rental r
+    JOIN inventory i ON r.inventory_id = i.inventory_id
+    JOIN film f ON i.film_id = f.film_id
+    JOIN customer c ON r.customer_id = c.customer_id
+    JOIN staff s ON r.staff_id = s.staff_id
+    {keyset}
+    ORDER BY r.rental_date DESC, r.rental_id DESC
+"""
+# La condición sobre rental_date sola descarta las particiones posteriores
+RENTALS_KEYSET = "WHERE r.rental_date <= %s AND (r.rental_date, r.rental_id) < (%s, %s)"
+
+RENTALS_PAGE = statement('rentals.page', RENTALS_SQL.format(keyset="") + " LIMIT %s OFFSET %s")
+RENTALS_PAGE_AFTER = statement(
+    'rentals.page_after', RENTALS_SQL.format(keyset=RENTALS_KEYSET) + " LIMIT %s OFFSET %s"
+)
+
+RETURN_LOOKUP = statement('rentals.return_lookup', """
+    SELECT r.rental_id, r.rental_date, r.return_date, r.staff_id, r.customer_id,
+           f.rental_rate, f.rental_duration
+    FROM rental r
+    JOIN inventory i ON r.inventory_id = i.inventory_id
+    JOIN film f ON i.film_id = f.film_id
+    WHERE r.rental_id = %s
+""")
+
+# Las escrituras llevan también rental_date (leído en el lookup) para que
+# PostgreSQL toque solo la partición de la renta
+RETURN_UPDATE = statement('rentals.return_update', """
+    UPDATE rental 
+    SET return_date = %s 
+    WHERE rental_id = %s AND rental_date = %s
+""")
+
+RETURN_PAYMENT = statement('rentals.return_payment', """
+    INSERT INTO payment (customer_id, staff_id, rental_id, amount, payment_date)
+    SELECT customer_id, staff_id, rental_id, %s, %s
+    FROM rental WHERE rental_id = %s AND rental_date = %s
+""")
+
+CANCEL_LOOKUP = statement('rentals.cancel_lookup', """
+    SELECT r.rental_id, r.rental_date, r.return_date, r.staff_id, r.customer_id, i.film_id,
+           f.title as film_title,
+           CONCAT(c.first_name, ' ', c.last_name) as customer_name,
+           CONCAT(s.first_name, ' ', s.last_name) as staff_name
+    FROM rental r
+    JOIN inventory i ON r.inventory_id = i.inventory_id
+    JOIN film f ON i.film_id = f.film_id
+    JOIN customer c ON r.customer_id = c.customer_id
+    JOIN staff s ON r.staff_id = s.staff_id
+    WHERE r.rental_id = %s
+""")
+
+CANCEL_DELETE = statement('rentals.cancel_delete', "DELETE FROM rental WHERE rental_id = %s AND rental_date = %s")
+
+# Rentas de un cliente; {keyset} se llena para paginar por llave
+CUSTOMER_RENTALS_SQL = """
+    SELECT 
+        r.rental_id,
+        r.rental_date,
+        r.return_date,
+        f.title as film_title,
+        f.rental_rate,
+        p.amount as payment_amount,
+        CASE 
+            WHEN r.return_date IS NOT NULL 
+            THEN EXTRACT(day FROM (r.return_date - r.rental_date))::integer
+            ELSE NULL
+        END as days_rented
+    FROM rental r
+    JOIN inventory i ON r.inventory_id = i.inventory_id
+    JOIN film f ON i.film_id = f.film_id
+    LEFT JOIN payment p ON r.rental_id = p.rental_id AND p.payment_date >= r.rental_date
+    WHERE r.customer_id = %(customer_id)s {keyset}
+    ORDER BY r.rental_date DESC, r.rental_id DESC
+"""
+CUSTOMER_RENTALS_KEYSET = (
+    "AND r.rental_date <= %(after_date)s AND (r.rental_date, r.rental_id) < (%(after_date)s, %(after_id)s)"
+)
+
+CUSTOMER_RENTALS_PAGE = statement(
+    'rentals.customer_page', CUSTOMER_RENTALS_SQL.format(keyset="") + " LIMIT %(limit)s"
+)
+CUSTOMER_RENTALS_PAGE_AFTER = statement(
+    'rentals.customer_page_after',
+    CUSTOMER_RENTALS_SQL.format(keyset=CUSTOMER_RENTALS_KEYSET) + " LIMIT %(limit)s"
+)
+
+@router.get("/", responses={200: {"model": Page[RentalResponse]}})
 async def list_rentals(
+    request: Request,
     limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    page_cursor: Optional[str] = Query(default=None, alias="cursor"),
+    include_total: bool = Query(default=True),
+    export_format: Optional[str] = Query(default=None, alias="format", pattern=FORMAT_PATTERN)
 ):
-    """Listar todas las rentas"""
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT 
-                r.rental_id,
-                r.rental_date,
-                r.return_date,
-                r.customer_id,
-                r.staff_id,
-                i.film_id,
-                f.title as film_title,
-                CONCAT(c.first_name, ' ', c.last_name) as customer_name,
-                CONCAT(s.first_name, ' ', s.last_name) as staff_name,
-                f.rental_duration,
-                r.rental_date + INTERVAL '1 day' * f.rental_duration as expected_return_date
-            FROM rental r
-            JOIN inventory i ON r.inventory_id = i.inventory_id
-            JOIN film f ON i.film_id = f.film_id
-            JOIN customer c ON r.customer_id = c.customer_id
-            JOIN staff s ON r.staff_id = s.staff_id
-            ORDER BY r.rental_date DESC
-            LIMIT %s OFFSET %s
-        """, (limit, offset))
+    """
+    Listar todas las rentas, de la más reciente a la más antigua.
+    Con `cursor` (el `next_cursor` de la página anterior) pagina por llave
+    en lugar de OFFSET y se ignora `offset`.
+    Con `include_total=false` no se calcula `total`.
+    Con `format=ndjson|csv` (o Accept: application/x-ndjson) exporta todas
+    las filas en streaming; se ignoran `limit` y `offset`.
+    """
+    keyset, params, page = "", (), RENTALS_PAGE
+    if page_cursor:
+        keyset, page = RENTALS_KEYSET, RENTALS_PAGE_AFTER
+        after_date, after_id = decode_cursor(page_cursor, PAGE_KEYS)
+        params = (after_date, after_date, after_id)
+        offset = 0
+
+    export = stream_format(request, export_format)
+    if export:
+        return await stream_query(RENTALS_SQL.format(keyset=keyset), params, export, "rentals")
+
+    async with get_db_cursor() as cursor:
+        await cursor.execute(page, (*params, limit + 1, offset))
         
-        rentals = cursor.fetchall()
+        rentals, next_cursor = paginate(await cursor.fetchall(), limit, PAGE_KEYS)
         
-        # Contar total
-        cursor.execute("SELECT COUNT(*) as count FROM rental")
-        total = cursor.fetchone()['count']
+        # Contar total (cacheado, ver app/totals.py)
+        total = await get_total(cursor, 'rental') if include_total else None
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "count": len(rentals),
             "total": total,
+            "next_cursor": next_cursor,
             "data": rentals
-        }
+        })
 
 @router.post("", response_model=dict, status_code=201)
 @router.post("/", response_model=dict, status_code=201)
@@ -62,101 +197,126 @@ async def create_rental(rental: RentalCreate):
     - film_id: ID de la película
     - staff_id: ID del empleado
     """
-    with get_db_cursor(commit=True) as cursor:
-        # Verificar que el cliente existe
-        cursor.execute("SELECT customer_id FROM customer WHERE customer_id = %s", (rental.customer_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Cliente no encontrado")
-        
-        # Verificar que el staff existe
-        cursor.execute("SELECT staff_id FROM staff WHERE staff_id = %s", (rental.staff_id,))
-        if not cursor.fetchone():
-            raise HTTPException(status_code=404, detail="Empleado no encontrado")
-        
-        # Verificar que la película existe y obtener datos
-        cursor.execute("""
-            SELECT film_id, title, rental_rate, rental_duration 
-            FROM film WHERE film_id = %s
-        """, (rental.film_id,))
-        film = cursor.fetchone()
-        if not film:
-            raise HTTPException(status_code=404, detail="Película no encontrada")
-        
-        # Buscar inventario disponible
-        cursor.execute("""
-            SELECT i.inventory_id 
-            FROM inventory i
-            WHERE i.film_id = %s
-            AND i.inventory_id NOT IN (
-                SELECT inventory_id 
-                FROM rental 
-                WHERE return_date IS NULL
-            )
-            LIMIT 1
-        """, (rental.film_id,))
-        
-        inventory = cursor.fetchone()
-        if not inventory:
-            raise HTTPException(status_code=400, detail="No hay copias disponibles de esta película")
-        
-        # Crear la renta
-        rental_date = datetime.now()
-        expected_return = rental_date + timedelta(days=film['rental_duration'])
-        
-        cursor.execute("""
-            INSERT INTO rental (rental_date, inventory_id, customer_id, staff_id)
-            VALUES (%s, %s, %s, %s)
-            RETURNING rental_id
-        """, (rental_date, inventory['inventory_id'], rental.customer_id, rental.staff_id))
-        
-        result = cursor.fetchone()
-        rental_id = result['rental_id']
+    rental_date = datetime.now()
+    
+    async with get_db_cursor(commit=True) as cursor:
+        # Validar, asignar copia, insertar y obtener los datos en un solo viaje
+        rental_data = await checkout(
+            cursor, rental.customer_id, rental.film_id, rental.staff_id, rental_date
+        )
         
-        # Obtener datos completos de la renta creada
-        cursor.execute("""
-            SELECT 
-                r.rental_id,
-                r.rental_date,
-                r.customer_id,
-                i.film_id,
-                r.staff_id,
-                f.title as film_title,
-                f.rental_rate,
-                f.rental_duration,
-                CONCAT(c.first_name, ' ', c.last_name) as customer_name,
-                CONCAT(s.first_name, ' ', s.last_name) as staff_name
-            FROM rental r
-            JOIN inventory i ON r.inventory_id = i.inventory_id
-            JOIN film f ON i.film_id = f.film_id
-            JOIN customer c ON r.customer_id = c.customer_id
-            JOIN staff s ON r.staff_id = s.staff_id
-            WHERE r.rental_id = %s
-        """, (rental_id,))
+        status = rental_data.pop('status')
+        if status in CHECKOUT_ERRORS:
+            raise HTTPException(*CHECKOUT_ERRORS[status])
         
-        rental_data = cursor.fetchone()
+        expected_return = rental_date + timedelta(days=rental_data['rental_duration'])
         rental_data['expected_return_date'] = expected_return.isoformat()
         
-        return {
+    # Fuera del bloque: la transacción ya hizo commit
+    invalidate_totals('rental')
+    await invalidate_tags(f"customer-rentals:{rental.customer_id}")
+
+    return {
+        "success": True,
+        "message": "Renta creada exitosamente",
+        "data": rental_data
+    }
+
+@router.post("/batch", response_model=dict)
+async def create_rentals_batch(batch: RentalBatchCreate):
+    """
+    Crear varias rentas en una sola transacción.
+
+    Cada elemento de `items` lleva customer_id, film_id y staff_id.
+    Los elementos inválidos o sin copias disponibles no detienen el lote:
+    `results` trae un resultado por elemento, en el mismo orden.
+    """
+    rental_date = datetime.now()
+
+    async with get_db_cursor(commit=True) as cursor:
+        rows = await checkout_batch(cursor, batch.items, rental_date)
+
+    results = []
+    for row in rows:
+        status = row.pop('status')
+        index = row.pop('index')
+        if status in CHECKOUT_ERRORS:
+            results.append({"index": index, "success": False, "error": CHECKOUT_ERRORS[status][1]})
+            continue
+        expected_return = rental_date + timedelta(days=row['rental_duration'])
+        row['expected_return_date'] = expected_return.isoformat()
+        results.append({"index": index, "success": True, "data": row})
+
+    created = [result['data'] for result in results if result['success']]
+    if created:
+        invalidate_totals('rental')
+        await invalidate_tags(*{f"customer-rentals:{row['customer_id']}" for row in created})
+
+    return {
+        "success": True,
+        "message": f"{len(created)} de {len(results)} rentas creadas",
+        "created": len(created),
+        "failed": len(results) - len(created),
+        "results": results
+    }
+
+@router.post("/returns/batch", response_model=dict)
+async def return_rentals_batch(batch: RentalBatchReturn):
+    """
+    Devolver varias rentas en una sola transacción.
+
+    Las rentas inexistentes, ya devueltas o repetidas se reportan en su
+    resultado sin detener el lote.
+    """
+    return_date = datetime.now()
+
+    async with get_db_cursor(commit=True) as cursor:
+        rows = await return_batch(cursor, batch.rental_ids, return_date)
+
+    results = []
+    returned_customers = set()
+    for row in rows:
+        if row['status'] in RETURN_ERRORS:
+            results.append({
+                "index": row['index'],
+                "success": False,
+                "error": RETURN_ERRORS[row['status']],
+                "rental_id": row['rental_id']
+            })
+            continue
+        returned_customers.add(row['customer_id'])
+        results.append({
+            "index": row['index'],
             "success": True,
-            "message": "Renta creada exitosamente",
-            "data": rental_data
-        }
+            "data": {
+                "rental_id": row['rental_id'],
+                "return_date": return_date.isoformat(),
+                "days_rented": row['days_rented'],
+                "total_amount": float(row['total_amount'])
+            }
+        })
+
+    if returned_customers:
+        invalidate_totals('payment')
+        await invalidate_tags(*(f"customer-rentals:{customer_id}" for customer_id in returned_customers))
+
+    returned = sum(1 for result in results if result['success'])
+    return {
+        "success": True,
+        "message": f"{returned} de {len(results)} devoluciones procesadas",
+        "returned": returned,
+        "failed": len(results) - returned,
+        "results": results
+    }
 
 @router.put("/{rental_id}/return", response_model=dict)
 async def return_rental(rental_id: int):
     """Marcar una renta como devuelta"""
-    with get_db_cursor(commit=True) as cursor:
+    async with get_db_cursor(commit=True) as cursor:
         # Verificar que la renta existe
-        cursor.execute("""
-            SELECT r.rental_id, r.rental_date, r.return_date, 
-                   f.rental_rate, f.rental_duration
-            FROM rental r
-            JOIN inventory i ON r.inventory_id = i.inventory_id
-            JOIN film f ON i.film_id = f.film_id
-            WHERE r.rental_id = %s
-        """, (rental_id,))
+        await cursor.execute(RETURN_LOOKUP, (rental_id,))
         
-        rental = cursor.fetchone()
+        rental = await cursor.fetchone()
         if not rental:
             raise HTTPException(status_code=404, detail="Renta no encontrada")
         
@@ -165,53 +325,41 @@ async def return_rental(rental_id: int):
         
         # Actualizar fecha de devolución
         return_date = datetime.now()
-        cursor.execute("""
-            UPDATE rental 
-            SET return_date = %s 
-            WHERE rental_id = %s
-        """, (return_date, rental_id))
+        await cursor.execute(RETURN_UPDATE, (return_date, rental_id, rental['rental_date']))
         
         # Calcular días rentados y monto
         days_rented = (return_date - rental['rental_date']).days
         total_amount = float(rental['rental_rate']) * max(days_rented, 1)
         
         # Crear pago
-        cursor.execute("""
-            INSERT INTO payment (customer_id, staff_id, rental_id, amount, payment_date)
-            SELECT customer_id, staff_id, rental_id, %s, %s
-            FROM rental WHERE rental_id = %s
-        """, (total_amount, return_date, rental_id))
+        await cursor.execute(RETURN_PAYMENT, (total_amount, return_date, rental_id, rental['rental_date']))
         
-        return {
-            "success": True,
-            "message": "Devolución procesada exitosamente",
-            "data": {
-                "rental_id": rental_id,
-                "return_date": return_date.isoformat(),
-                "days_rented": days_rented,
-                "total_amount": total_amount
-            }
+        # Actualizar acumulados de reportes
+        await record_payment(cursor, rental['staff_id'], total_amount)
+        await record_return(cursor, rental['customer_id'], total_amount)
+        
+    invalidate_totals('payment')
+    await invalidate_tags(f"customer-rentals:{rental['customer_id']}")
+
+    return {
+        "success": True,
+        "message": "Devolución procesada exitosamente",
+        "data": {
+            "rental_id": rental_id,
+            "return_date": return_date.isoformat(),
+            "days_rented": days_rented,
+            "total_amount": total_amount
         }
+    }
 
 @router.delete("/{rental_id}", response_model=dict)
 async def cancel_rental(rental_id: int):
     """Cancelar una renta (solo si no ha sido devuelta)"""
-    with get_db_cursor(commit=True) as cursor:
+    async with get_db_cursor(commit=True) as cursor:
         # Verificar que existe y obtener datos
-        cursor.execute("""
-            SELECT r.rental_id, r.return_date,
-                   f.title as film_title,
-                   CONCAT(c.first_name, ' ', c.last_name) as customer_name,
-                   CONCAT(s.first_name, ' ', s.last_name) as staff_name
-            FROM rental r
-            JOIN inventory i ON r.inventory_id = i.inventory_id
-            JOIN film f ON i.film_id = f.film_id
-            JOIN customer c ON r.customer_id = c.customer_id
-            JOIN staff s ON r.staff_id = s.staff_id
-            WHERE r.rental_id = %s
-        """, (rental_id,))
+        await cursor.execute(CANCEL_LOOKUP, (rental_id,))
         
-        rental = cursor.fetchone()
+        rental = await cursor.fetchone()
         if not rental:
             raise HTTPException(status_code=404, detail="Renta no encontrada")
         
@@ -219,60 +367,75 @@ async def cancel_rental(rental_id: int):
             raise HTTPException(status_code=400, detail="No se puede cancelar una renta ya devuelta")
         
         # Eliminar la renta
-        cursor.execute("DELETE FROM rental WHERE rental_id = %s", (rental_id,))
+        await cursor.execute(CANCEL_DELETE, (rental_id, rental['rental_date']))
         
-        return {
-            "success": True,
-            "message": "Renta cancelada exitosamente",
-            "data": {
-                "rental_id": rental_id,
-                "film": {"title": rental['film_title']},
-                "customer": {"name": rental['customer_name']},
-                "staff": {"name": rental['staff_name']}
-            }
+        # Actualizar acumulados de reportes
+        await record_rental(cursor, rental['film_id'], rental['staff_id'], delta=-1)
+        await record_cancellation(cursor, rental['customer_id'])
+        
+    invalidate_totals('rental')
+    await invalidate_tags(f"customer-rentals:{rental['customer_id']}")
+
+    return {
+        "success": True,
+        "message": "Renta cancelada exitosamente",
+        "data": {
+            "rental_id": rental_id,
+            "film": {"title": rental['film_title']},
+            "customer": {"name": rental['customer_name']},
+            "staff": {"name": rental['staff_name']}
         }
+    }
 
-@router.get("/customer/{customer_id}", response_model=dict)
-async def get_customer_rentals(customer_id: int):
-    """Obtener todas las rentas de un cliente"""
-    with get_db_cursor() as cursor:
+async def customer_rentals_version(params):
+    """Versión de las rentas del cliente, parte de la llave del cache"""
+    async with get_db_cursor() as cursor:
+        return await get_customer_version(cursor, params['customer_id'])
+
+@router.get("/customer/{customer_id}", responses={200: {"model": CustomerRentalsResponse}})
+@cached(tags=("rentals", "customer-rentals:{customer_id}"), version=customer_rentals_version)
+async def get_customer_rentals(
+    customer_id: int,
+    request: Request,
+    limit: int = Query(default=100, ge=1, le=1000),
+    page_cursor: Optional[str] = Query(default=None, alias="cursor"),
+    export_format: Optional[str] = Query(default=None, alias="format", pattern=FORMAT_PATTERN)
+):
+    """
+    Obtener las rentas de un cliente, de la más reciente a la más antigua.
+    `total_rentals` sale de customer_rental_stats; las rentas se paginan con
+    `limit` y `cursor` (el `next_cursor` de la página anterior).
+    Con `format=ndjson|csv` (o Accept: application/x-ndjson) exporta todas
+    las rentas en streaming; se ignora `limit`.
+    """
+    keyset, params, page = "", {'customer_id': customer_id}, CUSTOMER_RENTALS_PAGE
+    if page_cursor:
+        keyset, page = CUSTOMER_RENTALS_KEYSET, CUSTOMER_RENTALS_PAGE_AFTER
+        params['after_date'], params['after_id'] = decode_cursor(page_cursor, PAGE_KEYS)
+
+    async with get_db_cursor() as cursor:
         # Verificar que el cliente existe
-        cursor.execute("""
-            SELECT customer_id, CONCAT(first_name, ' ', last_name) as name
-            FROM customer WHERE customer_id = %s
-        """, (customer_id,))
-        customer = cursor.fetchone()
+        stats = await get_customer_stats(cursor, customer_id)
         
-        if not customer:
+        if not stats:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
         
-        # Obtener rentas
-        cursor.execute("""
-            SELECT 
-                r.rental_id,
-                r.rental_date,
-                r.return_date,
-                f.title as film_title,
-                f.rental_rate,
-                p.amount as payment_amount,
-                CASE 
-                    WHEN r.return_date IS NOT NULL 
-                    THEN EXTRACT(day FROM (r.return_date - r.rental_date))
-                    ELSE NULL
-                END as days_rented
-            FROM rental r
-            JOIN inventory i ON r.inventory_id = i.inventory_id
-            JOIN film f ON i.film_id = f.film_id
-            LEFT JOIN payment p ON r.rental_id = p.rental_id
-            WHERE r.customer_id = %s
-            ORDER BY r.rental_date DESC
-        """, (customer_id,))
-        
-        rentals = cursor.fetchall()
-        
-        return {
-            "success": True,
-            "customer": customer,
-            "total_rentals": len(rentals),
-            "rentals": rentals
-        }
+        export = stream_format(request, export_format)
+        if not export:
+            # Obtener rentas
+            await cursor.execute(page, {**params, 'limit': limit + 1})
+            rentals, next_cursor = paginate(await cursor.fetchall(), limit, PAGE_KEYS)
+
+    if export:
+        return await stream_query(
+            CUSTOMER_RENTALS_SQL.format(keyset=keyset), params, export, f"customer-{customer_id}-rentals"
+        )
+
+    return FastJSONResponse({
+        "success": True,
+        "customer": {"customer_id": stats['customer_id'], "name": stats['name']},
+        "total_rentals": stats['total_rentals'],
+        "count": len(rentals),
+        "next_cursor": next_cursor,
+        "rentals": rentals
+    })
@@ -1,229 +1,571 @@
-from fastapi import APIRouter, HTTPException, Query
-from datetime import datetime
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional, Union
+from datetime import date, datetime, time, timedelta
 
 from app.database import get_db_cursor
+from app.pagination import decode_cursor, paginate
+from app.streaming import FORMAT_PATTERN, stream_format, stream_query
+from app.responses import FastJSONResponse
+from app.schemas import (
+    UnreturnedReport, UnreturnedSummary, MostRentedReport, StaffRevenueReport,
+    StaffRevenueDetailReport, CustomerRentalReport, CustomerRentalSummary
+)
+from app.rollups import get_customer_stats
+from app.singleflight import coalesced
+from app.statements import statement
 
 router = APIRouter()
 
-@router.get("/unreturned-dvds", response_model=dict)
-async def get_unreturned_dvds():
+UNRETURNED_PAGE_KEYS = ('expected_return_date', 'rental_id')
+
+# Rentas abiertas; {filters} se llena con unreturned_filters()
+UNRETURNED_SQL = """
+    SELECT 
+        r.rental_id,
+        f.title as film_title,
+        CONCAT(c.first_name, ' ', c.last_name) as customer_name,
+        r.rental_date,
+        r.due_date as expected_return_date,
+        EXTRACT(day FROM (CURRENT_DATE - r.due_date))::integer as days_overdue,
+        c.email as customer_email,
+        f.rental_rate
+    FROM rental r
+    JOIN inventory i ON r.inventory_id = i.inventory_id
+    JOIN film f ON i.film_id = f.film_id
+    JOIN customer c ON r.customer_id = c.customer_id
+    WHERE r.return_date IS NULL {filters}
+    ORDER BY r.due_date ASC, r.rental_id ASC
+"""
+
+UNRETURNED_SUMMARY_SQL = """
+    SELECT
+        COUNT(*) FILTER (WHERE true {filters}) as count,
+        COUNT(*) as open_count,
+        COUNT(*) FILTER (WHERE r.due_date <= CURRENT_DATE - INTERVAL '1 day') as overdue_count,
+        MIN(r.due_date) as oldest_due_date
+    FROM rental r
+    WHERE r.return_date IS NULL
+"""
+
+
+def unreturned_filters(filtered, after=False):
+    """Condiciones de atraso mínimo (min_days) y de página (cursor)"""
+    filters = ""
+    if filtered:
+        filters += " AND r.due_date <= CURRENT_DATE - %(min_days)s * INTERVAL '1 day'"
+    if after:
+        filters += " AND (r.due_date, r.rental_id) > (%(after_due)s, %(after_id)s)"
+    return filters
+
+
+# Una sentencia preparada por combinación de filtro, cursor y límite
+UNRETURNED_SUMMARY = {
+    filtered: statement(
+        'reports.unreturned_summary' + ('.min_days' if filtered else ''),
+        UNRETURNED_SUMMARY_SQL.format(filters=unreturned_filters(filtered))
+    )
+    for filtered in (False, True)
+}
+UNRETURNED_LIST = {
+    (filtered, after, limited): statement(
+        'reports.unreturned' + ('.min_days' if filtered else '') + ('.after' if after else '')
+        + ('.limit' if limited else ''),
+        UNRETURNED_SQL.format(filters=unreturned_filters(filtered, after))
+        + (" LIMIT %(limit)s" if limited else "")
+    )
+    for filtered in (False, True) for after in (False, True) for limited in (False, True)
+}
+
+@router.get("/unreturned-dvds", responses={200: {"model": Union[UnreturnedReport, UnreturnedSummary]}})
+@coalesced
+async def get_unreturned_dvds(
+    request: Request,
+    overdue_only: bool = Query(default=False),
+    min_days: Optional[int] = Query(default=None, ge=1),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000),
+    page_cursor: Optional[str] = Query(default=None, alias="cursor"),
+    summary_only: bool = Query(default=False),
+    export_format: Optional[str] = Query(default=None, alias="format", pattern=FORMAT_PATTERN)
+):
     """
-    Obtener lista de DVDs que no han sido devueltos.
+    Obtener lista de DVDs que no han sido devueltos, los de fecha de
+    devolución más antigua primero.
     Identifica rentas activas con posibles retrasos.
+    Con `overdue_only=true` solo las atrasadas (al menos un día) y con
+    `min_days` las que llevan al menos esos días de atraso.
+    Con `limit` pagina; `cursor` es el `next_cursor` de la página anterior.
+    Con `summary_only=true` regresa solo los conteos, sin filas.
+    Con `format=ndjson|csv` (o Accept: application/x-ndjson) exporta las
+    filas en streaming, sin el resumen; se ignora `limit`.
+
+    Todo se lee del índice parcial de rentas abiertas por due_date
+    (postgres/init-db/upgrade-006-overdue-tracking.sql).
     """
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT 
-                r.rental_id,
-                f.title as film_title,
-                CONCAT(c.first_name, ' ', c.last_name) as customer_name,
-                r.rental_date,
-                r.rental_date + INTERVAL '1 day' * f.rental_duration as expected_return_date,
-                EXTRACT(day FROM (CURRENT_DATE - (r.rental_date + INTERVAL '1 day' * f.rental_duration))) as days_overdue,
-                c.email as customer_email,
-                f.rental_rate
-            FROM rental r
-            JOIN inventory i ON r.inventory_id = i.inventory_id
-            JOIN film f ON i.film_id = f.film_id
-            JOIN customer c ON r.customer_id = c.customer_id
-            WHERE r.return_date IS NULL
-            ORDER BY r.rental_date ASC
-        """)
-        
-        unreturned = cursor.fetchall()
-        
-        # Calcular estadísticas
-        overdue_count = sum(1 for r in unreturned if r['days_overdue'] > 0)
+    if overdue_only and min_days is None:
+        min_days = 1
+
+    filtered, params = min_days is not None, {'min_days': min_days}
+    summary_query = UNRETURNED_SUMMARY[filtered]
+
+    if summary_only:
+        async with get_db_cursor() as cursor:
+            await cursor.execute(summary_query, params)
+            summary = await cursor.fetchone()
+        return FastJSONResponse({
+            "success": True,
+            **summary,
+            "generated_at": datetime.now().isoformat()
+        })
+
+    after = page_cursor is not None
+    if after:
+        params['after_due'], params['after_id'] = decode_cursor(page_cursor, UNRETURNED_PAGE_KEYS)
+
+    export = stream_format(request, export_format)
+    if export:
+        query = UNRETURNED_SQL.format(filters=unreturned_filters(filtered, after))
+        return await stream_query(query, params, export, "unreturned-dvds")
+
+    async with get_db_cursor() as cursor:
+        if limit is None:
+            await cursor.execute(UNRETURNED_LIST[filtered, after, False], params)
+            unreturned, next_cursor = await cursor.fetchall(), None
+        else:
+            await cursor.execute(UNRETURNED_LIST[filtered, after, True], {**params, 'limit': limit + 1})
+            unreturned, next_cursor = paginate(await cursor.fetchall(), limit, UNRETURNED_PAGE_KEYS)
+
+        # Conteos de todas las rentas abiertas (index-only scan del índice parcial)
+        await cursor.execute(summary_query, params)
+        summary = await cursor.fetchone()
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "count": len(unreturned),
-            "overdue_count": overdue_count,
+            "open_count": summary['open_count'],
+            "overdue_count": summary['overdue_count'],
+            "next_cursor": next_cursor,
             "generated_at": datetime.now().isoformat(),
             "data": unreturned
-        }
+        })
+
+MOST_RENTED_LIVE = statement('reports.most_rented_live', """
+    SELECT 
+        f.film_id,
+        f.title,
+        c.name as category,
+        COUNT(r.rental_id) as total_rentals,
+        f.rental_rate,
+        COUNT(r.rental_id) * f.rental_rate as total_revenue
+    FROM film f
+    JOIN film_category fc ON f.film_id = fc.film_id
+    JOIN category c ON fc.category_id = c.category_id
+    JOIN inventory i ON f.film_id = i.film_id
+    JOIN rental r ON i.inventory_id = r.inventory_id
+    GROUP BY f.film_id, f.title, c.name, f.rental_rate
+    ORDER BY total_rentals DESC, total_revenue DESC, f.film_id
+    LIMIT %s
+""")
+
+MOST_RENTED = statement('reports.most_rented', """
+    SELECT 
+        f.film_id,
+        f.title,
+        c.name as category,
+        st.total_rentals,
+        f.rental_rate,
+        st.total_rentals * f.rental_rate as total_revenue
+    FROM film_rental_stats st
+    JOIN film f ON st.film_id = f.film_id
+    JOIN film_category fc ON f.film_id = fc.film_id
+    JOIN category c ON fc.category_id = c.category_id
+    WHERE st.total_rentals > 0
+    ORDER BY total_rentals DESC, total_revenue DESC, f.film_id
+    LIMIT %s
+""")
+
+STAFF_REVENUE_LIVE = statement('reports.staff_revenue_live', """
+    SELECT 
+        s.staff_id,
+        CONCAT(s.first_name, ' ', s.last_name) as staff_name,
+        s.email,
+        COUNT(DISTINCT r.rental_id) as total_rentals,
+        COUNT(p.payment_id) as total_payments,
+        COALESCE(SUM(p.amount), 0) as total_revenue,
+        COALESCE(AVG(p.amount), 0) as average_payment
+    FROM staff s
+    LEFT JOIN rental r ON s.staff_id = r.staff_id
+    LEFT JOIN payment p ON r.rental_id = p.rental_id
+    GROUP BY s.staff_id, s.first_name, s.last_name, s.email
+    ORDER BY total_revenue DESC
+""")
+
+STAFF_REVENUE = statement('reports.staff_revenue', """
+    SELECT 
+        s.staff_id,
+        CONCAT(s.first_name, ' ', s.last_name) as staff_name,
+        s.email,
+        COALESCE(st.total_rentals, 0) as total_rentals,
+        COALESCE(st.total_payments, 0) as total_payments,
+        COALESCE(st.total_revenue, 0) as total_revenue,
+        COALESCE(st.total_revenue / NULLIF(st.total_payments, 0), 0) as average_payment
+    FROM staff s
+    LEFT JOIN staff_revenue_stats st ON s.staff_id = st.staff_id
+    ORDER BY total_revenue DESC
+""")
+
+STAFF_LOOKUP = statement('reports.staff_lookup', """
+    SELECT staff_id, CONCAT(first_name, ' ', last_name) as name
+    FROM staff WHERE staff_id = %s
+""")
+
+STAFF_REVENUE_BY_ID_LIVE = statement('reports.staff_revenue_by_id_live', """
+    SELECT 
+        s.staff_id,
+        CONCAT(s.first_name, ' ', s.last_name) as staff_name,
+        s.email,
+        COUNT(DISTINCT r.rental_id) as total_rentals,
+        COUNT(p.payment_id) as total_payments,
+        COALESCE(SUM(p.amount), 0) as total_revenue,
+        COALESCE(AVG(p.amount), 0) as average_payment
+    FROM staff s
+    LEFT JOIN rental r ON s.staff_id = r.staff_id
+    LEFT JOIN payment p ON r.rental_id = p.rental_id
+    WHERE s.staff_id = %s
+    GROUP BY s.staff_id, s.first_name, s.last_name, s.email
+""")
+
+STAFF_REVENUE_BY_ID = statement('reports.staff_revenue_by_id', """
+    SELECT 
+        s.staff_id,
+        CONCAT(s.first_name, ' ', s.last_name) as staff_name,
+        s.email,
+        COALESCE(st.total_rentals, 0) as total_rentals,
+        COALESCE(st.total_payments, 0) as total_payments,
+        COALESCE(st.total_revenue, 0) as total_revenue,
+        COALESCE(st.total_revenue / NULLIF(st.total_payments, 0), 0) as average_payment
+    FROM staff s
+    LEFT JOIN staff_revenue_stats st ON s.staff_id = st.staff_id
+    WHERE s.staff_id = %s
+""")
+
+STAFF_RECENT_RENTALS = statement('reports.staff_recent_rentals', """
+    SELECT 
+        r.rental_id,
+        f.title as film_title,
+        r.rental_date,
+        r.return_date,
+        p.amount as payment_amount
+    FROM rental r
+    JOIN inventory i ON r.inventory_id = i.inventory_id
+    JOIN film f ON i.film_id = f.film_id
+    LEFT JOIN payment p ON r.rental_id = p.rental_id AND p.payment_date >= r.rental_date
+    WHERE r.staff_id = %s
+    ORDER BY r.rental_date DESC
+    LIMIT 10
+""")
+
+# ============ VENTANAS DE TIEMPO ============
+# Con from/to (fechas, ambas inclusivas) y bucket los reportes agregan en vivo
+# solo el rango pedido. El filtro va sobre rental_date/payment_date sin
+# funciones, para que se use su índice (y se descarten particiones); no se
+# preparan porque el mejor plan depende del ancho de la ventana.
 
-@router.get("/most-rented", response_model=dict)
-async def get_most_rented_films(limit: int = Query(default=10, ge=1, le=100)):
+BUCKET_PATTERN = "^(day|week|month)$"
+
+MOST_RENTED_WINDOW_SQL = """
+    SELECT film_id, title, category, total_rentals, rental_rate, total_revenue, period
+    FROM (
+        SELECT 
+            f.film_id,
+            f.title,
+            c.name as category,
+            COUNT(*) as total_rentals,
+            f.rental_rate,
+            COUNT(*) * f.rental_rate as total_revenue,
+            date_trunc(%(bucket)s, r.rental_date)::date as period,
+            row_number() OVER (
+                PARTITION BY date_trunc(%(bucket)s, r.rental_date)
+                ORDER BY COUNT(*) DESC, f.rental_rate DESC, f.film_id
+            ) as position
+        FROM rental r
+        JOIN inventory i ON r.inventory_id = i.inventory_id
+        JOIN film f ON i.film_id = f.film_id
+        JOIN film_category fc ON f.film_id = fc.film_id
+        JOIN category c ON fc.category_id = c.category_id
+        WHERE true {rental_window}
+        GROUP BY date_trunc(%(bucket)s, r.rental_date), f.film_id, f.title, c.name, f.rental_rate
+    ) ranked
+    WHERE position <= %(limit)s
+    ORDER BY period, position
+"""
+
+# Rentas por rental_date y pagos por payment_date, acreditados al empleado
+# de la renta como en STAFF_REVENUE_LIVE y staff_revenue_stats
+# (payment.staff_id no siempre coincide con rental.staff_id)
+STAFF_REVENUE_WINDOW_SQL = """
+    WITH activity AS (
+        SELECT staff_id, period,
+               SUM(total_rentals)::bigint as total_rentals,
+               SUM(total_payments)::bigint as total_payments,
+               SUM(total_revenue) as total_revenue
+        FROM (
+            SELECT r.staff_id, date_trunc(%(bucket)s, r.rental_date)::date as period,
+                   COUNT(*) as total_rentals, 0 as total_payments, 0 as total_revenue
+            FROM rental r
+            WHERE true {rental_window}
+            GROUP BY 1, 2
+            UNION ALL
+            SELECT r.staff_id, date_trunc(%(bucket)s, p.payment_date)::date,
+                   0, COUNT(*), SUM(p.amount)
+            FROM payment p
+            JOIN rental r ON r.rental_id = p.rental_id
+            WHERE true {payment_window}
+            GROUP BY 1, 2
+        ) counts
+        GROUP BY staff_id, period
+    )
+    SELECT 
+        s.staff_id,
+        CONCAT(s.first_name, ' ', s.last_name) as staff_name,
+        s.email,
+        COALESCE(a.total_rentals, 0) as total_rentals,
+        COALESCE(a.total_payments, 0) as total_payments,
+        COALESCE(a.total_revenue, 0) as total_revenue,
+        COALESCE(a.total_revenue / NULLIF(a.total_payments, 0), 0) as average_payment,
+        a.period
+    FROM staff s
+    {activity_join} activity a ON a.staff_id = s.staff_id
+    ORDER BY a.period, total_revenue DESC
+"""
+
+
+def report_window(from_date, to_date, bucket):
+    """
+    Parámetros de la ventana [window_start, window_end) para from/to, o None
+    si no se pidió ventana ni bucket (se usan los acumulados).
+    """
+    if from_date is None and to_date is None and bucket is None:
+        return None
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(status_code=400, detail="from no puede ser posterior a to")
+    return {
+        'window_start': datetime.combine(from_date, time.min) if from_date else None,
+        'window_end': datetime.combine(to_date + timedelta(days=1), time.min) if to_date else None,
+        'bucket': bucket
+    }
+
+
+def window_filter(column, window):
+    """Condiciones de rango sobre column (sin funciones, usa el índice)"""
+    filters = ""
+    if window['window_start'] is not None:
+        filters += f" AND {column} >= %(window_start)s"
+    if window['window_end'] is not None:
+        filters += f" AND {column} < %(window_end)s"
+    return filters
+
+
+@router.get("/most-rented", responses={200: {"model": MostRentedReport}})
+@coalesced
+async def get_most_rented_films(
+    limit: int = Query(default=10, ge=1, le=100),
+    fresh: bool = Query(default=False),
+    from_date: Optional[date] = Query(default=None, alias="from"),
+    to_date: Optional[date] = Query(default=None, alias="to"),
+    bucket: Optional[str] = Query(default=None, pattern=BUCKET_PATTERN)
+):
     """
     Obtener ranking de películas más rentadas.
     Incluye categoría, total de rentas y revenue generado.
+    Se sirve desde film_rental_stats; con `fresh=true` agrega sobre rental.
+    Con `from`/`to` (YYYY-MM-DD, inclusivas) cuenta solo las rentas de ese
+    rango y con `bucket=day|week|month` regresa el ranking de cada periodo
+    (`period`, inicio del día, semana o mes), `limit` películas por periodo.
     """
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT 
-                f.film_id,
-                f.title,
-                c.name as category,
-                COUNT(r.rental_id) as total_rentals,
-                f.rental_rate,
-                COUNT(r.rental_id) * f.rental_rate as total_revenue
-            FROM film f
-            JOIN film_category fc ON f.film_id = fc.film_id
-            JOIN category c ON fc.category_id = c.category_id
-            JOIN inventory i ON f.film_id = i.film_id
-            JOIN rental r ON i.inventory_id = r.inventory_id
-            GROUP BY f.film_id, f.title, c.name, f.rental_rate
-            ORDER BY total_rentals DESC, total_revenue DESC
-            LIMIT %s
-        """, (limit,))
+    window = report_window(from_date, to_date, bucket)
+    async with get_db_cursor() as cursor:
+        if window:
+            query = MOST_RENTED_WINDOW_SQL.format(rental_window=window_filter('r.rental_date', window))
+            await cursor.execute(query, {**window, 'limit': limit})
+        elif fresh:
+            await cursor.execute(MOST_RENTED_LIVE, (limit,))
+        else:
+            await cursor.execute(MOST_RENTED, (limit,))
         
-        most_rented = cursor.fetchall()
+        most_rented = await cursor.fetchall()
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "count": len(most_rented),
+            "source": "live" if fresh or window else "rollup",
+            "from": from_date,
+            "to": to_date,
+            "bucket": bucket,
             "generated_at": datetime.now().isoformat(),
             "data": most_rented
-        }
+        })
 
-@router.get("/staff-revenue", response_model=dict)
-async def get_staff_revenue():
+@router.get("/staff-revenue", responses={200: {"model": StaffRevenueReport}})
+@coalesced
+async def get_staff_revenue(
+    fresh: bool = Query(default=False),
+    from_date: Optional[date] = Query(default=None, alias="from"),
+    to_date: Optional[date] = Query(default=None, alias="to"),
+    bucket: Optional[str] = Query(default=None, pattern=BUCKET_PATTERN)
+):
     """
     Calcular el total de ganancias generadas por cada miembro del staff.
     Incluye número de rentas, pagos y promedio.
+    Se sirve desde staff_revenue_stats; con `fresh=true` agrega sobre rental/payment.
+    Con `from`/`to` (YYYY-MM-DD, inclusivas) cuenta las rentas hechas y los
+    pagos de sus rentas cobrados en ese rango; con `bucket=day|week|month` regresa una
+    fila por empleado y periodo con actividad (`period`).
     """
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT 
-                s.staff_id,
-                CONCAT(s.first_name, ' ', s.last_name) as staff_name,
-                s.email,
-                COUNT(DISTINCT r.rental_id) as total_rentals,
-                COUNT(p.payment_id) as total_payments,
-                COALESCE(SUM(p.amount), 0) as total_revenue,
-                COALESCE(AVG(p.amount), 0) as average_payment
-            FROM staff s
-            LEFT JOIN rental r ON s.staff_id = r.staff_id
-            LEFT JOIN payment p ON r.rental_id = p.rental_id
-            GROUP BY s.staff_id, s.first_name, s.last_name, s.email
-            ORDER BY total_revenue DESC
-        """)
+    window = report_window(from_date, to_date, bucket)
+    async with get_db_cursor() as cursor:
+        if window:
+            query = STAFF_REVENUE_WINDOW_SQL.format(
+                rental_window=window_filter('r.rental_date', window),
+                payment_window=window_filter('p.payment_date', window),
+                activity_join="JOIN" if bucket else "LEFT JOIN"
+            )
+            await cursor.execute(query, window)
+        elif fresh:
+            await cursor.execute(STAFF_REVENUE_LIVE)
+        else:
+            await cursor.execute(STAFF_REVENUE)
         
-        staff_revenue = cursor.fetchall()
+        staff_revenue = await cursor.fetchall()
         
         # Calcular totales globales
         total_revenue_all = sum(float(s['total_revenue']) for s in staff_revenue)
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "count": len(staff_revenue),
+            "source": "live" if fresh or window else "rollup",
+            "from": from_date,
+            "to": to_date,
+            "bucket": bucket,
             "total_revenue_all_staff": total_revenue_all,
             "generated_at": datetime.now().isoformat(),
             "data": staff_revenue
-        }
+        })
 
-@router.get("/staff-revenue/{staff_id}", response_model=dict)
-async def get_staff_revenue_by_id(staff_id: int):
+@router.get("/staff-revenue/{staff_id}", responses={200: {"model": StaffRevenueDetailReport}})
+@coalesced
+async def get_staff_revenue_by_id(staff_id: int, fresh: bool = Query(default=False)):
     """
     Obtener ganancias generadas por un miembro específico del staff.
+    Se sirve desde staff_revenue_stats; con `fresh=true` agrega sobre rental/payment.
     """
-    with get_db_cursor() as cursor:
+    async with get_db_cursor() as cursor:
         # Verificar que el staff existe
-        cursor.execute("""
-            SELECT staff_id, CONCAT(first_name, ' ', last_name) as name
-            FROM staff WHERE staff_id = %s
-        """, (staff_id,))
-        staff = cursor.fetchone()
+        await cursor.execute(STAFF_LOOKUP, (staff_id,))
+        staff = await cursor.fetchone()
         
         if not staff:
             raise HTTPException(status_code=404, detail="Empleado no encontrado")
         
         # Obtener estadísticas
-        cursor.execute("""
-            SELECT 
-                s.staff_id,
-                CONCAT(s.first_name, ' ', s.last_name) as staff_name,
-                s.email,
-                COUNT(DISTINCT r.rental_id) as total_rentals,
-                COUNT(p.payment_id) as total_payments,
-                COALESCE(SUM(p.amount), 0) as total_revenue,
-                COALESCE(AVG(p.amount), 0) as average_payment
-            FROM staff s
-            LEFT JOIN rental r ON s.staff_id = r.staff_id
-            LEFT JOIN payment p ON r.rental_id = p.rental_id
-            WHERE s.staff_id = %s
-            GROUP BY s.staff_id, s.first_name, s.last_name, s.email
-        """, (staff_id,))
+        if fresh:
+            await cursor.execute(STAFF_REVENUE_BY_ID_LIVE, (staff_id,))
+        else:
+            await cursor.execute(STAFF_REVENUE_BY_ID, (staff_id,))
         
-        revenue = cursor.fetchone()
+        revenue = await cursor.fetchone()
         
         # Obtener rentas recientes
-        cursor.execute("""
-            SELECT 
-                r.rental_id,
-                f.title as film_title,
-                r.rental_date,
-                r.return_date,
-                p.amount as payment_amount
-            FROM rental r
-            JOIN inventory i ON r.inventory_id = i.inventory_id
-            JOIN film f ON i.film_id = f.film_id
-            LEFT JOIN payment p ON r.rental_id = p.rental_id
-            WHERE r.staff_id = %s
-            ORDER BY r.rental_date DESC
-            LIMIT 10
-        """, (staff_id,))
+        await cursor.execute(STAFF_RECENT_RENTALS, (staff_id,))
         
-        recent_rentals = cursor.fetchall()
+        recent_rentals = await cursor.fetchall()
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "staff": revenue,
+            "source": "live" if fresh else "rollup",
             "recent_rentals": recent_rentals,
             "generated_at": datetime.now().isoformat()
-        }
+        })
 
-@router.get("/customer-rentals/{customer_id}", response_model=dict)
-async def get_customer_rental_report(customer_id: int):
+CUSTOMER_PAGE_KEYS = ('rental_date', 'rental_id')
+
+CUSTOMER_RENTALS_SQL = """
+    SELECT 
+        r.rental_id,
+        f.title as film_title,
+        r.rental_date,
+        r.return_date,
+        p.amount as payment_amount,
+        CASE 
+            WHEN r.return_date IS NOT NULL 
+            THEN EXTRACT(day FROM (r.return_date - r.rental_date))::integer
+            ELSE NULL
+        END as days_rented
+    FROM rental r
+    JOIN inventory i ON r.inventory_id = i.inventory_id
+    JOIN film f ON i.film_id = f.film_id
+    LEFT JOIN payment p ON r.rental_id = p.rental_id AND p.payment_date >= r.rental_date
+    WHERE r.customer_id = %(customer_id)s {keyset}
+    ORDER BY r.rental_date DESC, r.rental_id DESC
+    LIMIT %(limit)s
+"""
+CUSTOMER_RENTALS_PAGE = statement('reports.customer_rentals', CUSTOMER_RENTALS_SQL.format(keyset=""))
+CUSTOMER_RENTALS_PAGE_AFTER = statement(
+    'reports.customer_rentals_after',
+    CUSTOMER_RENTALS_SQL.format(
+        keyset="AND r.rental_date <= %(after_date)s AND (r.rental_date, r.rental_id) < (%(after_date)s, %(after_id)s)"
+    )
+)
+
+@router.get("/customer-rentals/{customer_id}", responses={200: {"model": Union[CustomerRentalReport, CustomerRentalSummary]}})
+@coalesced
+async def get_customer_rental_report(
+    customer_id: int,
+    limit: int = Query(default=100, ge=1, le=1000),
+    page_cursor: Optional[str] = Query(default=None, alias="cursor"),
+    summary_only: bool = Query(default=False)
+):
     """
-    Reporte completo de rentas de un cliente.
-    Alias del endpoint /api/rentals/customer/{customer_id}
+    Estado de cuenta de un cliente: rentas, rentas abiertas, total pagado
+    y última renta, leídos de customer_rental_stats (app/rollups.py), y sus
+    rentas de la más reciente a la más antigua, paginadas con `limit` y
+    `cursor` (el `next_cursor` de la página anterior).
+    Con `summary_only=true` regresa solo el resumen.
     """
-    with get_db_cursor() as cursor:
-        # Verificar cliente
-        cursor.execute("""
-            SELECT customer_id, CONCAT(first_name, ' ', last_name) as name, email
-            FROM customer WHERE customer_id = %s
-        """, (customer_id,))
-        customer = cursor.fetchone()
-        
-        if not customer:
+    async with get_db_cursor() as cursor:
+        stats = await get_customer_stats(cursor, customer_id)
+        if not stats:
             raise HTTPException(status_code=404, detail="Cliente no encontrado")
-        
-        # Obtener rentas
-        cursor.execute("""
-            SELECT 
-                r.rental_id,
-                f.title as film_title,
-                r.rental_date,
-                r.return_date,
-                p.amount as payment_amount,
-                CASE 
-                    WHEN r.return_date IS NOT NULL 
-                    THEN EXTRACT(day FROM (r.return_date - r.rental_date))
-                    ELSE NULL
-                END as days_rented
-            FROM rental r
-            JOIN inventory i ON r.inventory_id = i.inventory_id
-            JOIN film f ON i.film_id = f.film_id
-            LEFT JOIN payment p ON r.rental_id = p.rental_id
-            WHERE r.customer_id = %s
-            ORDER BY r.rental_date DESC
-        """, (customer_id,))
-        
-        rentals = cursor.fetchall()
-        
-        # Calcular estadísticas
-        total_spent = sum(float(r['payment_amount']) for r in rentals if r['payment_amount'])
-        active_rentals = sum(1 for r in rentals if not r['return_date'])
-        
-        return {
+
+        summary = {
             "success": True,
-            "customer": customer,
-            "total_rentals": len(rentals),
-            "active_rentals": active_rentals,
-            "total_spent": total_spent,
-            "rentals": rentals,
+            "customer": {
+                "customer_id": stats['customer_id'],
+                "name": stats['name'],
+                "email": stats['email']
+            },
+            "total_rentals": stats['total_rentals'],
+            "active_rentals": stats['active_rentals'],
+            "total_spent": float(stats['total_spent']),
+            "last_rental_date": stats['last_rental_date'],
             "generated_at": datetime.now().isoformat()
-        }
\ No newline at end of file
+        }
+        if summary_only:
+            return FastJSONResponse(summary)
+
+        params, page = {'customer_id': customer_id, 'limit': limit + 1}, CUSTOMER_RENTALS_PAGE
+        if page_cursor:
+            page = CUSTOMER_RENTALS_PAGE_AFTER
+            params['after_date'], params['after_id'] = decode_cursor(page_cursor, CUSTOMER_PAGE_KEYS)
+
+        await cursor.execute(page, params)
+        
+        rentals, next_cursor = paginate(await cursor.fetchall(), limit, CUSTOMER_PAGE_KEYS)
+        
+        return FastJSONResponse({
+            **summary,
+            "count": len(rentals),
+            "next_cursor": next_cursor,
+            "rentals": rentals
+        })
@@ -1,48 +1,78 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
 
 from app.database import get_db_cursor
+from app.pagination import decode_cursor, paginate
+from app.streaming import FORMAT_PATTERN, stream_format, stream_query
+from app.totals import get_total
+from app.responses import FastJSONResponse
+from app.schemas import Staff, StaffDetail, Item, Page
 
 router = APIRouter()
 
-@router.get("/", response_model=dict)
+PAGE_KEYS = ('last_name', 'first_name', 'staff_id')
+
+@router.get("/", responses={200: {"model": Page[Staff]}})
 async def list_staff(
+    request: Request,
     limit: int = Query(default=100, ge=1, le=1000),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    page_cursor: Optional[str] = Query(default=None, alias="cursor"),
+    include_total: bool = Query(default=True),
+    export_format: Optional[str] = Query(default=None, alias="format", pattern=FORMAT_PATTERN)
 ):
-    """Listar todos los empleados"""
-    with get_db_cursor() as cursor:
-        cursor.execute("""
-            SELECT 
-                staff_id, 
-                first_name, 
-                last_name, 
-                email, 
-                active,
-                store_id
-            FROM staff
-            ORDER BY last_name, first_name
-            LIMIT %s OFFSET %s
-        """, (limit, offset))
+    """
+    Listar todos los empleados.
+    Con `cursor` (el `next_cursor` de la página anterior) pagina por llave
+    en lugar de OFFSET y se ignora `offset`.
+    Con `include_total=false` no se calcula `total`.
+    Con `format=ndjson|csv` (o Accept: application/x-ndjson) exporta todas
+    las filas en streaming; se ignoran `limit` y `offset`.
+    """
+    keyset, params = "", ()
+    if page_cursor:
+        keyset = "WHERE (last_name, first_name, staff_id) > (%s, %s, %s)"
+        params = tuple(decode_cursor(page_cursor, PAGE_KEYS))
+        offset = 0
+
+    query = f"""
+        SELECT 
+            staff_id, 
+            first_name, 
+            last_name, 
+            email, 
+            active,
+            store_id
+        FROM staff
+        {keyset}
+        ORDER BY last_name, first_name, staff_id
+    """
+
+    export = stream_format(request, export_format)
+    if export:
+        return await stream_query(query, params, export, "staff")
+
+    async with get_db_cursor() as cursor:
+        await cursor.execute(query + " LIMIT %s OFFSET %s", (*params, limit + 1, offset))
         
-        staff = cursor.fetchall()
+        staff, next_cursor = paginate(await cursor.fetchall(), limit, PAGE_KEYS)
         
-        # Contar total
-        cursor.execute("SELECT COUNT(*) as count FROM staff")
-        total = cursor.fetchone()['count']
+        # Contar total (cacheado, ver app/totals.py)
+        total = await get_total(cursor, 'staff') if include_total else None
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "count": len(staff),
             "total": total,
+            "next_cursor": next_cursor,
             "data": staff
-        }
+        })
 
-@router.get("/{staff_id}", response_model=dict)
+@router.get("/{staff_id}", responses={200: {"model": Item[StaffDetail]}})
 async def get_staff(staff_id: int):
     """Obtener un empleado por ID"""
-    with get_db_cursor() as cursor:
-        cursor.execute("""
+    async with get_db_cursor() as cursor:
+        await cursor.execute("""
             SELECT 
                 s.staff_id,
                 s.first_name,
@@ -61,12 +91,12 @@ async def get_staff(staff_id: int):
             WHERE s.staff_id = %s
         """, (staff_id,))
         
-        staff = cursor.fetchone()
+        staff = await cursor.fetchone()
         
         if not staff:
             raise HTTPException(status_code=404, detail="Empleado no encontrado")
         
-        return {
+        return FastJSONResponse({
             "success": True,
             "data": staff
-        }
\ No newline at end of file
+        })
\ No newline at end of file
@@ -1,8 +1,24 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Generic, Optional, List, TypeVar
 from datetime import datetime, date
 from decimal import Decimal
 
+T = TypeVar('T')
+
+# ============ ENVOLTURAS ============
+# Forma común de las respuestas de lectura; se declaran en responses= de cada
+# ruta (p. ej. Page[Film]) y documentan el contrato en OpenAPI, sin validar.
+class Page(BaseModel, Generic[T]):
+    success: bool = True
+    count: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+    data: List[T]
+
+class Item(BaseModel, Generic[T]):
+    success: bool = True
+    data: T
+
 # ============ FILMS ============
 class Film(BaseModel):
     film_id: int
@@ -16,34 +32,85 @@ class Film(BaseModel):
     class Config:
         from_attributes = True
 
+class FilmDetail(Film):
+    category: Optional[str] = None
+    actors: List[str] = []
+
+class CategoryFilm(Film):
+    category: Optional[str] = None
+
+class FilmSearchResult(Film):
+    score: float
+
+class FilmCategoryResponse(BaseModel):
+    success: bool = True
+    category: str
+    count: int
+    data: List[CategoryFilm]
+
+class FilmSearchResponse(BaseModel):
+    success: bool = True
+    query: str
+    mode: str
+    count: int
+    data: List[FilmSearchResult]
+
 # ============ CUSTOMERS ============
 class Customer(BaseModel):
     customer_id: int
     first_name: str
     last_name: str
-    email: str
+    email: Optional[str] = None
     active: int
+    store_id: int
     
     class Config:
         from_attributes = True
 
+class Address(BaseModel):
+    address: Optional[str] = None
+    phone: Optional[str] = None
+    city: Optional[str] = None
+    country: Optional[str] = None
+
+class CustomerDetail(Address, Customer):
+    pass
+
+class CustomerRef(BaseModel):
+    customer_id: int
+    name: str
+    email: Optional[str] = None
+
 # ============ STAFF ============
 class Staff(BaseModel):
     staff_id: int
     first_name: str
     last_name: str
-    email: str
+    email: Optional[str] = None
     active: bool
+    store_id: int
     
     class Config:
         from_attributes = True
 
+class StaffDetail(Address, Staff):
+    pass
+
 # ============ RENTALS ============
 class RentalCreate(BaseModel):
     customer_id: int = Field(..., gt=0, description="ID del cliente")
     film_id: int = Field(..., gt=0, description="ID de la película")
     staff_id: int = Field(..., gt=0, description="ID del empleado")
 
+# Máximo de elementos por petición en los endpoints por lote
+MAX_BATCH_SIZE = 100
+
+class RentalBatchCreate(BaseModel):
+    items: List[RentalCreate] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class RentalBatchReturn(BaseModel):
+    rental_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
 class RentalResponse(BaseModel):
     rental_id: int
     rental_date: datetime
@@ -68,6 +135,8 @@ class UnreturnedDVD(BaseModel):
     rental_date: datetime
     expected_return_date: datetime
     days_overdue: int
+    customer_email: Optional[str] = None
+    rental_rate: Decimal
 
 class MostRentedFilm(BaseModel):
     film_id: int
@@ -76,6 +145,7 @@ class MostRentedFilm(BaseModel):
     total_rentals: int
     rental_rate: Decimal
     total_revenue: Decimal
+    period: Optional[date] = None
 
 class StaffRevenue(BaseModel):
     staff_id: int
@@ -85,15 +155,91 @@ class StaffRevenue(BaseModel):
     total_payments: int
     total_revenue: Decimal
     average_payment: Decimal
+    period: Optional[date] = None
 
 class CustomerRental(BaseModel):
     rental_id: int
     film_title: str
     rental_date: datetime
     return_date: Optional[datetime] = None
+    rental_rate: Optional[Decimal] = None
     payment_amount: Optional[Decimal] = None
     days_rented: Optional[int] = None
 
+class StaffRecentRental(BaseModel):
+    rental_id: int
+    film_title: str
+    rental_date: datetime
+    return_date: Optional[datetime] = None
+    payment_amount: Optional[Decimal] = None
+
+class CustomerRentalsResponse(BaseModel):
+    success: bool = True
+    customer: CustomerRef
+    total_rentals: int
+    count: int
+    next_cursor: Optional[str] = None
+    rentals: List[CustomerRental]
+
+class UnreturnedReport(BaseModel):
+    success: bool = True
+    count: int
+    open_count: int
+    overdue_count: int
+    next_cursor: Optional[str] = None
+    generated_at: datetime
+    data: List[UnreturnedDVD]
+
+class UnreturnedSummary(BaseModel):
+    success: bool = True
+    count: int
+    open_count: int
+    overdue_count: int
+    oldest_due_date: Optional[datetime] = None
+    generated_at: datetime
+
+class MostRentedReport(BaseModel):
+    success: bool = True
+    count: int
+    source: str
+    from_date: Optional[date] = Field(default=None, alias="from")
+    to_date: Optional[date] = Field(default=None, alias="to")
+    bucket: Optional[str] = None
+    generated_at: datetime
+    data: List[MostRentedFilm]
+
+class StaffRevenueReport(BaseModel):
+    success: bool = True
+    count: int
+    source: str
+    from_date: Optional[date] = Field(default=None, alias="from")
+    to_date: Optional[date] = Field(default=None, alias="to")
+    bucket: Optional[str] = None
+    total_revenue_all_staff: float
+    generated_at: datetime
+    data: List[StaffRevenue]
+
+class StaffRevenueDetailReport(BaseModel):
+    success: bool = True
+    staff: StaffRevenue
+    source: str
+    recent_rentals: List[StaffRecentRental]
+    generated_at: datetime
+
+class CustomerRentalSummary(BaseModel):
+    success: bool = True
+    customer: CustomerRef
+    total_rentals: int
+    active_rentals: int
+    total_spent: float
+    last_rental_date: Optional[datetime] = None
+    generated_at: datetime
+
+class CustomerRentalReport(CustomerRentalSummary):
+    count: int
+    next_cursor: Optional[str] = None
+    rentals: List[CustomerRental]
+
 # ============ GENERIC RESPONSES ============
 class SuccessResponse(BaseModel):
     success: bool = True
@@ -0,0 +1,130 @@
+import re
+
+# Búsqueda de películas (ver postgres/init-db/upgrade-004-film-search.sql).
+# Todas las consultas regresan las mismas columnas más `score` (mayor es mejor).
+SEARCH_MODES = ('auto', 'prefix', 'contains', 'fuzzy', 'fulltext')
+
+FILM_COLUMNS = """
+    f.film_id, f.title, f.description, f.release_year,
+    f.rental_rate, f.length, f.rating
+"""
+
+# Peso que se suma al score cuando la búsqueda coincide con un actor
+ACTOR_MATCH_WEIGHT = 1.0
+
+SEARCH_SQL = {
+    # Títulos que empiezan con el texto (índice lower(title) text_pattern_ops)
+    'prefix': f"""
+        SELECT {FILM_COLUMNS}, 1.0::real AS score
+        FROM film f
+        WHERE lower(f.title) LIKE %(prefix_pattern)s
+        ORDER BY lower(f.title), f.film_id
+        LIMIT %(limit)s
+    """,
+    # Títulos que contienen el texto (índice de trigramas)
+    'contains': f"""
+        SELECT {FILM_COLUMNS}, similarity(f.title, %(q)s) AS score
+        FROM film f
+        WHERE f.title ILIKE %(contains_pattern)s
+        ORDER BY score DESC, f.title
+        LIMIT %(limit)s
+    """,
+    # Títulos parecidos, tolera errores de escritura (pg_trgm)
+    'fuzzy': f"""
+        SELECT {FILM_COLUMNS}, similarity(f.title, %(q)s) AS score
+        FROM film f
+        WHERE f.title %% %(q)s
+        ORDER BY score DESC, f.title
+        LIMIT %(limit)s
+    """,
+    # Texto completo sobre título y descripción (columna fulltext) y nombres
+    # de actores, con sintaxis de buscador web ("frase", -excluir, or)
+    'fulltext': f"""
+        WITH query AS (
+            SELECT websearch_to_tsquery('english', %(q)s) AS english,
+                   websearch_to_tsquery('simple', %(q)s) AS simple
+        ),
+        actor_films AS (
+            SELECT DISTINCT fa.film_id
+            FROM actor a
+            JOIN film_actor fa ON fa.actor_id = a.actor_id, query
+            WHERE to_tsvector('simple', a.first_name || ' ' || a.last_name) @@ query.simple
+        ),
+        scored AS (
+            SELECT film_id, title, SUM(score) AS score
+            FROM (
+                SELECT f.film_id, f.title, ts_rank(f.fulltext, query.english) AS score
+                FROM film f, query
+                WHERE f.fulltext @@ query.english
+                UNION ALL
+                SELECT f.film_id, f.title, %(actor_weight)s
+                FROM actor_films af JOIN film f ON f.film_id = af.film_id
+            ) matches
+            GROUP BY film_id, title
+            ORDER BY score DESC, title
+            LIMIT %(limit)s
+        )
+        SELECT {FILM_COLUMNS}, s.score
+        FROM scored s
+        JOIN film f ON f.film_id = s.film_id
+        ORDER BY s.score DESC, s.title
+    """,
+    # Modo por defecto: texto completo por prefijo de cada palabra (sirve
+    # mientras se escribe), títulos parecidos por trigramas y actores
+    'auto': f"""
+        WITH query AS (
+            SELECT to_tsquery('english', %(prefix_tsquery)s) AS english,
+                   to_tsquery('simple', %(prefix_tsquery)s) AS simple
+        ),
+        actor_films AS (
+            SELECT DISTINCT fa.film_id
+            FROM actor a
+            JOIN film_actor fa ON fa.actor_id = a.actor_id, query
+            WHERE to_tsvector('simple', a.first_name || ' ' || a.last_name) @@ query.simple
+        ),
+        scored AS (
+            SELECT film_id, title, SUM(score) AS score
+            FROM (
+                SELECT f.film_id, f.title, ts_rank(f.fulltext, query.english) AS score
+                FROM film f, query
+                WHERE f.fulltext @@ query.english
+                UNION ALL
+                SELECT f.film_id, f.title, similarity(f.title, %(q)s)
+                FROM film f
+                WHERE f.title %% %(q)s
+                UNION ALL
+                SELECT f.film_id, f.title, %(actor_weight)s
+                FROM actor_films af JOIN film f ON f.film_id = af.film_id
+            ) matches
+            GROUP BY film_id, title
+            ORDER BY score DESC, title
+            LIMIT %(limit)s
+        )
+        SELECT {FILM_COLUMNS}, s.score
+        FROM scored s
+        JOIN film f ON f.film_id = s.film_id
+        ORDER BY s.score DESC, s.title
+    """,
+}
+
+
+def escape_like(text):
+    """Escapar los comodines de LIKE para buscar el texto literal"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def prefix_tsquery(text):
+    """'academy dino' -> 'academy:* & dino:*' (solo letras y números de la entrada)"""
+    return ' & '.join(f'{term}:*' for term in re.findall(r'\w+', text))
+
+
+def search_params(q, limit):
+    """Parámetros de SEARCH_SQL para el texto buscado"""
+    return {
+        'q': q,
+        'limit': limit,
+        'prefix_pattern': escape_like(q.lower()) + '%',
+        'contains_pattern': '%' + escape_like(q) + '%',
+        'prefix_tsquery': prefix_tsquery(q),
+        'actor_weight': ACTOR_MATCH_WEIGHT,
+    }
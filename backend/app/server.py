@@ -0,0 +1,156 @@
+import math
+import os
+import shutil
+import signal
+import sys
+import time
+
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Configuración del servidor
+SERVER_CONFIG = {
+    'host': os.getenv('HOST', '0.0.0.0'),
+    'port': int(os.getenv('PORT', 8000)),
+    # Procesos worker; 0 = uno por CPU de la cuota del contenedor
+    'workers': int(os.getenv('WEB_CONCURRENCY', 0)),
+    # Segundos para terminar los requests en curso después de SIGTERM
+    'graceful_timeout': float(os.getenv('GRACEFUL_TIMEOUT', 20)),
+    # Segundos que se mantiene abierta una conexión keep-alive ociosa
+    'keep_alive': int(os.getenv('KEEP_ALIVE_TIMEOUT', 5)),
+    'log_level': os.getenv('LOG_LEVEL', 'info'),
+}
+
+# Un worker que termina antes de esto se reemplaza con una pausa (evita un
+# ciclo de reinicios si falla al arrancar)
+MIN_WORKER_LIFETIME = 1.0
+
+
+def cpu_quota():
+    """CPUs de la cuota del cgroup (v2 o v1), o None si no hay límite"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        return None if quota == 'max' else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        return quota / period if quota > 0 else None
+    except (OSError, ValueError):
+        return None
+
+
+def default_workers():
+    """Un worker por CPU disponible, redondeando la cuota hacia arriba (500m -> 1)"""
+    cpus = len(os.sched_getaffinity(0))
+    quota = cpu_quota()
+    if quota:
+        cpus = min(cpus, math.ceil(quota))
+    return max(cpus, 1)
+
+
+def log(message):
+    print(f"[server {os.getpid()}] {message}", file=sys.stderr, flush=True)
+
+
+class Supervisor:
+    """
+    Proceso principal (pre-fork): abre el socket una vez y crea los workers
+    con fork. Cada worker es un servidor uvicorn con su propio event loop y
+    su propio pool de conexiones, que se abre en el lifespan después del
+    fork. Los workers que terminan se reemplazan; SIGTERM o SIGINT se
+    reenvía a todos: cada uno deja de aceptar conexiones, termina los
+    requests en curso (hasta GRACEFUL_TIMEOUT segundos) y cierra su pool.
+    """
+
+    def __init__(self, config, workers):
+        self.config = config
+        self.workers = workers
+        self.sockets = [config.bind_socket()]
+        self.children = {}
+        self.stopping = False
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            # Worker: uvicorn instala sus propios manejadores de SIGTERM/SIGINT
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, signal.SIG_DFL)
+            try:
+                uvicorn.Server(self.config).run(sockets=self.sockets)
+            finally:
+                os._exit(0)
+        self.children[pid] = time.monotonic()
+
+    def stop(self, sig, frame):
+        if not self.stopping:
+            log(f"{signal.Signals(sig).name}: deteniendo {len(self.children)} workers")
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self.stop)
+        log(f"{self.workers} workers en http://{self.config.host}:{self.config.port}")
+        for _ in range(self.workers):
+            self.spawn()
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if self.stopping or started is None:
+                continue
+            log(f"worker {pid} terminó (código {os.waitstatus_to_exitcode(status)}), reemplazando")
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn()
+
+        for sock in self.sockets:
+            sock.close()
+        log("detenido")
+
+
+def main():
+    """Punto de entrada de producción: python -m app.server"""
+    workers = SERVER_CONFIG['workers'] or default_workers()
+    config = uvicorn.Config(
+        "app.main:app",
+        host=SERVER_CONFIG['host'],
+        port=SERVER_CONFIG['port'],
+        timeout_graceful_shutdown=SERVER_CONFIG['graceful_timeout'],
+        timeout_keep_alive=SERVER_CONFIG['keep_alive'],
+        log_level=SERVER_CONFIG['log_level'],
+    )
+    if workers == 1:
+        uvicorn.Server(config).run()
+        return
+    # Importar la aplicación antes del fork: los workers la comparten (copy-on-write)
+    config.load()
+    from app.metrics import METRICS_CONFIG, prepare_multiprocess_dir
+    from app.totals import prepare_multiprocess
+    # Los totales se invalidan solo en el worker que escribe
+    prepare_multiprocess()
+    temporary = not METRICS_CONFIG['multiprocess_dir']
+    # GET /metrics suma las métricas que cada worker vuelca en este directorio
+    metrics_dir = prepare_multiprocess_dir()
+    log(f"métricas de los workers en {metrics_dir}")
+    Supervisor(config, workers).run()
+    if temporary:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import asyncio
+import functools
+import inspect
+import os
+
+from fastapi import Request, Response
+
+from app import database
+from app.metrics import observe_coalesced
+from app.replicas import read_requirement
+from app.responses import FastJSONResponse, dumps
+from app.streaming import stream_format
+
+# Configuración del single-flight (requests idénticos concurrentes)
+SINGLE_FLIGHT_CONFIG = {
+    'enabled': os.getenv('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true',
+}
+
+
+class Flight:
+    """Ejecución en curso y el estado de la base con el que empezó"""
+
+    __slots__ = ('task', 'generation', 'min_lsn')
+
+    def __init__(self, task, generation, min_lsn):
+        self.task = task
+        self.generation = generation
+        self.min_lsn = min_lsn
+
+
+class SingleFlight:
+    """
+    Ejecuciones en curso por llave: un llamado con la misma llave que una
+    ejecución en curso espera su resultado (o su excepción) en lugar de
+    volver a consultar la base.
+
+    Solo se comparte una ejecución que empezó después de la última escritura
+    del proceso (y, con réplicas, que lee al menos hasta el LSN que pide el
+    cliente): quien acaba de escribir no recibe un resultado calculado antes.
+    La ejecución corre en su propia tarea, así que si el request que la
+    inició se cancela los demás reciben el resultado igual.
+    """
+
+    def __init__(self):
+        self._flights = {}
+
+    def __len__(self):
+        return len(self._flights)
+
+    async def do(self, key, func, generation=None):
+        """
+        Ejecutar func() o unirse a la ejecución en curso con la misma llave.
+        generation: estado adicional que debe coincidir para compartir (p. ej.
+        las invalidaciones del cache de respuestas).
+        Regresa (resultado, True si se compartió).
+        """
+        generation = (database.write_generation, generation)
+        flight = self._flights.get(key)
+        if flight is not None and flight.generation == generation and read_requirement() <= flight.min_lsn:
+            return await asyncio.shield(flight.task), True
+
+        flight = Flight(asyncio.ensure_future(func()), generation, read_requirement())
+        self._flights[key] = flight
+        flight.task.add_done_callback(functools.partial(self._done, key, flight))
+        return await asyncio.shield(flight.task), False
+
+    def _done(self, key, flight, task):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Si todos los que esperaban se cancelaron nadie lee la excepción
+        if not task.cancelled():
+            task.exception()
+
+
+flights = SingleFlight()
+
+
+def coalesced(func):
+    """
+    Compartir la ejecución de un endpoint GET entre requests idénticos
+    concurrentes: misma ruta y mismos parámetros ya validados (con los
+    defaults, así que /most-rented y /most-rented?limit=10 son la misma
+    llave). Las exportaciones en streaming no se comparten.
+    Solo se comparten el cuerpo serializado y el status: cada request recibe
+    su propio FastJSONResponse (headers, cookies y background no se cruzan).
+    Los requests que se unen a una ejecución en curso se cuentan en
+    http_requests_coalesced_total (GET /metrics).
+    """
+    signature = inspect.signature(func)
+    # Si el endpoint ya recibe el Request se usa ese; FastAPI solo llena uno
+    request_param = next(
+        (name for name, param in signature.parameters.items() if param.annotation is Request),
+        None
+    )
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        request = kwargs[request_param] if request_param else kwargs.pop('_flight_request')
+        if not SINGLE_FLIGHT_CONFIG['enabled'] or stream_format(request):
+            return await func(*args, **kwargs)
+
+        params = sorted((name, value) for name, value in kwargs.items() if name != request_param)
+        key = f'{func.__module__}.{func.__qualname__}:{params!r}'
+        (body, status_code), shared = await flights.do(key, lambda: rendered(*args, **kwargs))
+        if shared:
+            observe_coalesced(request.method, request.scope['route'].path)
+        return FastJSONResponse(body, status_code=status_code)
+
+    async def rendered(*args, **kwargs):
+        result = await func(*args, **kwargs)
+        if isinstance(result, Response):
+            return result.body, result.status_code
+        return dumps(result), 200
+
+    # FastAPI lee la firma: se agrega el Request que usa el single-flight
+    if request_param is None:
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter('_flight_request', inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+        ])
+    return wrapper
@@ -0,0 +1,178 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+import psycopg
+
+from app.metrics import current_request
+
+# Configuración del log de consultas lentas
+SLOW_QUERY_CONFIG = {
+    # Consultas que tardan al menos esto (ms) se registran; 0 registra todas, -1 desactiva
+    'threshold_ms': float(os.getenv('SLOW_QUERY_MS', 200)),
+    # Archivo JSON lines (una consulta por línea); vacío = solo en memoria
+    'log_file': os.getenv('SLOW_QUERY_LOG', 'slow-queries.jsonl'),
+    # Entradas que guarda GET /debug/slow-queries
+    'buffer_size': int(os.getenv('SLOW_QUERY_BUFFER', 200)),
+    # Capturar el plan en una conexión aparte (ANALYZE solo para SELECT)
+    'explain': os.getenv('SLOW_QUERY_EXPLAIN', 'false').lower() == 'true',
+    # Segundos mínimos entre dos EXPLAIN de la misma consulta
+    'explain_interval': float(os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', 300)),
+    # statement_timeout (ms) del EXPLAIN
+    'explain_timeout_ms': int(os.getenv('SLOW_QUERY_EXPLAIN_TIMEOUT_MS', 5000)),
+}
+
+# Sentencias a las que se les puede pedir plan
+EXPLAINABLE = ('select', 'with', 'insert', 'update', 'delete')
+# Las únicas que se ejecutan con ANALYZE; las demás (y los WITH, que pueden
+# traer INSERT/UPDATE) reciben el plan estimado sin ejecutarse
+ANALYZABLE = ('select',)
+
+
+def params_shape(params):
+    """
+    Forma de los parámetros sin sus valores (pueden traer datos personales):
+    {'customer_id': 'int', 'film_ids': 'list[50]'} o ['int', 'str'].
+    """
+    def shape(value):
+        if isinstance(value, (list, tuple)):
+            return f'list[{len(value)}]'
+        return type(value).__name__
+
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: shape(value) for key, value in params.items()}
+    return [shape(value) for value in params]
+
+
+def query_text(query, cursor):
+    """Texto de la consulta (acepta str, bytes o psycopg.sql.Composable)"""
+    if isinstance(query, bytes):
+        return query.decode()
+    if not isinstance(query, str):
+        return query.as_string(cursor) if hasattr(query, 'as_string') else str(query)
+    return query
+
+
+class SlowQueryLog:
+    """Consultas lentas recientes en memoria y en el archivo JSON lines"""
+
+    def __init__(self):
+        self.entries = deque(maxlen=SLOW_QUERY_CONFIG['buffer_size'])
+        self.explained = {}
+        self.explaining = set()
+        self.tasks = set()
+
+    def enabled(self, elapsed_ms):
+        threshold = SLOW_QUERY_CONFIG['threshold_ms']
+        return threshold >= 0 and elapsed_ms >= threshold
+
+    def record(self, cursor, query, params, elapsed_ms, error=None):
+        """Hook de TimedCursor (app/pool.py) para consultas sobre el umbral"""
+        raw = query_text(query, cursor)
+        # En una línea para el log; el EXPLAIN usa el texto original (puede traer comentarios --)
+        text = ' '.join(raw.split())
+        request = current_request()
+        entry = {
+            'ts': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': round(elapsed_ms, 2),
+            'method': request.scope['method'] if request else None,
+            'route': request.route if request else None,
+            'query': text,
+            'params': params_shape(params),
+            'rows': cursor.rowcount,
+        }
+        if error is not None:
+            entry['error'] = f'{type(error).__name__}: {error}'
+        self.entries.append(entry)
+
+        if self.should_explain(text, error):
+            self.explaining.add(text)
+            self.spawn(self.explain_and_write(entry, raw, params))
+        elif SLOW_QUERY_CONFIG['log_file']:
+            # El archivo se escribe en un hilo: record() corre en el event loop
+            self.spawn(asyncio.to_thread(self.write, entry))
+
+    def spawn(self, coro):
+        task = asyncio.get_running_loop().create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def should_explain(self, text, error):
+        if not SLOW_QUERY_CONFIG['explain'] or error is not None or text in self.explaining:
+            return False
+        if not text.lower().startswith(EXPLAINABLE):
+            return False
+        last = self.explained.get(text)
+        return last is None or time.monotonic() - last >= SLOW_QUERY_CONFIG['explain_interval']
+
+    async def explain_and_write(self, entry, raw, params):
+        """
+        EXPLAIN fuera del request, en una conexión propia (no ocupa el pool)
+        y dentro de una transacción que siempre se revierte. Solo los SELECT
+        se ejecutan con (ANALYZE, BUFFERS); INSERT/UPDATE/DELETE y WITH
+        reciben el plan estimado, así no se repiten escrituras ni se toman
+        sus bloqueos de filas.
+        """
+        # Importación diferida: app.database -> app.pool -> app.slowlog
+        from app.database import DB_CONNINFO
+
+        text = entry['query']
+        analyze = text.lower().startswith(ANALYZABLE)
+        options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+        try:
+            async with await psycopg.AsyncConnection.connect(DB_CONNINFO) as conn:
+                async with conn.transaction(force_rollback=True):
+                    await conn.execute(
+                        f"SET LOCAL statement_timeout = {SLOW_QUERY_CONFIG['explain_timeout_ms']}"
+                    )
+                    cursor = await conn.execute(f"EXPLAIN ({options}) " + raw, params)
+                    entry['plan'] = (await cursor.fetchone())[0]
+                    entry['plan_analyzed'] = analyze
+        except Exception as e:
+            entry['plan_error'] = f'{type(e).__name__}: {e}'
+        finally:
+            self.explained[text] = time.monotonic()
+            self.explaining.discard(text)
+        await asyncio.to_thread(self.write, entry)
+
+    def write(self, entry):
+        path = SLOW_QUERY_CONFIG['log_file']
+        if not path:
+            return
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
+        except OSError as e:
+            print(f"⚠️  No se pudo escribir el log de consultas lentas: {e}")
+
+    def recent(self, limit):
+        """Las `limit` entradas más recientes, la más nueva primero"""
+        return list(reversed(self.entries))[:limit]
+
+    def summary(self):
+        """Entradas en memoria agrupadas por consulta, las de más tiempo total primero"""
+        groups = {}
+        for entry in self.entries:
+            group = groups.setdefault(entry['query'], {
+                'query': entry['query'], 'routes': set(), 'count': 0,
+                'total_ms': 0.0, 'max_ms': 0.0,
+            })
+            if entry['route']:
+                group['routes'].add(entry['route'])
+            group['count'] += 1
+            group['total_ms'] += entry['duration_ms']
+            group['max_ms'] = max(group['max_ms'], entry['duration_ms'])
+        result = sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
+        for group in result:
+            group['routes'] = sorted(group['routes'])
+            group['avg_ms'] = round(group['total_ms'] / group['count'], 2)
+            group['total_ms'] = round(group['total_ms'], 2)
+        return result
+
+
+slow_queries = SlowQueryLog()
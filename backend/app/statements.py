@@ -0,0 +1,54 @@
+import os
+
+# Configuración de las sentencias preparadas
+STATEMENT_CONFIG = {
+    # false: nada se prepara (p. ej. detrás de pgbouncer en modo transacción)
+    'enabled': os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() == 'true',
+}
+
+
+class Statement(str):
+    """
+    Consulta registrada: el texto SQL con un nombre para identificarla.
+    Es un str, así que se pasa tal cual a cursor.execute(); TimedCursor
+    (app/pool.py) la ejecuta como sentencia preparada.
+    """
+
+    def __new__(cls, name, sql):
+        statement = super().__new__(cls, sql)
+        statement.name = name
+        return statement
+
+
+# Sentencias registradas por nombre
+registry = {}
+
+
+def statement(name, sql):
+    """
+    Registrar una consulta caliente. Se declara una vez, a nivel de módulo:
+
+        RENTAL_LOOKUP = statement('rentals.lookup', "SELECT ... WHERE rental_id = %s")
+        await cursor.execute(RENTAL_LOOKUP, (rental_id,))
+
+    psycopg la prepara en cada conexión la primera vez que esa conexión la
+    ejecuta (Parse una vez, luego solo Bind/Execute) y la vuelve a preparar
+    en las conexiones nuevas del pool, p. ej. después de un reinicio de
+    PostgreSQL. Las consultas que no están registradas siguen la regla por
+    defecto de psycopg (se preparan a partir de prepare_threshold
+    ejecuciones en la misma conexión).
+    """
+    if name in registry:
+        raise ValueError(f"Sentencia registrada dos veces: {name}")
+    registry[name] = Statement(name, sql)
+    return registry[name]
+
+
+def prepare_mode(query):
+    """
+    Argumento prepare de psycopg para la consulta: True si está registrada,
+    None (decide psycopg) si no, y False para todas si están desactivadas.
+    """
+    if not STATEMENT_CONFIG['enabled']:
+        return False
+    return True if isinstance(query, Statement) else None
@@ -0,0 +1,112 @@
+import csv
+import io
+import os
+from datetime import date, datetime
+
+from fastapi.responses import StreamingResponse
+from psycopg.rows import dict_row, tuple_row
+
+from app.database import get_db_connection
+from app.responses import dumps
+
+# Configuración de exportación
+STREAM_CONFIG = {
+    # Filas que se piden al cursor del servidor por viaje (y por bloque de la respuesta)
+    'fetch_size': int(os.getenv('STREAM_FETCH_SIZE', 1000)),
+}
+
+# El primer bloque es más chico para que el cliente reciba datos cuanto antes
+FIRST_FETCH_SIZE = 100
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+CSV_MEDIA_TYPE = 'text/csv'
+
+# Validación del parámetro ?format= de los endpoints exportables
+FORMAT_PATTERN = '^(json|ndjson|csv)$'
+
+
+def stream_format(request, fmt=None):
+    """
+    Formato de exportación pedido: 'ndjson', 'csv' o None (respuesta JSON normal).
+    ?format= tiene prioridad sobre el header Accept.
+    """
+    fmt = fmt or request.query_params.get('format')
+    if fmt in ('ndjson', 'csv'):
+        return fmt
+    if fmt == 'json':
+        return None
+    accept = request.headers.get('accept', '')
+    if NDJSON_MEDIA_TYPE in accept:
+        return 'ndjson'
+    if 'text/csv' in accept:
+        return 'csv'
+    return None
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_ndjson(rows):
+    return b''.join(dumps(row) + b'\n' for row in rows)
+
+
+def encode_csv(rows, header=None):
+    """rows son tuplas (cursor con tuple_row) en el orden de las columnas"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(header)
+    writer.writerows([_csv_value(value) for value in row] for row in rows)
+    return buffer.getvalue()
+
+
+async def _export_rows(query, params, fmt):
+    """
+    Generador de bloques de texto: ejecuta la consulta con un cursor con
+    nombre (DECLARE ... CURSOR en el servidor) y codifica cada bloque de
+    fetch_size filas en cuanto llega. La conexión se ocupa mientras dura
+    la exportación. CSV no necesita los nombres por fila: se leen tuplas y
+    el encabezado sale una vez de cursor.description.
+    """
+    fetch_size = min(FIRST_FETCH_SIZE, STREAM_CONFIG['fetch_size'])
+    row_factory = tuple_row if fmt == 'csv' else dict_row
+    async with get_db_connection() as conn:
+        async with conn.cursor(name='export', row_factory=row_factory) as cursor:
+            await cursor.execute(query, params)
+            if fmt == 'csv':
+                yield encode_csv([], [column.name for column in cursor.description])
+            else:
+                # Primer bloque vacío: la consulta ya se ejecutó sin errores
+                yield b''
+            while rows := await cursor.fetchmany(fetch_size):
+                yield encode_ndjson(rows) if fmt == 'ndjson' else encode_csv(rows)
+                fetch_size = STREAM_CONFIG['fetch_size']
+
+
+async def stream_query(query, params, fmt, filename):
+    """
+    Respuesta StreamingResponse con las filas de la consulta en NDJSON o CSV.
+
+    El primer bloque se produce antes de responder, así que los errores al
+    obtener conexión o ejecutar la consulta (p. ej. PoolTimeout -> 503)
+    se manejan como en cualquier endpoint.
+    """
+    chunks = _export_rows(query, params, fmt)
+    first = await chunks.__anext__()
+
+    async def body():
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    if fmt == 'csv':
+        return StreamingResponse(
+            body(), media_type=CSV_MEDIA_TYPE,
+            headers={'Content-Disposition': f'attachment; filename="{filename}.csv"'}
+        )
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,84 @@
+import os
+import time
+from psycopg import sql
+
+from app.replicas import read_may_be_stale
+
+# Configuración de totales de los listados
+TOTALS_CONFIG = {
+    # exact: COUNT(*) cacheado | estimate: pg_class.reltuples (actualizado por ANALYZE/autovacuum)
+    'mode': os.getenv('TOTALS_MODE', 'exact'),
+    # Segundos que un total permanece en cache si no hay escrituras que lo invaliden
+    'ttl': float(os.getenv('TOTALS_CACHE_TTL', 300)),
+    # Vigencia máxima con varios workers (app/server.py): la invalidación es
+    # por worker, los demás ven el total nuevo con este atraso
+    'multiprocess_ttl': float(os.getenv('TOTALS_CACHE_MULTIPROC_TTL', 5)),
+}
+
+
+class TotalsCache:
+    """
+    Cache en proceso del número de filas por tabla.
+    Las escrituras de la API lo invalidan en el worker que las atiende; las
+    de otros workers, réplicas o clientes se reflejan al vencer el TTL.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._entries = {}
+
+    def get(self, table):
+        entry = self._entries.get(table)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        return None
+
+    def set(self, table, value):
+        self._entries[table] = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self, *tables):
+        for table in tables:
+            self._entries.pop(table, None)
+
+
+totals_cache = TotalsCache(TOTALS_CONFIG['ttl'])
+
+
+async def count_rows(cursor, table):
+    """Contar filas de una tabla según TOTALS_MODE"""
+    if TOTALS_CONFIG['mode'] == 'estimate':
+        await cursor.execute(
+            "SELECT reltuples::bigint AS count FROM pg_class WHERE oid = %s::regclass",
+            (f"public.{table}",)
+        )
+        row = await cursor.fetchone()
+        # reltuples es -1 si la tabla nunca se ha analizado
+        if row and row['count'] >= 0:
+            return row['count']
+
+    await cursor.execute(
+        sql.SQL("SELECT COUNT(*) AS count FROM {}").format(sql.Identifier(table))
+    )
+    return (await cursor.fetchone())['count']
+
+
+async def get_total(cursor, table):
+    """Total de filas de la tabla, desde cache si está vigente"""
+    total = totals_cache.get(table)
+    if total is None:
+        total = await count_rows(cursor, table)
+        # Un conteo de una réplica atrasada no se guarda: la escritura que
+        # invalidó el total pudo no llegarle
+        if not read_may_be_stale():
+            totals_cache.set(table, total)
+    return total
+
+
+def prepare_multiprocess():
+    """Antes del fork (app/server.py): acortar la vigencia de los totales"""
+    totals_cache.ttl = min(totals_cache.ttl, TOTALS_CONFIG['multiprocess_ttl'])
+
+
+def invalidate_totals(*tables):
+    """Descartar los totales cacheados de las tablas modificadas"""
+    totals_cache.invalidate(*tables)
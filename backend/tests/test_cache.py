@@ -0,0 +1,147 @@
+import asyncio
+import inspect
+from typing import Optional
+
+from fastapi import Query
+from starlette.requests import Request
+
+from app import cache as cache_module
+from app.cache import CacheEntry, MemoryCache, cache_key, cached, query_names
+from app.responses import FastJSONResponse
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_request(path, query_string):
+    return Request({
+        'type': 'http', 'method': 'GET', 'path': path,
+        'query_string': query_string.encode(), 'headers': [],
+    })
+
+
+def entry(body=b'{}'):
+    return CacheEntry(body, '"etag"')
+
+
+def test_eviction_removes_key_from_tags():
+    cache = MemoryCache(max_entries=2)
+
+    async def scenario():
+        for n in range(10):
+            await cache.set(f'/customer/{n}', entry(), 300, ['rentals', f'customer-rentals:{n}'])
+        return cache
+
+    run(scenario())
+    assert list(cache._entries) == ['/customer/8', '/customer/9']
+    assert cache._tags == {
+        'rentals': {'/customer/8', '/customer/9'},
+        'customer-rentals:8': {'/customer/8'},
+        'customer-rentals:9': {'/customer/9'},
+    }
+
+
+def test_expiry_removes_key_from_tags():
+    cache = MemoryCache(max_entries=10)
+
+    async def scenario():
+        await cache.set('/films/1', entry(), -1, ['films', 'film:1'])
+        return await cache.get('/films/1')
+
+    assert run(scenario()) is None
+    assert cache._entries == {} and cache._tags == {}
+
+
+def test_replacing_entry_drops_old_tags():
+    cache = MemoryCache(max_entries=10)
+
+    async def scenario():
+        await cache.set('/films/1', entry(), 300, ['film:1'])
+        await cache.set('/films/1', entry(b'[]'), 300, ['films'])
+        await cache.invalidate_tags('film:1')
+        return await cache.get('/films/1')
+
+    assert run(scenario()).body == b'[]'
+    assert cache._tags == {'films': {'/films/1'}}
+
+
+def test_invalidate_tags_drops_entries_and_index():
+    cache = MemoryCache(max_entries=10)
+
+    async def scenario():
+        await cache.set('/customer/1', entry(), 300, ['rentals', 'customer-rentals:1'])
+        await cache.set('/customer/2', entry(), 300, ['rentals', 'customer-rentals:2'])
+        await cache.invalidate_tags('customer-rentals:1')
+        return await cache.get('/customer/1'), await cache.get('/customer/2')
+
+    missing, kept = run(scenario())
+    assert missing is None and kept is not None
+    assert cache._tags == {'rentals': {'/customer/2'}, 'customer-rentals:2': {'/customer/2'}}
+
+
+def test_cache_key_ignores_unknown_query_params():
+    async def endpoint(
+        customer_id: int,
+        limit: int = Query(default=100),
+        page_cursor: Optional[str] = Query(default=None, alias="cursor")
+    ):
+        pass
+
+    names = query_names(inspect.signature(endpoint))
+    plain = cache_key(make_request('/api/rentals/customer/1', 'limit=10&cursor=abc'), names)
+    junk = cache_key(make_request('/api/rentals/customer/1', 'cursor=abc&utm=1&limit=10&x=2'), names)
+    assert plain == junk == '/api/rentals/customer/1?cursor=abc&limit=10'
+
+
+def test_version_is_part_of_the_key():
+    # Otro worker escribió: la versión en la base cambia sin invalidar este cache
+    versions, calls = {1: 1}, []
+
+    async def customer_version(params):
+        return versions[params['customer_id']]
+
+    @cached(tags=("customer-rentals:{customer_id}",), version=customer_version)
+    async def endpoint(customer_id: int):
+        calls.append(customer_id)
+        return {'total_rentals': len(calls)}
+
+    async def scenario():
+        cache_module.configure_cache(MemoryCache(max_entries=10))
+        request = make_request('/api/rentals/customer/1', '')
+        bodies = [(await endpoint(customer_id=1, _cache_request=request)).body]
+        bodies.append((await endpoint(customer_id=1, _cache_request=request)).body)
+        versions[1] = 2
+        bodies.append((await endpoint(customer_id=1, _cache_request=request)).body)
+        return bodies
+
+    original = cache_module.response_cache
+    try:
+        bodies = run(scenario())
+    finally:
+        cache_module.configure_cache(original)
+    assert bodies == [b'{"total_rentals":1}', b'{"total_rentals":1}', b'{"total_rentals":2}']
+    assert calls == [1, 1]
+
+
+def test_non_200_responses_keep_status_and_are_not_cached():
+    calls = []
+
+    @cached()
+    async def endpoint(film_id: int):
+        calls.append(film_id)
+        return FastJSONResponse({'success': False}, status_code=404)
+
+    async def scenario():
+        cache_module.configure_cache(MemoryCache(max_entries=10))
+        request = make_request('/api/films/1', '')
+        return [await endpoint(film_id=1, _cache_request=request) for _ in range(2)]
+
+    original = cache_module.response_cache
+    try:
+        responses = run(scenario())
+    finally:
+        cache_module.configure_cache(original)
+    assert [response.status_code for response in responses] == [404, 404]
+    assert 'etag' not in responses[0].headers
+    assert calls == [1, 1]
@@ -0,0 +1,55 @@
+import json
+import os
+
+from app import metrics
+from app.metrics import METRICS_CONFIG, MetricsRegistry, RequestDB, collect, prepare_multiprocess_dir
+
+POOL = {
+    'min_size': 2, 'max_size': 20, 'size': 2, 'available': 2, 'in_use': 0, 'waiting': 0,
+    'requests_total': 10, 'requests_queued': 0, 'requests_errors': 0, 'connections_lost': 0,
+    'acquire_latency_ms': {'count': 10, 'sum_ms': 5.0, 'buckets': {'1': 10, '+Inf': 10}},
+}
+
+
+def worker_state(requests, in_flight):
+    registry = MetricsRegistry()
+    for _ in range(requests):
+        registry.observe_request('GET', '/api/films/{film_id}', 200, 0.002, RequestDB({}), 512)
+    registry.in_flight = in_flight
+    return {'registry': registry.state(), 'pool': POOL}
+
+
+def series(text, name):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+
+def test_collect_sums_all_workers(monkeypatch, tmp_path):
+    monkeypatch.setitem(METRICS_CONFIG, 'multiprocess_dir', str(tmp_path))
+    prepare_multiprocess_dir()
+    # Un worker vivo (este proceso) y uno que ya terminó
+    dead_pid = 2 ** 22 + 1
+    monkeypatch.setattr(metrics, '_alive', lambda pid: pid != dead_pid)
+    with open(tmp_path / f'{dead_pid}.json', 'w') as f:
+        json.dump(worker_state(3, in_flight=4), f)
+
+    text = collect(worker_state(2, in_flight=1))
+
+    assert series(text, 'http_requests_total{') == [
+        'http_requests_total{method="GET",route="/api/films/{film_id}",status="200"} 5'
+    ]
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/films/{film_id}"} 5' in text
+    # Gauges solo de workers vivos; contadores de todos
+    assert series(text, 'http_requests_in_flight ') == ['http_requests_in_flight 1']
+    assert series(text, 'db_pool_max_size ') == ['db_pool_max_size 20']
+    assert series(text, 'db_pool_requests_total ') == ['db_pool_requests_total 20']
+    assert series(text, 'db_pool_connections_lost') == ['db_pool_connections_lost_total 0']
+    assert '# TYPE db_pool_requests_queued_total counter' in text
+    assert series(text, 'db_pool_acquire_duration_seconds_count ') == ['db_pool_acquire_duration_seconds_count 20']
+    assert os.path.exists(tmp_path / f'{os.getpid()}.json')
+
+
+def test_prepare_removes_previous_dumps(monkeypatch, tmp_path):
+    (tmp_path / '123.json').write_text('{}')
+    monkeypatch.setitem(METRICS_CONFIG, 'multiprocess_dir', str(tmp_path))
+    assert prepare_multiprocess_dir() == str(tmp_path)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,52 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from app.pagination import decode_cursor, encode_cursor, paginate
+
+RENTAL_KEYS = ('rental_date', 'rental_id')
+FILM_KEYS = ('title', 'film_id')
+
+
+def token(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def test_round_trip_keeps_types():
+    row = {'rental_date': datetime(2005, 8, 23, 22, 50, 12), 'rental_id': 16049}
+    assert decode_cursor(encode_cursor(row, RENTAL_KEYS), RENTAL_KEYS) == [
+        datetime(2005, 8, 23, 22, 50, 12), 16049
+    ]
+    assert decode_cursor(token(["Ace Goldfinger", 2]), FILM_KEYS) == ["Ace Goldfinger", 2]
+
+
+def test_paginate_cursor_points_at_last_row():
+    rows = [{'title': f't{n}', 'film_id': n} for n in range(4)]
+    page, next_cursor = paginate(rows, 3, FILM_KEYS)
+    assert page == rows[:3]
+    assert decode_cursor(next_cursor, FILM_KEYS) == ['t2', 2]
+    assert paginate(rows, 4, FILM_KEYS) == (rows, None)
+
+
+@pytest.mark.parametrize('cursor, keys', [
+    ('%%%', FILM_KEYS),
+    (token({"title": "a"}), FILM_KEYS),
+    (token(["a"]), FILM_KEYS),
+    (token([{}, []]), FILM_KEYS),
+    (token([1, 2]), FILM_KEYS),
+    (token(["a", "2"]), FILM_KEYS),
+    (token(["a", 2.5]), FILM_KEYS),
+    (token(["a", True]), FILM_KEYS),
+    (token(["a\u0000", 2]), FILM_KEYS),
+    (token(["ayer", 1]), RENTAL_KEYS),
+    (token([20050823, 1]), RENTAL_KEYS),
+    (token([None, 1]), RENTAL_KEYS),
+])
+def test_invalid_cursor_is_400(cursor, keys):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, keys)
+    assert error.value.status_code == 400
+    assert error.value.detail == "Cursor inválido"
@@ -0,0 +1,53 @@
+import asyncio
+from types import SimpleNamespace
+
+from starlette.requests import Request
+
+from app.responses import FastJSONResponse
+from app.singleflight import coalesced
+
+
+def make_request():
+    return Request({
+        'type': 'http', 'method': 'GET', 'path': '/api/reports/most-rented',
+        'query_string': b'', 'headers': [],
+        'route': SimpleNamespace(path='/api/reports/most-rented'),
+    })
+
+
+def test_coalesced_callers_get_their_own_response():
+    calls = []
+
+    @coalesced
+    async def most_rented(limit: int = 10):
+        calls.append(limit)
+        await asyncio.sleep(0.01)
+        return FastJSONResponse({"success": True, "limit": limit}, status_code=200)
+
+    async def scenario():
+        return await asyncio.gather(*(
+            most_rented(limit=10, _flight_request=make_request()) for _ in range(3)
+        ))
+
+    responses = asyncio.run(scenario())
+    assert calls == [10]
+    assert len({id(response) for response in responses}) == 3
+    assert {response.body for response in responses} == {b'{"success":true,"limit":10}'}
+
+    first, second, _ = responses
+    first.set_cookie('db_lsn', '0/1')
+    first.headers['X-Test'] = '1'
+    assert 'set-cookie' not in second.headers and 'x-test' not in second.headers
+    assert second.headers['content-length'] == str(len(second.body))
+
+
+def test_coalesced_keeps_status_code():
+    @coalesced
+    async def report():
+        await asyncio.sleep(0.01)
+        return FastJSONResponse({"success": False}, status_code=202)
+
+    async def scenario():
+        return await asyncio.gather(*(report(_flight_request=make_request()) for _ in range(2)))
+
+    assert [response.status_code for response in asyncio.run(scenario())] == [202, 202]
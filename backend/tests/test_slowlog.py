@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+import psycopg
+import pytest
+
+from app import slowlog
+from app.slowlog import SLOW_QUERY_CONFIG, SlowQueryLog
+
+
+class FakeCursor:
+    rowcount = 1
+
+    async def fetchone(self):
+        return [[{'Plan': {}}]]
+
+
+class FakeConnection:
+    """Conexión que solo guarda las sentencias que recibe"""
+
+    def __init__(self, executed):
+        self.executed = executed
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def transaction(self, force_rollback=False):
+        assert force_rollback
+        return self
+
+    async def execute(self, query, params=None):
+        self.executed.append(query)
+        return FakeCursor()
+
+
+@pytest.fixture
+def log(monkeypatch, tmp_path):
+    monkeypatch.setitem(SLOW_QUERY_CONFIG, 'threshold_ms', 0)
+    monkeypatch.setitem(SLOW_QUERY_CONFIG, 'log_file', str(tmp_path / 'slow.jsonl'))
+    monkeypatch.setitem(SLOW_QUERY_CONFIG, 'explain', True)
+    monkeypatch.setattr(slowlog, 'current_request', lambda: None)
+    return SlowQueryLog()
+
+
+def explain_statements(log, monkeypatch, query):
+    executed = []
+
+    async def connect(conninfo):
+        return FakeConnection(executed)
+
+    monkeypatch.setattr(psycopg.AsyncConnection, 'connect', connect)
+
+    async def scenario():
+        log.record(FakeCursor(), query, None, 500)
+        await asyncio.gather(*log.tasks)
+
+    asyncio.run(scenario())
+    return [sql for sql in executed if sql.startswith('EXPLAIN')]
+
+
+def test_select_is_explained_with_analyze(log, monkeypatch):
+    explain, = explain_statements(log, monkeypatch, "SELECT 1")
+    assert explain.startswith("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ")
+    assert log.entries[0]['plan_analyzed'] is True
+
+
+@pytest.mark.parametrize('query', [
+    "INSERT INTO rental VALUES (1)",
+    "UPDATE rental SET return_date = now()",
+    "DELETE FROM rental WHERE rental_id = 1",
+    "WITH moved AS (DELETE FROM rental RETURNING *) SELECT count(*) FROM moved",
+])
+def test_writes_are_not_analyzed(log, monkeypatch, query):
+    explain, = explain_statements(log, monkeypatch, query)
+    assert explain.startswith("EXPLAIN (FORMAT JSON) ")
+    assert log.entries[0]['plan_analyzed'] is False
+
+
+def test_record_writes_file_off_the_event_loop(log, monkeypatch):
+    monkeypatch.setitem(SLOW_QUERY_CONFIG, 'explain', False)
+    writers = []
+    monkeypatch.setattr(log, 'write', lambda entry: writers.append(threading.get_ident()))
+
+    async def scenario():
+        log.record(FakeCursor(), "SELECT 1", None, 500)
+        assert writers == []
+        await asyncio.gather(*log.tasks)
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(writers) == 1 and writers[0] != loop_thread
@@ -0,0 +1,19 @@
+from app.statements import STATEMENT_CONFIG, Statement, prepare_mode
+
+REGISTERED = Statement('tests.lookup', "SELECT 1 WHERE 1 = %s")
+
+
+def test_registered_statements_are_prepared(monkeypatch):
+    monkeypatch.setitem(STATEMENT_CONFIG, 'enabled', True)
+    assert prepare_mode(REGISTERED) is True
+
+
+def test_unregistered_queries_use_psycopg_default(monkeypatch):
+    monkeypatch.setitem(STATEMENT_CONFIG, 'enabled', True)
+    assert prepare_mode("SELECT 1") is None
+
+
+def test_disabled_never_prepares(monkeypatch):
+    monkeypatch.setitem(STATEMENT_CONFIG, 'enabled', False)
+    assert prepare_mode(REGISTERED) is False
+    assert prepare_mode("SELECT 1") is False
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+batch_rentals.py - Rentas y devoluciones una por una vs por lote
+
+Crea --items rentas (una película distinta por renta) con POST /api/rentals
+y las devuelve con PUT /api/rentals/{id}/return; luego repite lo mismo con
+POST /api/rentals/batch y POST /api/rentals/returns/batch. Reporta el tiempo
+total de cada fase.
+
+Las rentas quedan devueltas y con su pago: usar contra una base de pruebas.
+
+Uso:
+    python benchmarks/batch_rentals.py --url http://localhost:8000 --items 50
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def single_round(client, items):
+    def create():
+        responses = [client.post("/api/rentals", json=item) for item in items]
+        return [r.json()["data"]["rental_id"] for r in responses if r.status_code == 201]
+
+    rental_ids, create_ms = timed(create)
+
+    def return_all():
+        return sum(
+            client.put(f"/api/rentals/{rental_id}/return").status_code == 200
+            for rental_id in rental_ids
+        )
+
+    returned, return_ms = timed(return_all)
+    return {"created": len(rental_ids), "returned": returned,
+            "create_ms": create_ms, "return_ms": return_ms}
+
+
+def batch_round(client, items):
+    def create():
+        response = client.post("/api/rentals/batch", json={"items": items})
+        return [r["data"]["rental_id"] for r in response.json()["results"] if r["success"]]
+
+    rental_ids, create_ms = timed(create)
+
+    def return_all():
+        response = client.post("/api/rentals/returns/batch", json={"rental_ids": rental_ids})
+        return response.json()["returned"]
+
+    returned, return_ms = timed(return_all)
+    return {"created": len(rental_ids), "returned": returned,
+            "create_ms": create_ms, "return_ms": return_ms}
+
+
+def summarize(rounds):
+    return {
+        "created": sum(r["created"] for r in rounds),
+        "returned": sum(r["returned"] for r in rounds),
+        "create_ms_median": round(statistics.median(r["create_ms"] for r in rounds), 1),
+        "return_ms_median": round(statistics.median(r["return_ms"] for r in rounds), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rentas una por una vs por lote")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--first-film", type=int, default=100)
+    parser.add_argument("--customer-id", type=int, default=1)
+    parser.add_argument("--staff-id", type=int, default=1)
+    args = parser.parse_args()
+
+    items = [
+        {"customer_id": args.customer_id, "film_id": args.first_film + n, "staff_id": args.staff_id}
+        for n in range(args.items)
+    ]
+    with httpx.Client(base_url=args.url, timeout=60) as client:
+        single = [single_round(client, items) for _ in range(args.rounds)]
+        batch = [batch_round(client, items) for _ in range(args.rounds)]
+
+    print(json.dumps({
+        "items": args.items,
+        "rounds": args.rounds,
+        "single": summarize(single),
+        "batch": summarize(batch),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+catalog_latency.py - Latencia del router de películas: catálogo en memoria vs PostgreSQL
+
+Pide las mismas rutas a dos instancias de la API, una con el catálogo en
+memoria (default) y otra con CATALOG_ENABLED=false, y reporta p50/p99.
+Levantar ambas con RESPONSE_CACHE_ENABLED=false para medir el endpoint y no
+el cache de respuestas.
+
+Uso:
+    python benchmarks/catalog_latency.py --url http://localhost:8000 \\
+        --compare-url http://localhost:8001 --requests 500
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+
+CATEGORIES = ["Action", "Animation", "Children", "Classics", "Comedy", "Documentary",
+              "Drama", "Family", "Foreign", "Games", "Horror", "Music", "New",
+              "Sci-Fi", "Sports", "Travel"]
+
+
+def routes(n):
+    return {
+        "film": [f"/api/films/{1 + i % 1000}" for i in range(n)],
+        "category": [f"/api/films/category/{CATEGORIES[i % len(CATEGORIES)]}" for i in range(n)],
+        "list": [f"/api/films/?limit=100&offset={(i * 100) % 1000}" for i in range(n)],
+    }
+
+
+def measure(client, paths):
+    samples = []
+    for path in paths:
+        start = time.perf_counter()
+        client.get(path).raise_for_status()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 2),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catálogo en memoria vs PostgreSQL")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--compare-url", default="http://localhost:8001")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    result = {}
+    for name, paths in routes(args.requests).items():
+        result[name] = {}
+        for label, url in (("catalog", args.url), ("postgres", args.compare_url)):
+            with httpx.Client(base_url=url, timeout=60) as client:
+                result[name][label] = measure(client, paths)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+checkout_stress.py - Prueba de estrés de POST /api/rentals concurrente
+
+1. Contención: lanza muchas rentas simultáneas de la MISMA película y
+   verifica que ninguna copia (inventory_id) se asigne dos veces y que el
+   número de rentas creadas no exceda las copias libres.
+2. Throughput: lanza rentas concurrentes repartidas entre muchas películas
+   y mide rentas/s y latencias.
+
+Al final cancela todas las rentas creadas para dejar la base como estaba.
+
+Uso:
+    python benchmarks/checkout_stress.py --url http://localhost:8000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+
+async def checkout(client, film_id, customer_id, staff_id):
+    start = time.perf_counter()
+    response = await client.post("/api/rentals", json={
+        "customer_id": customer_id,
+        "film_id": film_id,
+        "staff_id": staff_id,
+    })
+    elapsed = (time.perf_counter() - start) * 1000
+    data = response.json().get("data") if response.status_code == 201 else None
+    return response.status_code, data, elapsed
+
+
+async def run_batch(client, film_ids, concurrency, customer_id, staff_id):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(film_id):
+        async with semaphore:
+            return await checkout(client, film_id, customer_id, staff_id)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(limited(film_id) for film_id in film_ids))
+    return results, time.perf_counter() - started
+
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=args.concurrency)
+    created = []
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        # 1. Contención sobre una sola película
+        results, _ = await run_batch(
+            client, [args.film_id] * args.contention_requests,
+            args.concurrency, args.customer_id, args.staff_id
+        )
+        allocated = [data for status, data, _ in results if status == 201]
+        created += [data["rental_id"] for data in allocated]
+        inventory_ids = [data["inventory_id"] for data in allocated]
+        contention = {
+            "film_id": args.film_id,
+            "requests": args.contention_requests,
+            "created": len(allocated),
+            "no_stock": sum(1 for status, _, _ in results if status == 400),
+            "errors": sum(1 for status, _, _ in results if status not in (201, 400)),
+            "distinct_inventory_ids": len(set(inventory_ids)),
+            "double_allocations": len(inventory_ids) - len(set(inventory_ids)),
+        }
+
+        # 2. Throughput repartido entre películas
+        film_ids = [1 + (n % args.films) for n in range(args.throughput_requests)]
+        results, elapsed = await run_batch(
+            client, film_ids, args.concurrency, args.customer_id, args.staff_id
+        )
+        latencies = sorted(ms for status, _, ms in results if status == 201)
+        created += [data["rental_id"] for status, data, _ in results if status == 201]
+        throughput = {
+            "requests": args.throughput_requests,
+            "created": len(latencies),
+            "no_stock": sum(1 for status, _, _ in results if status == 400),
+            "errors": sum(1 for status, _, _ in results if status not in (201, 400)),
+            "checkouts_per_s": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+            "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1], 2) if latencies else None,
+        }
+
+        # Limpieza
+        for rental_id in created:
+            await client.delete(f"/api/rentals/{rental_id}")
+
+    return {"concurrency": args.concurrency, "contention": contention, "throughput": throughput}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estrés de rentas concurrentes")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--film-id", type=int, default=350)
+    parser.add_argument("--contention-requests", type=int, default=50)
+    parser.add_argument("--throughput-requests", type=int, default=500)
+    parser.add_argument("--films", type=int, default=500)
+    parser.add_argument("--customer-id", type=int, default=1)
+    parser.add_argument("--staff-id", type=int, default=1)
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    print(json.dumps(result, indent=2))
+    if result["contention"]["double_allocations"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
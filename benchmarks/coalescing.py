@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+coalescing.py - Ráfagas de requests idénticos con y sin single-flight
+
+Simula la apertura de dashboards: --clients requests iguales al mismo
+tiempo, --bursts veces por ruta. Levanta `python -m app.server` (un worker)
+en --port con SINGLE_FLIGHT_ENABLED=true y =false y compara latencia,
+duración de la ráfaga, consultas a PostgreSQL por ráfaga y requests
+coalescidos (http_request_db_queries_total y http_requests_coalesced_total
+de GET /metrics).
+
+Uso:
+    python benchmarks/coalescing.py --clients 50 --bursts 10
+    python benchmarks/coalescing.py /api/reports/most-rented?fresh=true
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from workers import BACKEND, wait_ready
+
+DEFAULT_PATHS = [
+    "/api/reports/most-rented",
+    "/api/reports/staff-revenue",
+    "/api/reports/most-rented?fresh=true",
+    "/api/reports/staff-revenue?fresh=true",
+]
+
+
+def metric(text, name, route):
+    """Suma de la serie name{...route="route"...} en la exposición de Prometheus"""
+    pattern = re.compile(rf'^{name}\{{[^}}]*route="{re.escape(route)}"[^}}]*\}} (\S+)$', re.M)
+    return sum(float(value) for value in pattern.findall(text))
+
+
+async def burst(client, path, clients):
+    async def one():
+        start = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(clients)))
+    return latencies, (time.perf_counter() - start) * 1000
+
+
+async def measure_path(url, path, clients, bursts):
+    route = path.split("?")[0]
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, timeout=60, limits=limits) as client:
+        await burst(client, path, clients)
+        before = (await client.get("/metrics")).text
+        latencies, walls = [], []
+        for _ in range(bursts):
+            samples, wall = await burst(client, path, clients)
+            latencies += samples
+            walls.append(wall)
+        after = (await client.get("/metrics")).text
+
+    latencies.sort()
+    requests = clients * bursts
+    queries = metric(after, "http_request_db_queries_total", route) - metric(before, "http_request_db_queries_total", route)
+    coalesced = metric(after, "http_requests_coalesced_total", route) - metric(before, "http_requests_coalesced_total", route)
+    return {
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95)], 2),
+        "burst_ms": round(statistics.median(walls), 2),
+        "db_queries_per_burst": round(queries / bursts, 1),
+        "coalesced_pct": round(100 * coalesced / requests, 1),
+    }
+
+
+def run_mode(enabled, args):
+    # Keep-alive largo: en una ráfaga lenta las conexiones que ya respondieron quedan ociosas
+    env = {**os.environ, "PORT": str(args.port), "WEB_CONCURRENCY": "1", "LOG_LEVEL": "warning",
+           "KEEP_ALIVE_TIMEOUT": "120",
+           "SINGLE_FLIGHT_ENABLED": "true" if enabled else "false"}
+    server = subprocess.Popen([sys.executable, "-m", "app.server"], cwd=BACKEND, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://localhost:{args.port}"
+    try:
+        wait_ready(url)
+        return {path: asyncio.run(measure_path(url, path, args.clients, args.bursts)) for path in args.paths}
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ráfagas de requests idénticos con y sin single-flight")
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--bursts", type=int, default=10)
+    args = parser.parse_args()
+
+    result = {"clients": args.clients, "bursts": args.bursts}
+    for enabled in (False, True):
+        result["single_flight" if enabled else "baseline"] = run_mode(enabled, args)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+export_stream.py - Exportación completa de rentas: páginas JSON vs streaming
+
+Descarga todas las filas de /api/rentals de tres formas:
+1. JSON paginado por cursor (limit=1000 por página)
+2. ?format=ndjson (cursor del servidor + StreamingResponse)
+3. ?format=csv
+
+Reporta tiempo al primer byte, tiempo total, filas y bytes recibidos.
+
+Uso:
+    python benchmarks/export_stream.py --url http://localhost:8000
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+
+
+def export_json_pages(client, path):
+    start = time.perf_counter()
+    ttfb, rows, size, cursor = None, 0, 0, None
+    while True:
+        params = {"limit": 1000, "include_total": "false"}
+        if cursor:
+            params["cursor"] = cursor
+        with client.stream("GET", path, params=params) as response:
+            body = b""
+            for chunk in response.iter_bytes():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+                body += chunk
+        page = json.loads(body)
+        rows += page["count"]
+        size += len(body)
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    return ttfb, time.perf_counter() - start, rows, size
+
+
+def export_stream(client, path, fmt):
+    start = time.perf_counter()
+    ttfb, lines, size = None, 0, 0
+    with client.stream("GET", path, params={"format": fmt}) as response:
+        for chunk in response.iter_bytes():
+            if ttfb is None and chunk:
+                ttfb = time.perf_counter() - start
+            lines += chunk.count(b"\n")
+            size += len(chunk)
+    rows = lines - 1 if fmt == "csv" else lines
+    return ttfb, time.perf_counter() - start, rows, size
+
+
+def measure(runs, func):
+    results = [func() for _ in range(runs)]
+    return {
+        "ttfb_ms": round(statistics.median(r[0] for r in results) * 1000, 1),
+        "total_ms": round(statistics.median(r[1] for r in results) * 1000, 1),
+        "rows": results[0][2],
+        "bytes": results[0][3],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportación JSON paginada vs streaming")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/rentals/")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with httpx.Client(base_url=args.url, timeout=120) as client:
+        result = {
+            "json_pages": measure(args.runs, lambda: export_json_pages(client, args.path)),
+            "ndjson": measure(args.runs, lambda: export_stream(client, args.path, "ndjson")),
+            "csv": measure(args.runs, lambda: export_stream(client, args.path, "csv")),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
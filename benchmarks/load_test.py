@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+load_test.py - Prueba de carga concurrente para la DVD Rental API
+
+Lanza N clientes concurrentes contra una lista de endpoints durante un
+tiempo fijo y reporta throughput (req/s) y latencias p50/p95/p99.
+
+Uso:
+    python benchmarks/load_test.py --url http://localhost:8000 \
+        --concurrency 50 --duration 20 \
+        /api/reports/most-rented /api/films/1 /api/customers/1
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+
+import httpx
+
+DEFAULT_ENDPOINTS = [
+    "/api/reports/most-rented",
+    "/api/films/1",
+    "/api/customers/1",
+    "/api/rentals/?limit=20",
+]
+
+
+def percentile(values, pct):
+    """Percentil por rango más cercano (values debe venir ordenado)"""
+    if not values:
+        return 0.0
+    index = max(0, min(len(values) - 1, int(round(pct / 100 * len(values))) - 1))
+    return values[index]
+
+
+async def worker(client, endpoints, offset, deadline, latencies, errors):
+    """Cliente que recorre los endpoints en round-robin hasta el deadline"""
+    i = offset
+    while time.perf_counter() < deadline:
+        path = endpoints[i % len(endpoints)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            elapsed = time.perf_counter() - start
+            if response.status_code >= 400:
+                errors[path] += 1
+            latencies[path].append(elapsed)
+        except httpx.HTTPError:
+            errors[path] += 1
+
+
+async def run(url, endpoints, concurrency, duration):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(
+            worker(client, endpoints, n, deadline, latencies, errors)
+            for n in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+    per_endpoint = {}
+    total = 0
+    for path in endpoints:
+        values = sorted(latencies[path])
+        total += len(values)
+        per_endpoint[path] = {
+            "requests": len(values),
+            "errors": errors[path],
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+        }
+
+    return {
+        "url": url,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "total_requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "endpoints": per_endpoint,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la DVD Rental API")
+    parser.add_argument("endpoints", nargs="*", default=DEFAULT_ENDPOINTS)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20.0)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.endpoints, args.concurrency, args.duration))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
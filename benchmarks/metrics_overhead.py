@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+metrics_overhead.py - Costo de las métricas (app/metrics.py)
+
+Microbenchmark en proceso, sin red ni base de datos:
+  - request: una app ASGI mínima sola vs envuelta en MetricsMiddleware
+  - query: el hook observe_query que llama TimedCursor por cada consulta
+  - render: generar el texto de GET /metrics con las series acumuladas
+
+Opcionalmente compara por HTTP dos instancias de la API, una con
+METRICS_ENABLED=false (--url / --compare-url).
+
+Uso:
+    python benchmarks/metrics_overhead.py --iterations 200000
+    python benchmarks/metrics_overhead.py --url http://localhost:8000 \\
+        --compare-url http://localhost:8001 --requests 1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app.metrics import MetricsMiddleware, observe_query, registry  # noqa: E402
+
+
+class Route:
+    """Lo único que el middleware lee de la ruta de FastAPI"""
+
+    def __init__(self, path):
+        self.path = path
+
+
+ROUTES = [Route(p) for p in ("/api/films/{film_id}", "/api/customers/", "/api/rentals/",
+                             "/api/reports/most-rented", "/api/staff/{staff_id}")]
+
+BODY = b'{"success":true,"data":{}}'
+
+
+async def bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": BODY})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def per_request_ns(app, iterations):
+    scopes = [{"type": "http", "method": "GET", "route": ROUTES[i % len(ROUTES)]}
+              for i in range(len(ROUTES))]
+    start = time.perf_counter_ns()
+    for i in range(iterations):
+        await app(scopes[i % len(scopes)], receive, send)
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def measure_in_process(iterations):
+    wrapped = MetricsMiddleware(bare_app)
+    bare, metered = [], []
+    for _ in range(5):
+        bare.append(asyncio.run(per_request_ns(bare_app, iterations)))
+        metered.append(asyncio.run(per_request_ns(wrapped, iterations)))
+
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        observe_query(0.0012)
+    query_ns = (time.perf_counter_ns() - start) / iterations
+
+    start = time.perf_counter_ns()
+    for _ in range(100):
+        text = registry.render()
+    render_us = (time.perf_counter_ns() - start) / 100 / 1000
+
+    bare_ns, metered_ns = min(bare), min(metered)
+    return {
+        "request_bare_ns": round(bare_ns),
+        "request_metered_ns": round(metered_ns),
+        "request_overhead_ns": round(metered_ns - bare_ns),
+        "query_hook_ns": round(query_ns),
+        "render_us": round(render_us, 1),
+        "render_bytes": len(text.encode()),
+        "series_routes": len(registry.latency),
+    }
+
+
+def measure_http(url, paths):
+    import httpx
+
+    samples = []
+    with httpx.Client(base_url=url, timeout=60) as client:
+        for path in paths:
+            start = time.perf_counter()
+            client.get(path).raise_for_status()
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de las métricas por request")
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--url", help="API con METRICS_ENABLED=true")
+    parser.add_argument("--compare-url", help="API con METRICS_ENABLED=false")
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    result = {"in_process": measure_in_process(args.iterations)}
+
+    if args.url and args.compare_url:
+        paths = [f"/api/customers/{1 + i % 599}" for i in range(args.requests)]
+        result["http"] = {
+            "metrics_on": measure_http(args.url, paths),
+            "metrics_off": measure_http(args.compare_url, paths),
+        }
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+pagination_depth.py - Latencia por profundidad de página: OFFSET vs cursor
+
+Para cada profundidad pide la misma página de un listado dos veces: con
+`offset=<profundidad>` y con el `cursor` que apunta a esa misma posición,
+y reporta la mediana de latencia de cada modo.
+
+Uso:
+    python benchmarks/pagination_depth.py --url http://localhost:8000 \
+        --path /api/rentals/ --depths 0 1000 4000 8000 12000 16000
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+
+
+def cursor_at(client, path, depth, limit):
+    """Recorrer el listado con cursores hasta la posición depth"""
+    cursor, position = None, 0
+    while position < depth:
+        step = min(1000, depth - position)
+        params = {"limit": step}
+        if cursor:
+            params["cursor"] = cursor
+        body = client.get(path, params=params).json()
+        cursor = body["next_cursor"]
+        position += step
+        if not cursor:
+            break
+    return cursor
+
+
+def median_ms(client, path, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path, params=params)
+        samples.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return round(statistics.median(samples), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de paginación por profundidad")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/api/rentals/")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 1000, 4000, 8000, 12000, 16000])
+    args = parser.parse_args()
+
+    results = []
+    with httpx.Client(base_url=args.url, timeout=60, follow_redirects=True) as client:
+        for depth in args.depths:
+            offset_params = {"limit": args.limit, "offset": depth}
+            cursor_params = {"limit": args.limit}
+            cursor = cursor_at(client, args.path, depth, args.limit)
+            if cursor:
+                cursor_params["cursor"] = cursor
+            elif depth:
+                break
+            results.append({
+                "depth": depth,
+                "offset_p50_ms": median_ms(client, args.path, offset_params, args.repeat),
+                "cursor_p50_ms": median_ms(client, args.path, cursor_params, args.repeat),
+            })
+
+    print(json.dumps({"path": args.path, "limit": args.limit, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
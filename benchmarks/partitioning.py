@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+partitioning.py - Particiones leídas y tiempo de ejecución de las consultas sobre rental/payment
+
+Corre EXPLAIN (ANALYZE, FORMAT JSON) de las consultas de la API que leen
+rental y payment (ventanas de reportes, paginación por llave, búsqueda por
+id, devolución) y reporta la mediana de "Execution Time" y las particiones
+(o tablas) de rental/payment que se leyeron de verdad. Se corre antes y
+después de upgrade-009-partitioning.sql sobre la misma base escalada
+(scale_dataset.py) para comparar. Las sentencias que escriben se deshacen.
+
+Uso:
+    python benchmarks/partitioning.py \\
+        --dsn "host=localhost dbname=dvdrental user=postgres password=postgres" --repeat 20
+    python benchmarks/partitioning.py --end 2005-07-31 --payment-end 2007-04-30 window.most_rented.7_days
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+from datetime import date, datetime, timedelta
+
+import psycopg
+from psycopg import ClientCursor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import app.routers.rentals  # noqa: E402,F401
+from app.routers.reports import (  # noqa: E402
+    MOST_RENTED_WINDOW_SQL, STAFF_REVENUE_WINDOW_SQL, report_window, window_filter
+)
+from app.statements import registry  # noqa: E402
+
+
+def most_rented_window(end, days, bucket=None):
+    window = report_window(end - timedelta(days=days - 1), end, bucket)
+    query = MOST_RENTED_WINDOW_SQL.format(rental_window=window_filter('r.rental_date', window))
+    return query, {**window, 'limit': 10}
+
+
+def staff_revenue_window(end, days, bucket=None):
+    window = report_window(end - timedelta(days=days - 1), end, bucket)
+    query = STAFF_REVENUE_WINDOW_SQL.format(
+        rental_window=window_filter('r.rental_date', window),
+        payment_window=window_filter('p.payment_date', window),
+        activity_join="JOIN" if bucket else "LEFT JOIN"
+    )
+    return query, window
+
+
+def queries(conn, end, payment_end):
+    """Consulta y parámetros de cada caso medido, con valores leídos de la base"""
+    customer_id, = conn.execute("""
+        SELECT customer_id FROM rental GROUP BY customer_id ORDER BY count(*) DESC LIMIT 1
+    """).fetchone()
+    rental_id, rental_date = conn.execute("""
+        SELECT rental_id, rental_date FROM rental
+        WHERE return_date IS NULL ORDER BY rental_id DESC LIMIT 1
+    """).fetchone()
+    # Un cursor a media historia: la página siguiente vive en meses anteriores
+    after_date, after_id = conn.execute("""
+        SELECT rental_date, rental_id FROM rental
+        WHERE rental_date <= %s ORDER BY rental_date DESC, rental_id DESC LIMIT 1
+    """, (datetime.combine(end, datetime.min.time()),)).fetchone()
+    customer_after = conn.execute("""
+        SELECT rental_date, rental_id FROM rental
+        WHERE customer_id = %s AND rental_date <= %s
+        ORDER BY rental_date DESC, rental_id DESC LIMIT 1
+    """, (customer_id, datetime.combine(end, datetime.min.time()))).fetchone()
+    now = datetime.now()
+    return {
+        "window.most_rented.1_day": most_rented_window(end, 1),
+        "window.most_rented.7_days": most_rented_window(end, 7),
+        "window.most_rented.30_days_by_day": most_rented_window(end, 30, 'day'),
+        "window.staff_revenue.7_days": staff_revenue_window(end, 7),
+        "window.staff_revenue.payments_30_days": staff_revenue_window(payment_end, 30),
+        "reports.staff_revenue_live": (registry['reports.staff_revenue_live'], None),
+        "rentals.page": (registry['rentals.page'], (21, 0)),
+        "rentals.page_after": (registry['rentals.page_after'], (after_date, after_date, after_id, 21, 0)),
+        "rentals.customer_page": (registry['rentals.customer_page'], {'customer_id': customer_id, 'limit': 21}),
+        "rentals.customer_page_after": (registry['rentals.customer_page_after'], {
+            'customer_id': customer_id, 'limit': 21,
+            'after_date': customer_after[0], 'after_id': customer_after[1],
+        }),
+        "rentals.return_lookup": (registry['rentals.return_lookup'], (rental_id,)),
+        "rentals.return_update": (registry['rentals.return_update'], (now, rental_id, rental_date)),
+        "rentals.return_payment": (registry['rentals.return_payment'], (1, now, rental_id, rental_date)),
+        "reports.unreturned.limit": (registry['reports.unreturned.limit'], {'min_days': None, 'limit': 51}),
+    }
+
+
+def scanned_relations(plan, found):
+    """Tablas de rental/payment que el plan leyó (nodos con al menos una ejecución)"""
+    relation = plan.get("Relation Name", "")
+    if relation.startswith(("rental", "payment")) and plan.get("Actual Loops", 0) > 0:
+        found.add(relation)
+    for child in plan.get("Plans", []):
+        scanned_relations(child, found)
+    return found
+
+
+def measure(conn, query, params, repeat):
+    cursor = ClientCursor(conn)
+    sql = cursor.mogrify(query, params)
+    samples, relations = [], set()
+    for _ in range(repeat):
+        cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}")
+        plan = cursor.fetchone()[0][0]
+        samples.append(plan["Execution Time"])
+        relations = scanned_relations(plan["Plan"], set())
+        conn.rollback()
+    return {
+        "execution_ms": round(statistics.median(samples), 3),
+        "relations_scanned": len(relations),
+    }
+
+
+def layout(conn):
+    """Filas y particiones de rental/payment"""
+    result = {}
+    for table in ("rental", "payment"):
+        partitions, = conn.execute(
+            "SELECT count(*) FROM pg_inherits WHERE inhparent = %s::regclass", (table,)
+        ).fetchone()
+        rows, = conn.execute(f"SELECT count(*) FROM {table}").fetchone()
+        result[table] = {"rows": rows, "partitions": partitions}
+    conn.rollback()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Particiones leídas y tiempo de las consultas sobre rental/payment")
+    parser.add_argument("names", nargs="*", help="casos a medir (por defecto todos)")
+    parser.add_argument("--dsn", default="host=localhost dbname=dvdrental user=postgres password=postgres")
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2005, 7, 31),
+                        help="último día de las ventanas de rentas")
+    parser.add_argument("--payment-end", type=date.fromisoformat, default=date(2007, 4, 30),
+                        help="último día de la ventana de pagos")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with psycopg.connect(args.dsn) as conn:
+        cases = queries(conn, args.end, args.payment_end)
+        result = {"tables": layout(conn)}
+        for name in args.names or cases:
+            query, params = cases[name]
+            result[name] = measure(conn, query, params, args.repeat)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+prepared_statements.py - Tiempo de planeación ahorrado con sentencias preparadas
+
+Para las sentencias registradas de rentas y reportes (app/statements.py)
+mide, con los mismos parámetros:
+
+- planning_ms: "Planning Time" de EXPLAIN (ANALYZE, SUMMARY) del texto sin
+  preparar (lo que paga cada ejecución con prepare=False).
+- prepared_planning_ms: lo mismo sobre EXECUTE de la sentencia preparada,
+  después de --warmup ejecuciones (PostgreSQL pasa al plan genérico
+  después de cinco si no es más caro que los planes a la medida).
+- execution_ms / prepared_execution_ms: "Execution Time" de los mismos
+  EXPLAIN, para ver si el plan genérico ejecuta peor que el plan a la medida.
+- generic_plans / custom_plans de pg_prepared_statements.
+- unprepared_ms / prepared_ms: mediana de ida y vuelta desde psycopg con
+  prepare=False y con prepare=True (Parse + planeación + ejecución).
+
+Las sentencias que escriben corren dentro de una transacción que se
+deshace al final.
+
+Uso:
+    python benchmarks/prepared_statements.py \\
+        --dsn "host=localhost dbname=dvdrental user=postgres password=postgres" --repeat 50
+    python benchmarks/prepared_statements.py reports.most_rented rentals.page
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import psycopg
+from psycopg import ClientCursor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+# Al importar los módulos se registran sus sentencias
+import app.allocation  # noqa: E402,F401
+import app.routers.rentals  # noqa: E402,F401
+import app.routers.reports  # noqa: E402,F401
+from app.statements import registry  # noqa: E402
+
+
+def sample_params(conn):
+    """Parámetros de ejemplo para cada sentencia medida, leídos de la base"""
+    customer_id, = conn.execute("""
+        SELECT customer_id FROM rental GROUP BY customer_id ORDER BY count(*) DESC LIMIT 1
+    """).fetchone()
+    rental_id, = conn.execute("SELECT max(rental_id) FROM rental WHERE return_date IS NULL").fetchone()
+    after_date, after_id = conn.execute("""
+        SELECT rental_date, rental_id FROM rental
+        WHERE customer_id = %s ORDER BY rental_date DESC, rental_id DESC OFFSET 10 LIMIT 1
+    """, (customer_id,)).fetchone()
+    after_due, after_unreturned = conn.execute("""
+        SELECT due_date, rental_id FROM rental
+        WHERE return_date IS NULL ORDER BY due_date, rental_id OFFSET 50 LIMIT 1
+    """).fetchone()
+    customer_page = {'customer_id': customer_id, 'limit': 21}
+    return {
+        "rentals.page": (21, 0),
+        "rentals.page_after": (after_date, after_date, after_id, 21, 0),
+        "rentals.customer_page": customer_page,
+        "rentals.customer_page_after": {**customer_page, 'after_date': after_date, 'after_id': after_id},
+        "rentals.return_lookup": (rental_id,),
+        "rentals.cancel_lookup": (rental_id,),
+        "rentals.checkout": {'customer_id': customer_id, 'staff_id': 1, 'film_id': 1,
+                             'rental_date': datetime.now()},
+        "rollups.customer_stats": (customer_id,),
+        "reports.most_rented": (10,),
+        "reports.most_rented_live": (10,),
+        "reports.staff_revenue": None,
+        "reports.staff_revenue_live": None,
+        "reports.staff_revenue_by_id": (1,),
+        "reports.staff_recent_rentals": (1,),
+        "reports.customer_rentals": {**customer_page, 'limit': 101},
+        "reports.customer_rentals_after": {**customer_page, 'limit': 101,
+                                           'after_date': after_date, 'after_id': after_id},
+        "reports.unreturned.limit": {'min_days': None, 'limit': 51},
+        "reports.unreturned.min_days.after.limit": {'min_days': 1, 'limit': 51, 'after_due': after_due,
+                                                    'after_id': after_unreturned},
+        "reports.unreturned_summary": {'min_days': None},
+        "reports.unreturned_summary.min_days": {'min_days': 1},
+    }
+
+
+def ordered(sql, params):
+    """Valores de params en el orden de los $n que genera psycopg"""
+    if not isinstance(params, dict):
+        return list(params)
+    keys = []
+    for key in re.findall(r'%\((\w+)\)s', sql):
+        if key not in keys:
+            keys.append(key)
+    return [params[key] for key in keys]
+
+
+def explain(cursor, query, repeat):
+    """Medianas de Planning Time y Execution Time de EXPLAIN ANALYZE"""
+    planning, execution = [], []
+    for _ in range(repeat):
+        cursor.execute(f"EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) {query}")
+        plan = cursor.fetchone()[0][0]
+        planning.append(plan["Planning Time"])
+        execution.append(plan["Execution Time"])
+    return statistics.median(planning), statistics.median(execution)
+
+
+def round_trip_ms(conn, sql, params, prepare, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params, prepare=prepare).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def measure(dsn, name, params, repeat, warmup):
+    sql = registry[name]
+    with psycopg.connect(dsn) as conn:
+        cursor = ClientCursor(conn)
+        planning, execution = explain(cursor, cursor.mogrify(sql, params), repeat)
+
+        # psycopg prepara la sentencia con los tipos de los parámetros, como en la API
+        conn.execute(sql, params, prepare=True)
+        prepared_name, arity = conn.execute("""
+            SELECT name, cardinality(parameter_types) FROM pg_prepared_statements
+            ORDER BY prepare_time DESC LIMIT 1
+        """).fetchone()
+        execute = f"EXECUTE {prepared_name}"
+        if arity:
+            execute = cursor.mogrify(f"{execute} ({', '.join(['%s'] * arity)})", ordered(sql, params))
+        for _ in range(warmup):
+            cursor.execute(execute)
+        prepared_planning, prepared_execution = explain(cursor, execute, repeat)
+        generic_plans, custom_plans = conn.execute(
+            "SELECT generic_plans, custom_plans FROM pg_prepared_statements WHERE name = %s",
+            (prepared_name,)
+        ).fetchone()
+        conn.rollback()
+
+    with psycopg.connect(dsn) as conn:
+        round_trip_ms(conn, sql, params, True, warmup)
+        unprepared = round_trip_ms(conn, sql, params, False, repeat)
+        prepared_round_trip = round_trip_ms(conn, sql, params, True, repeat)
+        conn.rollback()
+
+    return {
+        "planning_ms": round(planning, 3),
+        "prepared_planning_ms": round(prepared_planning, 3),
+        "planning_saved_ms": round(planning - prepared_planning, 3),
+        "execution_ms": round(execution, 3),
+        "prepared_execution_ms": round(prepared_execution, 3),
+        "generic_plans": generic_plans,
+        "custom_plans": custom_plans,
+        "unprepared_ms": round(unprepared, 3),
+        "prepared_ms": round(prepared_round_trip, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de planeación con y sin sentencias preparadas")
+    parser.add_argument("names", nargs="*", help="sentencias a medir (por defecto todas las de ejemplo)")
+    parser.add_argument("--dsn", default="host=localhost dbname=dvdrental user=postgres password=postgres")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=6)
+    args = parser.parse_args()
+
+    with psycopg.connect(args.dsn) as conn:
+        samples = sample_params(conn)
+    result = {name: measure(args.dsn, name, samples[name], args.repeat, args.warmup)
+              for name in (args.names or samples)}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+read_replicas.py - Lectura después de escritura con réplicas de lectura
+
+Cada cliente repite: rentar (POST /api/rentals/), leer las rentas del
+cliente (GET /api/rentals/customer/{id}) y comprobar que la renta nueva
+aparece, devolverla (PUT /api/rentals/{id}/return) y comprobar que la
+lectura ya la muestra devuelta. Cuenta las lecturas que no vieron la
+escritura anterior y, con GET /health/replicas antes y después, cuántas
+lecturas fueron a réplicas y cuántas a la primaria.
+
+Con --no-token cada request va sin la cookie db_lsn, para comparar. Correr
+la API con DB_REPLICAS y RESPONSE_CACHE_ENABLED=false (el cache se llena
+desde la primaria después de una escritura y ocultaría el enrutamiento);
+recovery_min_apply_delay en la réplica simula retraso.
+
+Uso:
+    python benchmarks/read_replicas.py --url http://localhost:8000 --clients 8 --iterations 50
+    python benchmarks/read_replicas.py --no-token
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import httpx
+
+
+async def replica_stats(client):
+    data = (await client.get("/health/replicas")).json()["data"]
+    return {
+        "primary_reads": data["primary_reads"],
+        "replica_reads": sum(replica["reads"] for replica in data["replicas"]),
+        "fallbacks": data["fallbacks"],
+    }
+
+
+async def read_rentals(client, customer_id, token, latencies):
+    start = time.perf_counter()
+    response = await client.get(f"/api/rentals/customer/{customer_id}", params={"limit": 5})
+    latencies.append((time.perf_counter() - start) * 1000)
+    if not token:
+        client.cookies.clear()
+    response.raise_for_status()
+    return {rental["rental_id"]: rental for rental in response.json()["rentals"]}
+
+
+async def worker(url, iterations, token, totals, latencies):
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        for _ in range(iterations):
+            customer_id = random.randint(1, 599)
+            response = await client.post("/api/rentals/", json={
+                "customer_id": customer_id, "film_id": random.randint(1, 1000), "staff_id": 1
+            })
+            if not token:
+                client.cookies.clear()
+            if response.status_code != 201:
+                # Sin copias disponibles o película sin inventario
+                totals["skipped"] += 1
+                continue
+            rental_id = response.json()["data"]["rental_id"]
+
+            rentals = await read_rentals(client, customer_id, token, latencies)
+            totals["checks"] += 1
+            if rental_id not in rentals:
+                totals["missed_checkout"] += 1
+
+            response = await client.put(f"/api/rentals/{rental_id}/return")
+            if not token:
+                client.cookies.clear()
+            response.raise_for_status()
+
+            rentals = await read_rentals(client, customer_id, token, latencies)
+            totals["checks"] += 1
+            if rental_id not in rentals or rentals[rental_id]["return_date"] is None:
+                totals["missed_return"] += 1
+
+
+async def run(url, clients, iterations, token):
+    totals = {"checks": 0, "missed_checkout": 0, "missed_return": 0, "skipped": 0}
+    latencies = []
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        before = await replica_stats(client)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(url, iterations, token, totals, latencies) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        after = await replica_stats(client)
+
+    latencies.sort()
+    return {
+        "token": token,
+        "clients": clients,
+        "elapsed_s": round(elapsed, 2),
+        **totals,
+        "stale_reads": totals["missed_checkout"] + totals["missed_return"],
+        "read_p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+        "read_p95_ms": round(latencies[int(len(latencies) * 0.95)], 2) if latencies else None,
+        "primary_reads": after["primary_reads"] - before["primary_reads"],
+        "replica_reads": after["replica_reads"] - before["replica_reads"],
+        "fallbacks": {key: after["fallbacks"][key] - before["fallbacks"][key] for key in after["fallbacks"]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lectura después de escritura con réplicas")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--no-token", action="store_true", help="no enviar la cookie db_lsn")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url, args.clients, args.iterations, not args.no_token))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+report_latency.py - Latencia de reportes: tablas pre-agregadas vs agregación en vivo
+
+Pide cada reporte N veces desde las tablas de acumulados (default) y con
+`fresh=true` (agregación sobre rental/payment) y reporta las medianas.
+
+Uso:
+    python benchmarks/report_latency.py --url http://localhost:8000 --repeat 50
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+
+REPORTS = [
+    "/api/reports/most-rented?limit=10",
+    "/api/reports/staff-revenue",
+    "/api/reports/staff-revenue/1",
+]
+
+
+def median_ms(client, path, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path)
+        samples.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    return round(statistics.median(samples), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de reportes pre-agregados vs en vivo")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("paths", nargs="*", default=REPORTS)
+    args = parser.parse_args()
+
+    results = []
+    with httpx.Client(base_url=args.url, timeout=60, follow_redirects=True) as client:
+        for path in args.paths:
+            separator = "&" if "?" in path else "?"
+            results.append({
+                "path": path,
+                "rollup_p50_ms": median_ms(client, path, args.repeat),
+                "fresh_p50_ms": median_ms(client, f"{path}{separator}fresh=true", args.repeat),
+            })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
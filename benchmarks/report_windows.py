@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+report_windows.py - Latencia de reportes con ventana de tiempo vs todo el historial
+
+Pide most-rented y staff-revenue agregando todo el historial (fresh=true),
+con ventanas de --days días que terminan en --end (from/to) y agrupados por
+mes (bucket=month), y reporta las medianas. Conviene correrlo sobre una base
+escalada (scale_dataset.py) para ver cómo crece cada variante.
+
+Uso:
+    python benchmarks/report_windows.py --url http://localhost:8000 --end 2005-07-31 --repeat 30
+"""
+
+import argparse
+import json
+from datetime import date, timedelta
+
+import httpx
+
+from report_latency import median_ms
+
+REPORTS = ["/api/reports/most-rented", "/api/reports/staff-revenue"]
+
+
+def variants(end, days):
+    """Parámetros de cada variante: historial completo, ventanas y buckets"""
+    result = {"all_time": {"fresh": "true"}}
+    for window in days:
+        result[f"last_{window}_days"] = {
+            "from": (end - timedelta(days=window - 1)).isoformat(), "to": end.isoformat()
+        }
+    result["bucket_month"] = {"bucket": "month"}
+    result[f"last_{max(days)}_days_by_day"] = {**result[f"last_{max(days)}_days"], "bucket": "day"}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de reportes con ventana de tiempo")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--end", type=date.fromisoformat, default=date.today(), help="último día de las ventanas")
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 7, 30])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    results = {}
+    with httpx.Client(base_url=args.url, timeout=120) as client:
+        for path in REPORTS:
+            results[path] = {}
+            for name, params in variants(args.end, args.days).items():
+                url = f"{path}?{httpx.QueryParams(params)}"
+                results[path][name] = {
+                    "p50_ms": median_ms(client, url, args.repeat),
+                    "rows": client.get(url).json()["count"],
+                }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+scale_dataset.py - Multiplica rental y payment de dvdrental para benchmarks
+
+Copia cada renta (y su pago) --scale - 1 veces dentro del mismo periodo,
+desplazada unos segundos: los clientes, películas y meses son los mismos
+pero con --scale veces más historial. Las copias quedan devueltas (no
+ocupan inventario). Las tablas de reportes se recalculan con
+app.rollups.reconcile, por eso se corre con las dependencias del backend
+instaladas (backend/requirements.txt).
+
+Las ids originales se guardan en la tabla benchmark_dataset; --reset borra
+todo lo posterior (incluidas las rentas que creó la suite) y la tabla.
+Reiniciar la API después para que no sirva totales y catálogos en cache.
+
+Uso:
+    python benchmarks/scale_dataset.py --scale 10
+    python benchmarks/scale_dataset.py --reset
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import psycopg
+from psycopg.rows import dict_row
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from app.rollups import reconcile  # noqa: E402
+
+# Copias por sentencia (una transacción cada una)
+COPIES_PER_BATCH = 5
+
+RENTAL_SQL = """
+    INSERT INTO rental (rental_date, inventory_id, customer_id, return_date, staff_id)
+    SELECT r.rental_date + n * interval '1 second', r.inventory_id, r.customer_id,
+           COALESCE(r.return_date, r.rental_date + f.rental_duration * interval '1 day')
+               + n * interval '1 second',
+           r.staff_id
+    FROM generate_series(%(first)s::int, %(last)s::int) AS n
+    JOIN rental r ON r.rental_id <= %(max_rental_id)s
+    JOIN inventory i ON i.inventory_id = r.inventory_id
+    JOIN film f ON f.film_id = i.film_id
+    ON CONFLICT DO NOTHING
+"""
+
+PAYMENT_SQL = """
+    INSERT INTO payment (customer_id, staff_id, rental_id, amount, payment_date)
+    SELECT p.customer_id, p.staff_id, copy.rental_id, p.amount,
+           p.payment_date + n * interval '1 second'
+    FROM generate_series(%(first)s::int, %(last)s::int) AS n
+    JOIN payment p ON p.payment_id <= %(max_payment_id)s
+    JOIN rental r ON r.rental_id = p.rental_id
+    JOIN rental copy ON copy.rental_date = r.rental_date + n * interval '1 second'
+                    AND copy.inventory_id = r.inventory_id
+                    AND copy.customer_id = r.customer_id
+                    AND copy.rental_id > %(max_rental_id)s
+"""
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def counts(conn):
+    return {
+        "rental": conn.execute("SELECT count(*) FROM rental").fetchone()[0],
+        "payment": conn.execute("SELECT count(*) FROM payment").fetchone()[0],
+    }
+
+
+def baseline(conn):
+    exists = conn.execute("SELECT to_regclass('public.benchmark_dataset')").fetchone()[0]
+    if exists is None:
+        return None
+    return conn.execute(
+        "SELECT scale, max_rental_id, max_payment_id FROM benchmark_dataset"
+    ).fetchone()
+
+
+async def reconcile_rollups(dsn):
+    async with await psycopg.AsyncConnection.connect(dsn, row_factory=dict_row) as conn:
+        await reconcile(conn)
+
+
+def vacuum(conn):
+    for table in ("rental", "payment"):
+        conn.execute(f"VACUUM ANALYZE {table}")
+
+
+def scale(dsn, factor):
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        if baseline(conn) is not None:
+            sys.exit("La base ya está escalada; correr primero con --reset")
+        max_rental_id = conn.execute("SELECT max(rental_id) FROM rental").fetchone()[0]
+        max_payment_id = conn.execute("SELECT max(payment_id) FROM payment").fetchone()[0]
+        conn.execute("""
+            CREATE TABLE benchmark_dataset (
+                scale integer NOT NULL,
+                max_rental_id integer NOT NULL,
+                max_payment_id integer NOT NULL,
+                created_at timestamp with time zone DEFAULT now() NOT NULL
+            )
+        """)
+        conn.execute(
+            "INSERT INTO benchmark_dataset (scale, max_rental_id, max_payment_id) VALUES (%s, %s, %s)",
+            (factor, max_rental_id, max_payment_id)
+        )
+
+        started = time.perf_counter()
+        params = {"max_rental_id": max_rental_id, "max_payment_id": max_payment_id}
+        for first in range(1, factor, COPIES_PER_BATCH):
+            params.update(first=first, last=min(first + COPIES_PER_BATCH - 1, factor - 1))
+            with conn.transaction():
+                conn.execute(RENTAL_SQL, params)
+                conn.execute(PAYMENT_SQL, params)
+            log(f"copias {params['last']}/{factor - 1} ({time.perf_counter() - started:.0f} s)")
+
+        asyncio.run(reconcile_rollups(dsn))
+        vacuum(conn)
+        return {
+            "scale": factor,
+            "seconds": round(time.perf_counter() - started, 1),
+            "rows": counts(conn),
+        }
+
+
+def reset(dsn):
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        row = baseline(conn)
+        if row is None:
+            sys.exit("La base no está escalada")
+        _, max_rental_id, max_payment_id = row
+        started = time.perf_counter()
+        with conn.transaction():
+            conn.execute(
+                "DELETE FROM payment WHERE payment_id > %s OR rental_id > %s",
+                (max_payment_id, max_rental_id)
+            )
+            conn.execute("DELETE FROM rental WHERE rental_id > %s", (max_rental_id,))
+            conn.execute("DROP TABLE benchmark_dataset")
+        asyncio.run(reconcile_rollups(dsn))
+        vacuum(conn)
+        return {
+            "reset": True,
+            "seconds": round(time.perf_counter() - started, 1),
+            "rows": counts(conn),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalar rental/payment para benchmarks")
+    parser.add_argument("--dsn", default="host=localhost dbname=dvdrental user=postgres password=postgres")
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--reset", action="store_true", help="Regresar a las filas originales")
+    args = parser.parse_args()
+
+    result = reset(args.dsn) if args.reset else scale(args.dsn, args.scale)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
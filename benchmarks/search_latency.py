@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+search_latency.py - Latencia de GET /api/films/search con la tabla film escalada
+
+Agrega a film (scale - 1) películas sintéticas por cada original, con
+títulos que combinan palabras de títulos existentes y descripciones
+reales (el trigger llena fulltext), mide la búsqueda por la API en cada
+modo y al final borra las películas agregadas.
+
+Necesita acceso directo a PostgreSQL para escalar la tabla (--dsn).
+
+Uso:
+    python benchmarks/search_latency.py --url http://localhost:8000 \\
+        --dsn "host=localhost dbname=dvdrental user=postgres password=postgres" --scale 100
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import httpx
+import psycopg
+
+QUERIES = {
+    "contains": ["dino", "grad", "ace", "love"],
+    "prefix": ["acad", "ch", "war", "love"],
+    "fuzzy": ["acadmy dinosor", "chamber itali", "grosse wonderfull"],
+    "fulltext": ["mad scientist", "\"database administrator\"", "boat -shark"],
+    "auto": ["acad", "penelope guiness", "dino", "mad scientist"],
+}
+
+SCALE_SQL = """
+    INSERT INTO film (title, description, release_year, language_id, rental_duration,
+                      rental_rate, length, replacement_cost, rating, special_features)
+    SELECT split_part(a.title, ' ', 1) || ' ' || split_part(b.title, ' ', 2) || ' ' || n,
+           b.description, b.release_year, b.language_id, b.rental_duration,
+           b.rental_rate, b.length, b.replacement_cost, b.rating, b.special_features
+    FROM generate_series(1, %(copies)s) AS n
+    JOIN film a ON a.film_id <= %(max_id)s
+    JOIN film b ON b.film_id = (a.film_id * 7 + n * 13) %% %(max_id)s + 1
+"""
+
+
+def scale_films(dsn, scale):
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        max_id = conn.execute("SELECT max(film_id) FROM film").fetchone()[0]
+        started = time.perf_counter()
+        conn.execute(SCALE_SQL, {"copies": scale - 1, "max_id": max_id})
+        conn.execute("VACUUM ANALYZE film")
+        total = conn.execute("SELECT count(*) FROM film").fetchone()[0]
+        print(f"film: {total} filas ({time.perf_counter() - started:.1f} s)")
+    return max_id
+
+
+def cleanup(dsn, max_id):
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        conn.execute("DELETE FROM film WHERE film_id > %s", (max_id,))
+        conn.execute("VACUUM ANALYZE film")
+
+
+def measure(client, mode, text, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get("/api/films/search", params={"q": text, "mode": mode})
+        samples.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+    samples.sort()
+    return {
+        "results": response.json()["count"],
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latencia de búsqueda de películas")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--dsn", default="host=localhost dbname=dvdrental user=postgres password=postgres")
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--modes", nargs="*", default=list(QUERIES))
+    args = parser.parse_args()
+
+    max_id = scale_films(args.dsn, args.scale) if args.scale > 1 else None
+    try:
+        with httpx.Client(base_url=args.url, timeout=60) as client:
+            result = {
+                mode: {text: measure(client, mode, text, args.repeat) for text in QUERIES[mode]}
+                for mode in args.modes
+            }
+    finally:
+        if max_id is not None:
+            cleanup(args.dsn, max_id)
+
+    print(json.dumps({"scale": args.scale, "modes": result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+serialization.py - Costo de serializar respuestas por cada 1000 filas
+
+En proceso, con las filas reales de GET /api/rentals/ (--rows filas):
+  fetch:     fetchall() con dict_row (cursor del pool) vs tuple_row
+  serialize: de la lista de filas a los bytes del cuerpo
+    dict_model:        response_model=dict + JSONResponse (como antes)
+    typed_model:       validar contra Page[RentalResponse] + JSONResponse
+    jsonable_encoder:  jsonable_encoder + JSONResponse (el cache antes)
+    fast:              FastJSONResponse (app/responses.py, orjson)
+Los tiempos se reportan en ms por 1000 filas (mínimo de --repeat corridas).
+
+Con --url mide además p50 y tamaño de los endpoints de lectura más
+pesados; correr la API con RESPONSE_CACHE_ENABLED=false para que cada
+request serialice.
+
+Uso:
+    python benchmarks/serialization.py --dsn "host=localhost dbname=dvdrental user=postgres"
+    python benchmarks/serialization.py --url http://localhost:8000 --requests 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+import psycopg
+from psycopg.rows import dict_row, tuple_row
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app.responses import FastJSONResponse  # noqa: E402
+from app.schemas import Page, RentalResponse  # noqa: E402
+
+RENTALS_SQL = """
+    SELECT
+        r.rental_id,
+        r.rental_date,
+        r.return_date,
+        r.customer_id,
+        r.staff_id,
+        i.film_id,
+        f.title as film_title,
+        CONCAT(c.first_name, ' ', c.last_name) as customer_name,
+        CONCAT(s.first_name, ' ', s.last_name) as staff_name,
+        f.rental_duration,
+        r.rental_date + INTERVAL '1 day' * f.rental_duration as expected_return_date
+    FROM rental r
+    JOIN inventory i ON r.inventory_id = i.inventory_id
+    JOIN film f ON i.film_id = f.film_id
+    JOIN customer c ON r.customer_id = c.customer_id
+    JOIN staff s ON r.staff_id = s.staff_id
+    ORDER BY r.rental_date DESC, r.rental_id DESC
+    LIMIT %s
+"""
+
+HTTP_PATHS = [
+    "/api/rentals/?limit=1000&include_total=false",
+    "/api/films/?limit=1000&include_total=false",
+    "/api/reports/unreturned-dvds",
+    "/api/rentals/customer/148",
+    "/api/reports/customer-rentals/148",
+]
+
+
+def best_ms(func, repeat, per_rows, rows):
+    """Mínimo de repeat corridas, escalado a ms por per_rows filas"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return round(min(samples) * 1000 * per_rows / rows, 3)
+
+
+async def fetch_rows(dsn, rows, repeat):
+    async with await psycopg.AsyncConnection.connect(dsn) as conn:
+        timings = {}
+        for name, factory in (("dict_row", dict_row), ("tuple_row", tuple_row)):
+            samples = []
+            for _ in range(repeat):
+                async with conn.cursor(row_factory=factory) as cursor:
+                    await cursor.execute(RENTALS_SQL, (rows,))
+                    start = time.perf_counter()
+                    result = await cursor.fetchall()
+                    samples.append(time.perf_counter() - start)
+            timings[name] = round(min(samples) * 1000 * 1000 / rows, 3)
+            if factory is dict_row:
+                data = result
+    return data, timings
+
+
+def measure_serialization(data, repeat):
+    payload = {"success": True, "count": len(data), "total": None, "next_cursor": None, "data": data}
+    dict_field = create_response_field(name="Response", type_=dict, mode="serialization")
+    typed_field = create_response_field(name="Response", type_=Page[RentalResponse], mode="serialization")
+
+    def through_model(field):
+        content = asyncio.run(serialize_response(field=field, response_content=payload))
+        return JSONResponse(content).body
+
+    paths = {
+        "dict_model": lambda: through_model(dict_field),
+        "typed_model": lambda: through_model(typed_field),
+        "jsonable_encoder": lambda: JSONResponse(jsonable_encoder(payload)).body,
+        "fast": lambda: FastJSONResponse(payload).body,
+    }
+    timings = {name: best_ms(func, repeat, 1000, len(data)) for name, func in paths.items()}
+    sizes = {name: len(func()) for name, func in paths.items()}
+    return timings, sizes
+
+
+def measure_http(url, requests):
+    import httpx
+
+    result = {}
+    with httpx.Client(base_url=url, timeout=60) as client:
+        for path in HTTP_PATHS:
+            for _ in range(20):
+                client.get(path)
+            samples = []
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = client.get(path)
+                samples.append((time.perf_counter() - start) * 1000)
+            response.raise_for_status()
+            result[path] = {"p50_ms": round(statistics.median(samples), 2), "bytes": len(response.content)}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Costo de serializar respuestas")
+    parser.add_argument("--dsn", default="host=localhost dbname=dvdrental user=postgres password=postgres")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--url", help="API para medir por HTTP")
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    data, fetch = asyncio.run(fetch_rows(args.dsn, args.rows, args.repeat))
+    timings, sizes = measure_serialization(data, args.repeat)
+    result = {
+        "rows": len(data),
+        "fetch_ms_per_1000": fetch,
+        "serialize_ms_per_1000": timings,
+        "body_bytes": sizes,
+    }
+    if args.url:
+        result["http"] = measure_http(args.url, args.requests)
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+suite.py - Suite de benchmarks por mezcla de tráfico
+
+Recorre todos los routers con una mezcla ponderada de operaciones:
+  read:     catálogo, clientes, empleados, listados y rentas por cliente
+  checkout: rentar y devolver (individual y por lote), cancelar, más lecturas
+  report:   los endpoints de /api/reports
+Los ids salen de un generador con --seed, así que dos corridas con la misma
+semilla piden las mismas rutas. La salida es JSON con throughput y
+p50/p95/p99 por endpoint (agrupados por la plantilla de la ruta).
+
+Con --baseline se compara contra un JSON anterior y se marca como regresión
+un endpoint cuyo p95 sube o cuyo throughput baja más de --tolerance; el
+proceso termina con código 1 si hay regresiones.
+
+Para un dataset mayor, correr antes benchmarks/scale_dataset.py.
+
+Uso:
+    python benchmarks/suite.py --mix read --concurrency 20 --duration 30 > v1.json
+    python benchmarks/suite.py --mix read --concurrency 20 --duration 30 --baseline v1.json
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from load_test import percentile
+
+CUSTOMERS = 599
+FILMS = 1000
+STAFF = 2
+CATEGORIES = ["Action", "Animation", "Children", "Classics", "Comedy", "Documentary",
+              "Drama", "Family", "Foreign", "Games", "Horror", "Music", "New",
+              "Sci-Fi", "Sports", "Travel"]
+SEARCH_TERMS = ["academy", "dino", "war", "love", "ace", "chamber", "penelope", "mad scientist"]
+
+
+class Recorder:
+    """Latencias y códigos de estado por endpoint"""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.status = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.active = False
+
+    async def request(self, client, label, method, path, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.HTTPError:
+            if self.active:
+                self.errors[label] += 1
+            return None
+        if self.active:
+            self.latencies[label].append(time.perf_counter() - start)
+            self.status[label][response.status_code] += 1
+            if response.status_code >= 500:
+                self.errors[label] += 1
+        return response
+
+
+# ============ OPERACIONES ============
+# Cada operación hace uno o más requests; rng es el random.Random del cliente.
+
+async def film_list(client, rec, rng):
+    await rec.request(client, "GET /api/films/", "GET", "/api/films/",
+                      params={"limit": 50, "offset": rng.randrange(0, FILMS, 50)})
+
+
+async def film_detail(client, rec, rng):
+    await rec.request(client, "GET /api/films/{film_id}", "GET", f"/api/films/{rng.randint(1, FILMS)}")
+
+
+async def film_category(client, rec, rng):
+    await rec.request(client, "GET /api/films/category/{category_name}", "GET",
+                      f"/api/films/category/{rng.choice(CATEGORIES)}")
+
+
+async def film_search(client, rec, rng):
+    await rec.request(client, "GET /api/films/search", "GET", "/api/films/search",
+                      params={"q": rng.choice(SEARCH_TERMS)})
+
+
+async def customer_list(client, rec, rng):
+    await rec.request(client, "GET /api/customers/", "GET", "/api/customers/",
+                      params={"limit": 50, "offset": rng.randrange(0, CUSTOMERS, 50)})
+
+
+async def customer_detail(client, rec, rng):
+    await rec.request(client, "GET /api/customers/{customer_id}", "GET",
+                      f"/api/customers/{rng.randint(1, CUSTOMERS)}")
+
+
+async def staff_list(client, rec, rng):
+    await rec.request(client, "GET /api/staff/", "GET", "/api/staff/")
+
+
+async def staff_detail(client, rec, rng):
+    await rec.request(client, "GET /api/staff/{staff_id}", "GET", f"/api/staff/{rng.randint(1, STAFF)}")
+
+
+async def rental_list(client, rec, rng):
+    await rec.request(client, "GET /api/rentals/", "GET", "/api/rentals/",
+                      params={"limit": 50, "offset": rng.randrange(0, 1000, 50)})
+
+
+async def customer_rentals(client, rec, rng):
+    await rec.request(client, "GET /api/rentals/customer/{customer_id}", "GET",
+                      f"/api/rentals/customer/{rng.randint(1, CUSTOMERS)}")
+
+
+def rental_item(rng):
+    return {"customer_id": rng.randint(1, CUSTOMERS), "film_id": rng.randint(1, FILMS),
+            "staff_id": rng.randint(1, STAFF)}
+
+
+async def checkout_and_return(client, rec, rng):
+    """Rentar una película y devolverla (así no se agota el inventario)"""
+    response = await rec.request(client, "POST /api/rentals", "POST", "/api/rentals",
+                                 json=rental_item(rng))
+    if response is not None and response.status_code == 201:
+        rental_id = response.json()["data"]["rental_id"]
+        await rec.request(client, "PUT /api/rentals/{rental_id}/return", "PUT",
+                          f"/api/rentals/{rental_id}/return")
+
+
+async def checkout_and_cancel(client, rec, rng):
+    response = await rec.request(client, "POST /api/rentals", "POST", "/api/rentals",
+                                 json=rental_item(rng))
+    if response is not None and response.status_code == 201:
+        rental_id = response.json()["data"]["rental_id"]
+        await rec.request(client, "DELETE /api/rentals/{rental_id}", "DELETE",
+                          f"/api/rentals/{rental_id}")
+
+
+async def batch_checkout_and_return(client, rec, rng):
+    items = [rental_item(rng) for _ in range(10)]
+    response = await rec.request(client, "POST /api/rentals/batch", "POST", "/api/rentals/batch",
+                                 json={"items": items})
+    if response is None or response.status_code != 200:
+        return
+    rental_ids = [r["data"]["rental_id"] for r in response.json()["results"] if r["success"]]
+    if rental_ids:
+        await rec.request(client, "POST /api/rentals/returns/batch", "POST",
+                          "/api/rentals/returns/batch", json={"rental_ids": rental_ids})
+
+
+async def most_rented(client, rec, rng):
+    await rec.request(client, "GET /api/reports/most-rented", "GET", "/api/reports/most-rented")
+
+
+async def staff_revenue(client, rec, rng):
+    await rec.request(client, "GET /api/reports/staff-revenue", "GET", "/api/reports/staff-revenue")
+
+
+async def staff_revenue_detail(client, rec, rng):
+    await rec.request(client, "GET /api/reports/staff-revenue/{staff_id}", "GET",
+                      f"/api/reports/staff-revenue/{rng.randint(1, STAFF)}")
+
+
+async def unreturned(client, rec, rng):
+    await rec.request(client, "GET /api/reports/unreturned-dvds", "GET", "/api/reports/unreturned-dvds")
+
+
+async def customer_report(client, rec, rng):
+    await rec.request(client, "GET /api/reports/customer-rentals/{customer_id}", "GET",
+                      f"/api/reports/customer-rentals/{rng.randint(1, CUSTOMERS)}")
+
+
+# Operación -> peso relativo dentro de la mezcla
+MIXES = {
+    "read": {
+        film_list: 10, film_detail: 20, film_category: 8, film_search: 8,
+        customer_list: 5, customer_detail: 15, staff_list: 2, staff_detail: 2,
+        rental_list: 10, customer_rentals: 20,
+    },
+    "checkout": {
+        checkout_and_return: 40, checkout_and_cancel: 5, batch_checkout_and_return: 5,
+        film_detail: 15, customer_detail: 10, customer_rentals: 25,
+    },
+    "report": {
+        most_rented: 20, staff_revenue: 15, staff_revenue_detail: 10, unreturned: 20,
+        customer_report: 25, film_detail: 10,
+    },
+}
+
+
+async def client_loop(client, rec, mix, rng, deadline):
+    operations, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        operation = rng.choices(operations, weights)[0]
+        await operation(client, rec, rng)
+
+
+async def run(url, mix_name, concurrency, duration, warmup, seed):
+    mix = MIXES[mix_name]
+    rec = Recorder()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        rngs = [random.Random(seed * 1000 + n) for n in range(concurrency)]
+        if warmup > 0:
+            deadline = time.perf_counter() + warmup
+            await asyncio.gather(*(client_loop(client, rec, mix, rng, deadline) for rng in rngs))
+
+        rec.active = True
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(client_loop(client, rec, mix, rng, deadline) for rng in rngs))
+        elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    total = 0
+    for label in sorted(rec.latencies):
+        values = sorted(rec.latencies[label])
+        total += len(values)
+        endpoints[label] = {
+            "requests": len(values),
+            "errors": rec.errors[label],
+            "status": {str(code): n for code, n in sorted(rec.status[label].items())},
+            "throughput_rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+        }
+
+    return {
+        "url": url,
+        "mix": mix_name,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "seed": seed,
+        "total_requests": total,
+        "errors": sum(rec.errors.values()),
+        "throughput_rps": round(total / elapsed, 2),
+        "endpoints": endpoints,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Endpoints cuyo p95 subió o cuyo throughput bajó más de tolerance (fracción)"""
+    regressions = []
+    for label, current in result["endpoints"].items():
+        before = baseline["endpoints"].get(label)
+        if before is None:
+            continue
+        if before["p95_ms"] and current["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append({"endpoint": label, "metric": "p95_ms",
+                                "baseline": before["p95_ms"], "current": current["p95_ms"]})
+        if before["throughput_rps"] and current["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append({"endpoint": label, "metric": "throughput_rps",
+                                "baseline": before["throughput_rps"], "current": current["throughput_rps"]})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks por mezcla de tráfico")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--mix", choices=[*MIXES, "all"], default="all")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    mixes = list(MIXES) if args.mix == "all" else [args.mix]
+    results = {
+        name: asyncio.run(run(args.url, name, args.concurrency, args.duration, args.warmup, args.seed))
+        for name in mixes
+    }
+
+    output = {"mixes": results}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["mixes"]
+        output["regressions"] = {
+            name: compare(result, baseline[name], args.tolerance)
+            for name, result in results.items() if name in baseline
+        }
+
+    print(json.dumps(output, indent=2))
+    if any(output.get("regressions", {}).values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+workers.py - Throughput de la API según el número de workers
+
+Levanta `python -m app.server` con WEB_CONCURRENCY=1, 2, ... (--workers) en
+--port, espera a /health/ready, corre la mezcla de load_test.py y detiene
+el servidor con SIGTERM (apagado ordenado) antes de la siguiente corrida.
+Las variables de entorno (DB_HOST, DB_POOL_MAX_SIZE, ...) pasan al
+servidor; cada worker abre su propio pool.
+
+Uso:
+    python benchmarks/workers.py --workers 1 2 4 --concurrency 50 --duration 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from load_test import DEFAULT_ENDPOINTS, run
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+
+def wait_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health/ready", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{url} no respondió en {timeout} s")
+
+
+def measure(workers, port, concurrency, duration, warmup):
+    env = {**os.environ, "PORT": str(port), "WEB_CONCURRENCY": str(workers), "LOG_LEVEL": "warning"}
+    server = subprocess.Popen([sys.executable, "-m", "app.server"], cwd=BACKEND, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://localhost:{port}"
+    try:
+        wait_ready(url)
+        if warmup > 0:
+            asyncio.run(run(url, DEFAULT_ENDPOINTS, concurrency, warmup))
+        result = asyncio.run(run(url, DEFAULT_ENDPOINTS, concurrency, duration))
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+    result["workers"] = workers
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput según el número de workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    args = parser.parse_args()
+
+    runs = [measure(n, args.port, args.concurrency, args.duration, args.warmup) for n in args.workers]
+    base = runs[0]["throughput_rps"]
+    summary = [
+        {"workers": r["workers"], "throughput_rps": r["throughput_rps"],
+         "speedup": round(r["throughput_rps"] / base, 2) if base else None}
+        for r in runs
+    ]
+    print(json.dumps({"cpus": len(os.sched_getaffinity(0)), "summary": summary, "runs": runs}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,12 @@ class DVDRentalApp:
         self.api_url = tk.StringVar(value="http://localhost:8000")
         self.connected = False
         
+        # Respuestas con ETag: url -> (etag, json), se revalidan con If-None-Match
+        self.etag_cache = {}
+        # Sesión HTTP: conserva la cookie db_lsn para leer lo recién escrito
+        # cuando la API lee de réplicas
+        self.session = requests.Session()
+        
         # Configurar estilo
         self.setup_style()
         
@@ -226,16 +232,23 @@ class DVDRentalApp:
             url = f"{self.api_url.get()}{endpoint}"
             
             if method == 'GET':
-                response = requests.get(url, timeout=10)
+                cached = self.etag_cache.get(url)
+                headers = {'If-None-Match': cached[0]} if cached else {}
+                response = self.session.get(url, headers=headers, timeout=10)
+                if response.status_code == 304 and cached:
+                    return cached[1]
             elif method == 'POST':
-                response = requests.post(url, json=data, timeout=10)
+                response = self.session.post(url, json=data, timeout=10)
             elif method == 'PUT':
-                response = requests.put(url, timeout=10)
+                response = self.session.put(url, timeout=10)
             elif method == 'DELETE':
-                response = requests.delete(url, timeout=10)
+                response = self.session.delete(url, timeout=10)
             
             response.raise_for_status()
-            return response.json()
+            result = response.json()
+            if method == 'GET' and response.headers.get('ETag'):
+                self.etag_cache[url] = (response.headers['ETag'], result)
+            return result
         except requests.exceptions.RequestException as e:
             messagebox.showerror("Error API", f"Error al conectar con la API:\n{str(e)}")
             return None
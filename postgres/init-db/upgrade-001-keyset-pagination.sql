@@ -0,0 +1,14 @@
+--
+-- upgrade-001-keyset-pagination.sql
+--
+-- Índices que respaldan la paginación por cursor (keyset) de los listados.
+-- Se aplica después de restore.sql al inicializar el contenedor; en una base
+-- ya restaurada se puede aplicar a mano (es idempotente):
+--   psql -U postgres -d dvdrental -f postgres/init-db/upgrade-001-keyset-pagination.sql
+--
+
+CREATE INDEX IF NOT EXISTS idx_rental_date_rental_id ON public.rental USING btree (rental_date, rental_id);
+
+CREATE INDEX IF NOT EXISTS idx_title_film_id ON public.film USING btree (title, film_id);
+
+CREATE INDEX IF NOT EXISTS idx_customer_name_customer_id ON public.customer USING btree (last_name, first_name, customer_id);
@@ -0,0 +1,49 @@
+--
+-- upgrade-002-reporting-rollups.sql
+--
+-- Tablas pre-agregadas para /api/reports. La API las mantiene en las
+-- escrituras de /api/rentals y un job periódico las reconcilia contra
+-- rental/payment (app/rollups.py). Idempotente:
+--   psql -U postgres -d dvdrental -f postgres/init-db/upgrade-002-reporting-rollups.sql
+--
+
+-- Rentas por película (el revenue se calcula al leer: total_rentals * rental_rate)
+CREATE TABLE IF NOT EXISTS public.film_rental_stats (
+    film_id integer PRIMARY KEY REFERENCES public.film(film_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    total_rentals bigint DEFAULT 0 NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_film_rental_stats_total_rentals ON public.film_rental_stats USING btree (total_rentals DESC);
+
+-- Rentas y pagos por empleado (pagos de las rentas que atendió)
+CREATE TABLE IF NOT EXISTS public.staff_revenue_stats (
+    staff_id integer PRIMARY KEY REFERENCES public.staff(staff_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    total_rentals bigint DEFAULT 0 NOT NULL,
+    total_payments bigint DEFAULT 0 NOT NULL,
+    total_revenue numeric(14,2) DEFAULT 0 NOT NULL
+);
+
+-- Carga inicial
+INSERT INTO public.film_rental_stats (film_id, total_rentals)
+SELECT i.film_id, COUNT(*)
+FROM public.rental r
+JOIN public.inventory i ON r.inventory_id = i.inventory_id
+GROUP BY i.film_id
+ON CONFLICT (film_id) DO UPDATE SET total_rentals = EXCLUDED.total_rentals;
+
+INSERT INTO public.staff_revenue_stats (staff_id, total_rentals, total_payments, total_revenue)
+SELECT s.staff_id,
+       COUNT(DISTINCT r.rental_id),
+       COUNT(p.payment_id),
+       COALESCE(SUM(p.amount), 0)
+FROM public.staff s
+LEFT JOIN public.rental r ON s.staff_id = r.staff_id
+LEFT JOIN public.payment p ON r.rental_id = p.rental_id
+GROUP BY s.staff_id
+ON CONFLICT (staff_id) DO UPDATE SET
+    total_rentals = EXCLUDED.total_rentals,
+    total_payments = EXCLUDED.total_payments,
+    total_revenue = EXCLUDED.total_revenue;
+
+-- Rentas recientes por empleado (/api/reports/staff-revenue/{id})
+CREATE INDEX IF NOT EXISTS idx_rental_staff_id_rental_date ON public.rental USING btree (staff_id, rental_date);
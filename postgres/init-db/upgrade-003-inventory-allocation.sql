@@ -0,0 +1,21 @@
+--
+-- upgrade-003-inventory-allocation.sql
+--
+-- Índices para asignar copias de inventario en POST /api/rentals
+-- (app/allocation.py). Idempotente:
+--   psql -U postgres -d dvdrental -f postgres/init-db/upgrade-003-inventory-allocation.sql
+--
+
+-- Copias de una película
+CREATE INDEX IF NOT EXISTS idx_inventory_film_id ON public.inventory USING btree (film_id);
+
+-- Rentas abiertas: a lo más una por copia. Respalda la búsqueda de copias
+-- libres y hace imposible asignar dos veces la misma copia. Con rental
+-- particionada (upgrade-009) la garantía la da la tabla open_rental.
+DO $$
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'public.rental'::regclass) <> 'p' THEN
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_unq_rental_open_inventory_id ON public.rental USING btree (inventory_id) WHERE return_date IS NULL;
+    END IF;
+END
+$$;
@@ -0,0 +1,26 @@
+--
+-- upgrade-004-film-search.sql
+--
+-- Extensión e índices de GET /api/films/search (app/search.py). Idempotente:
+--   psql -U postgres -d dvdrental -f postgres/init-db/upgrade-004-film-search.sql
+--
+-- pg_trgm viene en el paquete contrib de PostgreSQL (incluido en la imagen
+-- oficial de Docker).
+--
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Trigramas del título: mode=contains (ILIKE '%texto%'), fuzzy y auto
+CREATE INDEX IF NOT EXISTS idx_film_title_trgm ON public.film USING gin (title gin_trgm_ops);
+
+-- mode=prefix: lower(title) LIKE 'texto%' con cualquier collation
+CREATE INDEX IF NOT EXISTS idx_film_lower_title_pattern ON public.film USING btree (lower((title)::text) text_pattern_ops);
+
+-- Texto completo (título + descripción, mantenido por film_fulltext_trigger):
+-- GIN en lugar del GiST original, que tiene que revisar cada coincidencia
+-- contra la fila.
+CREATE INDEX IF NOT EXISTS idx_film_fulltext_gin ON public.film USING gin (fulltext);
+DROP INDEX IF EXISTS public.film_fulltext_idx;
+
+-- Nombre de actor en mode=fulltext y auto
+CREATE INDEX IF NOT EXISTS idx_actor_name_tsv ON public.actor USING gin (to_tsvector('simple'::regconfig, (((first_name)::text || ' '::text) || (last_name)::text)));
@@ -0,0 +1,41 @@
+--
+-- upgrade-005-catalog-version.sql
+--
+-- Versión del catálogo (películas, categorías, actores y sus relaciones).
+-- Cualquier escritura sobre esas tablas incrementa catalog_version.version;
+-- la API compara la versión periódicamente y recarga su copia en memoria
+-- (app/catalog.py). Idempotente:
+--   psql -U postgres -d dvdrental -f postgres/init-db/upgrade-005-catalog-version.sql
+--
+
+CREATE TABLE IF NOT EXISTS public.catalog_version (
+    id integer PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    version bigint DEFAULT 1 NOT NULL,
+    updated_at timestamp with time zone DEFAULT now() NOT NULL
+);
+
+INSERT INTO public.catalog_version (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION public.bump_catalog_version() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    UPDATE public.catalog_version SET version = version + 1, updated_at = now() WHERE id = 1;
+    RETURN NULL;
+END
+$$;
+
+-- Un disparo por sentencia: una carga masiva incrementa la versión una vez
+DO $$
+DECLARE
+    t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['film', 'category', 'film_category', 'actor', 'film_actor'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS catalog_version_trigger ON public.%I', t);
+        EXECUTE format(
+            'CREATE TRIGGER catalog_version_trigger AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.%I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION public.bump_catalog_version()', t
+        );
+    END LOOP;
+END
+$$;
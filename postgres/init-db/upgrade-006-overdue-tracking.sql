@@ -0,0 +1,44 @@
+--
+-- upgrade-006-overdue-tracking.sql
+--
+-- Fecha de devolución guardada en rental y un índice parcial de rentas
+-- abiertas por esa fecha, para GET /api/reports/unreturned-dvds: el reporte
+-- de atrasos lee solo las rentas abiertas, sin recalcular la fecha con film
+-- ni recorrer el historial. Idempotente:
+--   psql -U postgres -d dvdrental -f postgres/init-db/upgrade-006-overdue-tracking.sql
+--
+
+ALTER TABLE public.rental ADD COLUMN IF NOT EXISTS due_date timestamp without time zone;
+
+-- La fecha se fija al rentar con la duración de la película en ese momento
+UPDATE public.rental r
+SET due_date = r.rental_date + f.rental_duration * INTERVAL '1 day'
+FROM public.inventory i
+JOIN public.film f ON f.film_id = i.film_id
+WHERE i.inventory_id = r.inventory_id
+AND r.due_date IS NULL;
+
+-- La API la calcula al insertar (app/allocation.py); el trigger la llena
+-- para cualquier otro INSERT que no la traiga
+CREATE OR REPLACE FUNCTION public.set_rental_due_date() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    SELECT NEW.rental_date + f.rental_duration * INTERVAL '1 day'
+    INTO NEW.due_date
+    FROM public.inventory i
+    JOIN public.film f ON f.film_id = i.film_id
+    WHERE i.inventory_id = NEW.inventory_id;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS rental_due_date_trigger ON public.rental;
+CREATE TRIGGER rental_due_date_trigger BEFORE INSERT ON public.rental
+    FOR EACH ROW WHEN (NEW.due_date IS NULL) EXECUTE FUNCTION public.set_rental_due_date();
+
+ALTER TABLE public.rental ALTER COLUMN due_date SET NOT NULL;
+
+-- Rentas abiertas por fecha de devolución: orden del reporte, filtro de
+-- días de atraso (rango sobre due_date) y conteos con index-only scan
+CREATE INDEX IF NOT EXISTS idx_rental_open_due_date ON public.rental USING btree (due_date, rental_id) WHERE return_date IS NULL;
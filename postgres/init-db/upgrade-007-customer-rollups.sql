@@ -0,0 +1,54 @@
+--
+-- upgrade-007-customer-rollups.sql
+--
+-- Acumulados por cliente para /api/reports/customer-rentals/{id} y
+-- /api/rentals/customer/{id}: el resumen se lee de una fila en lugar de
+-- recorrer todas las rentas del cliente. La API los mantiene al rentar,
+-- devolver y cancelar, y el job de reconciliación los recalcula
+-- (app/rollups.py). Idempotente:
+--   psql -U postgres -d dvdrental -f postgres/init-db/upgrade-007-customer-rollups.sql
+--
+
+-- Rentas, rentas abiertas, pagos de sus rentas y última renta por cliente
+CREATE TABLE IF NOT EXISTS public.customer_rental_stats (
+    customer_id integer PRIMARY KEY REFERENCES public.customer(customer_id) ON UPDATE CASCADE ON DELETE CASCADE,
+    total_rentals bigint DEFAULT 0 NOT NULL,
+    active_rentals bigint DEFAULT 0 NOT NULL,
+    total_payments bigint DEFAULT 0 NOT NULL,
+    total_spent numeric(14,2) DEFAULT 0 NOT NULL,
+    last_rental_date timestamp without time zone
+);
+
+-- Carga inicial
+INSERT INTO public.customer_rental_stats
+    (customer_id, total_rentals, active_rentals, total_payments, total_spent, last_rental_date)
+SELECT c.customer_id,
+       COALESCE(r.total_rentals, 0),
+       COALESCE(r.active_rentals, 0),
+       COALESCE(p.total_payments, 0),
+       COALESCE(p.total_spent, 0),
+       r.last_rental_date
+FROM public.customer c
+LEFT JOIN (
+    SELECT customer_id,
+           COUNT(*) AS total_rentals,
+           COUNT(*) FILTER (WHERE return_date IS NULL) AS active_rentals,
+           MAX(rental_date) AS last_rental_date
+    FROM public.rental
+    GROUP BY customer_id
+) r ON r.customer_id = c.customer_id
+LEFT JOIN (
+    SELECT r.customer_id, COUNT(*) AS total_payments, SUM(p.amount) AS total_spent
+    FROM public.payment p
+    JOIN public.rental r ON r.rental_id = p.rental_id
+    GROUP BY r.customer_id
+) p ON p.customer_id = c.customer_id
+ON CONFLICT (customer_id) DO UPDATE SET
+    total_rentals = EXCLUDED.total_rentals,
+    active_rentals = EXCLUDED.active_rentals,
+    total_payments = EXCLUDED.total_payments,
+    total_spent = EXCLUDED.total_spent,
+    last_rental_date = EXCLUDED.last_rental_date;
+
+-- Rentas de un cliente paginadas por llave, de la más reciente a la más antigua
+CREATE INDEX IF NOT EXISTS idx_rental_customer_id_rental_date ON public.rental USING btree (customer_id, rental_date, rental_id);
@@ -0,0 +1,14 @@
+--
+-- upgrade-008-report-windows.sql
+--
+-- Índice por fecha de pago para los reportes con ventana de tiempo
+-- (?from=&to=&bucket= de /api/reports/most-rented y /staff-revenue): el
+-- rango sobre payment_date se lee con un index-only scan en lugar de
+-- recorrer todo el historial de pagos. Del lado de rental ya existen
+-- idx_rental_date_rental_id (upgrade-001), idx_rental_staff_id_rental_date
+-- (upgrade-002) y el índice único (rental_date, inventory_id, customer_id).
+-- Idempotente:
+--   psql -U postgres -d dvdrental -f postgres/init-db/upgrade-008-report-windows.sql
+--
+
+CREATE INDEX IF NOT EXISTS idx_payment_payment_date ON public.payment USING btree (payment_date) INCLUDE (staff_id, amount);
@@ -0,0 +1,309 @@
+--
+-- upgrade-009-partitioning.sql
+--
+-- rental y payment particionadas por mes (RANGE sobre rental_date y
+-- payment_date). Los reportes con ventana de tiempo y la paginación por
+-- fecha leen solo las particiones del rango, y el historial viejo se puede
+-- separar o archivar por mes (ALTER TABLE ... DETACH PARTITION).
+--
+-- - Una partición por mes con datos, el mes actual y los siguientes, más
+--   una partición DEFAULT para lo que llegue fuera de rango. Las
+--   particiones futuras las crea create_future_partitions(), que la API
+--   llama periódicamente (app/partitions.py); si ya hay filas de ese mes
+--   en DEFAULT se mueven a la partición nueva.
+-- - La llave primaria incluye la llave de partición: (rental_id,
+--   rental_date) y (payment_id, payment_date). rental_id y payment_id
+--   siguen saliendo de sus secuencias.
+-- - payment_rental_id_fkey no se puede recrear: una llave foránea necesita
+--   una llave única sobre rental_id sola y en una tabla particionada no
+--   existe. La reemplazan dos triggers por sentencia: un pago nuevo o
+--   modificado debe apuntar a una renta existente (que bloquea con
+--   FOR KEY SHARE, como la llave foránea) y no se puede borrar una renta con
+--   pagos. rental_id sale de su secuencia y no se actualiza, así que el
+--   ON UPDATE CASCADE de la llave original no se reemplaza. Un pago nunca
+--   es anterior a su renta: las páginas de rentas buscan el pago con
+--   payment_date >= rental_date y descartan las particiones anteriores.
+-- - idx_unq_rental_open_inventory_id (una renta abierta por copia) tampoco
+--   se puede recrear: un índice único de una tabla particionada debe
+--   incluir rental_date. La garantía pasa a la tabla open_rental, con una
+--   fila por copia rentada (llave primaria inventory_id) que mantienen
+--   triggers sobre rental: una segunda renta abierta de la misma copia falla
+--   con unique_violation sin importar el mes, y las asignaciones de
+--   app/allocation.py buscan ahí las copias libres.
+-- - Se recrean índices, llaves foráneas, triggers y las vistas
+--   sales_by_film_category y sales_by_store.
+--
+-- Reescribe ambas tablas: en una base grande correr en una ventana de
+-- mantenimiento. Idempotente (no hace nada si rental ya está particionada):
+--   psql -U postgres -d dvdrental -f postgres/init-db/upgrade-009-partitioning.sql
+--
+
+-- Crear la partición del mes `month` de parent (rental o payment) si no
+-- existe. Regresa su nombre, o NULL si ya existía.
+CREATE OR REPLACE FUNCTION public.create_monthly_partition(parent regclass, month date) RETURNS text
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    parent_name text := (SELECT relname FROM pg_class WHERE oid = parent);
+    key_column text;
+    default_partition regclass;
+    partition_name text;
+    month_start timestamp := date_trunc('month', month);
+    month_end timestamp := date_trunc('month', month) + interval '1 month';
+BEGIN
+    partition_name := parent_name || to_char(month_start, '"_y"YYYY"m"MM');
+    IF to_regclass('public.' || partition_name) IS NOT NULL THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT a.attname INTO key_column
+    FROM pg_partitioned_table pt
+    JOIN pg_attribute a ON a.attrelid = pt.partrelid AND a.attnum = pt.partattrs[0]
+    WHERE pt.partrelid = parent;
+
+    SELECT c.oid INTO default_partition
+    FROM pg_inherits inh
+    JOIN pg_class c ON c.oid = inh.inhrelid
+    WHERE inh.inhparent = parent AND pg_get_expr(c.relpartbound, c.oid) = 'DEFAULT';
+
+    -- Tabla aparte + ATTACH: no bloquea las lecturas del padre mientras se
+    -- llena, y permite mover antes las filas del mes que hayan caído en DEFAULT
+    EXECUTE format('CREATE TABLE public.%I (LIKE %s INCLUDING DEFAULTS)', partition_name, parent);
+    IF default_partition IS NOT NULL THEN
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM %s WHERE %I >= $1 AND %I < $2 RETURNING *) '
+            'INSERT INTO public.%I SELECT * FROM moved',
+            default_partition, key_column, key_column, partition_name
+        ) USING month_start, month_end;
+    END IF;
+    EXECUTE format(
+        'ALTER TABLE %s ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+        parent, partition_name, month_start, month_end
+    );
+    -- Borrar de DEFAULT sacó de open_rental las rentas abiertas movidas
+    IF parent = 'public.rental'::regclass AND to_regclass('public.open_rental') IS NOT NULL THEN
+        EXECUTE format(
+            'INSERT INTO public.open_rental (inventory_id, rental_id) '
+            'SELECT inventory_id, rental_id FROM public.%I WHERE return_date IS NULL',
+            partition_name
+        );
+    END IF;
+    RETURN partition_name;
+END
+$$;
+
+-- Particiones de rental y payment del mes actual y los months_ahead
+-- siguientes. Regresa las que creó.
+CREATE OR REPLACE FUNCTION public.create_future_partitions(months_ahead integer DEFAULT 3) RETURNS SETOF text
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    parent regclass;
+    month date;
+    created text;
+BEGIN
+    -- Varias réplicas de la API pueden llamarla al mismo tiempo
+    PERFORM pg_advisory_xact_lock(5009);
+    FOREACH parent IN ARRAY ARRAY['public.rental'::regclass, 'public.payment'::regclass] LOOP
+        FOR month IN
+            SELECT generate_series(date_trunc('month', now()), date_trunc('month', now()) + months_ahead * interval '1 month', interval '1 month')
+        LOOP
+            created := public.create_monthly_partition(parent, month);
+            IF created IS NOT NULL THEN
+                RETURN NEXT created;
+            END IF;
+        END LOOP;
+    END LOOP;
+END
+$$;
+
+DO $$
+DECLARE
+    views text[] := ARRAY['sales_by_film_category', 'sales_by_store'];
+    definitions text[];
+    parent text;
+    month date;
+    i integer;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'public.rental'::regclass) = 'p' THEN
+        RAISE NOTICE 'rental ya está particionada';
+        RETURN;
+    END IF;
+
+    LOCK TABLE public.rental, public.payment IN ACCESS EXCLUSIVE MODE;
+
+    SELECT array_agg(pg_get_viewdef(('public.' || v)::regclass) ORDER BY ord) INTO definitions
+    FROM unnest(views) WITH ORDINALITY AS t(v, ord);
+    DROP VIEW public.sales_by_film_category, public.sales_by_store;
+
+    ALTER TABLE public.rental RENAME TO rental_unpartitioned;
+    ALTER TABLE public.payment RENAME TO payment_unpartitioned;
+
+    CREATE TABLE public.rental (
+        rental_id integer DEFAULT nextval('public.rental_rental_id_seq'::regclass) NOT NULL,
+        rental_date timestamp without time zone NOT NULL,
+        inventory_id integer NOT NULL,
+        customer_id smallint NOT NULL,
+        return_date timestamp without time zone,
+        staff_id smallint NOT NULL,
+        last_update timestamp without time zone DEFAULT now() NOT NULL,
+        due_date timestamp without time zone NOT NULL
+    ) PARTITION BY RANGE (rental_date);
+
+    CREATE TABLE public.payment (
+        payment_id integer DEFAULT nextval('public.payment_payment_id_seq'::regclass) NOT NULL,
+        customer_id smallint NOT NULL,
+        staff_id smallint NOT NULL,
+        rental_id integer NOT NULL,
+        amount numeric(5,2) NOT NULL,
+        payment_date timestamp without time zone NOT NULL
+    ) PARTITION BY RANGE (payment_date);
+
+    ALTER TABLE public.rental OWNER TO postgres;
+    ALTER TABLE public.payment OWNER TO postgres;
+
+    CREATE TABLE public.rental_default PARTITION OF public.rental DEFAULT;
+    CREATE TABLE public.payment_default PARTITION OF public.payment DEFAULT;
+
+    -- Meses con datos, el actual y los tres siguientes
+    FOR parent, month IN
+        SELECT 'public.rental', date_trunc('month', rental_date) FROM public.rental_unpartitioned
+        UNION
+        SELECT 'public.payment', date_trunc('month', payment_date) FROM public.payment_unpartitioned
+    LOOP
+        PERFORM public.create_monthly_partition(parent::regclass, month);
+    END LOOP;
+    PERFORM public.create_future_partitions(3);
+
+    INSERT INTO public.rental SELECT rental_id, rental_date, inventory_id, customer_id, return_date, staff_id, last_update, due_date
+    FROM public.rental_unpartitioned;
+    INSERT INTO public.payment SELECT payment_id, customer_id, staff_id, rental_id, amount, payment_date
+    FROM public.payment_unpartitioned;
+
+    ALTER SEQUENCE public.rental_rental_id_seq OWNED BY public.rental.rental_id;
+    ALTER SEQUENCE public.payment_payment_id_seq OWNED BY public.payment.payment_id;
+    DROP TABLE public.payment_unpartitioned, public.rental_unpartitioned;
+
+    ALTER TABLE public.rental ADD CONSTRAINT rental_pkey PRIMARY KEY (rental_id, rental_date);
+    ALTER TABLE public.payment ADD CONSTRAINT payment_pkey PRIMARY KEY (payment_id, payment_date);
+
+    CREATE INDEX idx_fk_inventory_id ON public.rental USING btree (inventory_id);
+    CREATE INDEX idx_rental_customer_id_rental_date ON public.rental USING btree (customer_id, rental_date, rental_id);
+    CREATE INDEX idx_rental_date_rental_id ON public.rental USING btree (rental_date, rental_id);
+    CREATE INDEX idx_rental_open_due_date ON public.rental USING btree (due_date, rental_id) WHERE return_date IS NULL;
+    CREATE INDEX idx_rental_staff_id_rental_date ON public.rental USING btree (staff_id, rental_date);
+    CREATE UNIQUE INDEX idx_unq_rental_rental_date_inventory_id_customer_id ON public.rental USING btree (rental_date, inventory_id, customer_id);
+
+    CREATE INDEX idx_fk_customer_id ON public.payment USING btree (customer_id);
+    CREATE INDEX idx_fk_rental_id ON public.payment USING btree (rental_id);
+    CREATE INDEX idx_fk_staff_id ON public.payment USING btree (staff_id);
+    CREATE INDEX idx_payment_payment_date ON public.payment USING btree (payment_date) INCLUDE (staff_id, amount);
+
+    ALTER TABLE public.rental
+        ADD CONSTRAINT rental_customer_id_fkey FOREIGN KEY (customer_id) REFERENCES public.customer(customer_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+        ADD CONSTRAINT rental_inventory_id_fkey FOREIGN KEY (inventory_id) REFERENCES public.inventory(inventory_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+        ADD CONSTRAINT rental_staff_id_key FOREIGN KEY (staff_id) REFERENCES public.staff(staff_id);
+    ALTER TABLE public.payment
+        ADD CONSTRAINT payment_customer_id_fkey FOREIGN KEY (customer_id) REFERENCES public.customer(customer_id) ON UPDATE CASCADE ON DELETE RESTRICT,
+        ADD CONSTRAINT payment_staff_id_fkey FOREIGN KEY (staff_id) REFERENCES public.staff(staff_id) ON UPDATE CASCADE ON DELETE RESTRICT;
+
+    CREATE TRIGGER last_updated BEFORE UPDATE ON public.rental FOR EACH ROW EXECUTE FUNCTION public.last_updated();
+    CREATE TRIGGER rental_due_date_trigger BEFORE INSERT ON public.rental
+        FOR EACH ROW WHEN (NEW.due_date IS NULL) EXECUTE FUNCTION public.set_rental_due_date();
+
+    FOR i IN 1 .. array_length(views, 1) LOOP
+        EXECUTE format('CREATE VIEW public.%I AS %s', views[i], definitions[i]);
+        EXECUTE format('ALTER VIEW public.%I OWNER TO postgres', views[i]);
+    END LOOP;
+END
+$$;
+
+-- Rentas abiertas, una por copia en todas las particiones
+CREATE TABLE IF NOT EXISTS public.open_rental (
+    inventory_id integer PRIMARY KEY,
+    rental_id integer NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION public.sync_open_rental() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    IF TG_OP <> 'INSERT' AND OLD.return_date IS NULL THEN
+        DELETE FROM public.open_rental WHERE inventory_id = OLD.inventory_id AND rental_id = OLD.rental_id;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NEW.return_date IS NULL THEN
+        INSERT INTO public.open_rental (inventory_id, rental_id) VALUES (NEW.inventory_id, NEW.rental_id);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- Pagos: la renta debe existir (bloqueada como lo haría la llave foránea)
+CREATE OR REPLACE FUNCTION public.check_payment_rental() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    missing integer;
+BEGIN
+    PERFORM 1 FROM public.rental r JOIN new_payments n ON n.rental_id = r.rental_id FOR KEY SHARE OF r;
+    SELECT n.rental_id INTO missing
+    FROM new_payments n
+    WHERE NOT EXISTS (SELECT 1 FROM public.rental r WHERE r.rental_id = n.rental_id)
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE foreign_key_violation USING MESSAGE = format('payment.rental_id %s no existe en rental', missing);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- Rentas borradas: no deben tener pagos
+CREATE OR REPLACE FUNCTION public.check_rental_payments() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    paid integer;
+BEGIN
+    SELECT o.rental_id INTO paid
+    FROM old_rentals o
+    WHERE EXISTS (SELECT 1 FROM public.payment p WHERE p.rental_id = o.rental_id)
+    LIMIT 1;
+    IF FOUND THEN
+        RAISE foreign_key_violation USING MESSAGE = format('la renta %s tiene pagos en payment', paid);
+    END IF;
+    RETURN NULL;
+END
+$$;
+
+-- Triggers y carga inicial en una transacción, sin rentas nuevas en medio
+BEGIN;
+LOCK TABLE public.rental IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS open_rental_insert ON public.rental;
+DROP TRIGGER IF EXISTS open_rental_update ON public.rental;
+DROP TRIGGER IF EXISTS open_rental_delete ON public.rental;
+CREATE TRIGGER open_rental_insert AFTER INSERT ON public.rental
+    FOR EACH ROW WHEN (NEW.return_date IS NULL) EXECUTE FUNCTION public.sync_open_rental();
+CREATE TRIGGER open_rental_update AFTER UPDATE OF return_date, inventory_id ON public.rental
+    FOR EACH ROW WHEN (OLD.return_date IS NULL OR NEW.return_date IS NULL) EXECUTE FUNCTION public.sync_open_rental();
+CREATE TRIGGER open_rental_delete AFTER DELETE ON public.rental
+    FOR EACH ROW WHEN (OLD.return_date IS NULL) EXECUTE FUNCTION public.sync_open_rental();
+
+DROP TRIGGER IF EXISTS rental_payment_check ON public.rental;
+CREATE TRIGGER rental_payment_check AFTER DELETE ON public.rental
+    REFERENCING OLD TABLE AS old_rentals FOR EACH STATEMENT EXECUTE FUNCTION public.check_rental_payments();
+DROP TRIGGER IF EXISTS payment_rental_check_insert ON public.payment;
+DROP TRIGGER IF EXISTS payment_rental_check_update ON public.payment;
+CREATE TRIGGER payment_rental_check_insert AFTER INSERT ON public.payment
+    REFERENCING NEW TABLE AS new_payments FOR EACH STATEMENT EXECUTE FUNCTION public.check_payment_rental();
+CREATE TRIGGER payment_rental_check_update AFTER UPDATE ON public.payment
+    REFERENCING NEW TABLE AS new_payments FOR EACH STATEMENT EXECUTE FUNCTION public.check_payment_rental();
+
+TRUNCATE public.open_rental;
+INSERT INTO public.open_rental (inventory_id, rental_id)
+SELECT inventory_id, rental_id FROM public.rental WHERE return_date IS NULL;
+COMMIT;
+
+ANALYZE public.rental;
+ANALYZE public.payment;
+ANALYZE public.open_rental;
@@ -0,0 +1,29 @@
+--
+-- upgrade-010-customer-rentals-version.sql
+--
+-- Versión de las rentas de cada cliente en customer_rental_stats. Toda
+-- escritura que renta, devuelve o cancela actualiza la fila del cliente y el
+-- trigger incrementa su versión; el cache de respuestas la incluye en la
+-- llave de /api/rentals/customer/{id} (app/cache.py), así ningún worker ni
+-- réplica de la API sirve las rentas anteriores a la escritura.
+-- Idempotente:
+--   psql -U postgres -d dvdrental -f postgres/init-db/upgrade-010-customer-rentals-version.sql
+--
+
+ALTER TABLE public.customer_rental_stats
+    ADD COLUMN IF NOT EXISTS version bigint DEFAULT 1 NOT NULL;
+
+CREATE OR REPLACE FUNCTION public.bump_customer_rentals_version() RETURNS trigger
+    LANGUAGE plpgsql
+    AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    RETURN NEW;
+END
+$$;
+
+-- La fila ya está bloqueada por la escritura: no agrega contención
+DROP TRIGGER IF EXISTS customer_rentals_version ON public.customer_rental_stats;
+CREATE TRIGGER customer_rentals_version
+    BEFORE UPDATE ON public.customer_rental_stats
+    FOR EACH ROW EXECUTE FUNCTION public.bump_customer_rentals_version();
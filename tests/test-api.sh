@@ -77,6 +77,10 @@ echo -e "${YELLOW}[2/2] Quick API endpoints presence${NC}"
 check_any "GET /api/films/" "$(get_status "${API_URL}/api/films/")" "200"
 check_any "GET /api/customers/" "$(get_status "${API_URL}/api/customers/")" "200"
 check_any "GET /api/staff/" "$(get_status "${API_URL}/api/staff/")" "200"
+# Cursores con valores del tipo equivocado ([{}, []], [1, 2]) o basura
+check_any "Reject malformed film cursor" "$(get_status "${API_URL}/api/films/?cursor=W3t9LFtdXQ")" "400"
+check_any "Reject mistyped customer cursor" "$(get_status "${API_URL}/api/customers/?cursor=WzEsMiwzXQ")" "400"
+check_any "Reject garbage rental cursor" "$(get_status "${API_URL}/api/rentals/?cursor=not-a-cursor")" "400"
 echo ""
 
 TOTAL=$((TESTS_PASSED + TESTS_FAILED))
@@ -166,6 +166,71 @@ status=$(echo "$response" | tail -n1)
 check_test "Paginated list (page 2)" "$status" "200"
 echo ""
 
+# Test 9: una renta nueva invalida las rentas cacheadas del cliente
+echo -e "${YELLOW}[9] Testing cache invalidation${NC}"
+rentals_total() {
+  curl -s "${API_URL}/api/rentals/customer/5" | grep -o '"total_rentals":[0-9]*' | grep -o '[0-9]*' | head -1
+}
+before=$(rentals_total)
+before_again=$(rentals_total)
+response=$(post_json "$RENTALS_URL" '{"customer_id":5,"film_id":4,"staff_id":1}')
+status=$(echo "$response" | tail -n1)
+INVALIDATE_ID=$(echo "$response" | grep -o '"rental_id":[0-9]*' | grep -o '[0-9]*' | head -1 || true)
+after=$(rentals_total)
+check_test "Cached customer rentals are stable" "$((before_again - before))" "0"
+check_test "Rental invalidates cached customer rentals" "$((after - before))" "1"
+if [ -n "$INVALIDATE_ID" ]; then
+  curl -s -o /dev/null -X PUT "${API_URL}/api/rentals/${INVALIDATE_ID}/return"
+fi
+echo ""
+
+# Test 10: asignaciones concurrentes de la misma película (8 copias):
+# ninguna copia se asigna dos veces y al final no quedan copias
+echo -e "${YELLOW}[10] Testing concurrent checkouts${NC}"
+CHECKOUT_DIR=$(mktemp -d)
+for i in 1 2 3 4 5 6; do
+  post_json "$RENTALS_URL" "{\"customer_id\":$i,\"film_id\":1,\"staff_id\":1}" > "$CHECKOUT_DIR/single-$i" &
+done
+for i in 1 2; do
+  post_json "${RENTALS_URL}batch" '{"items":[{"customer_id":7,"film_id":1,"staff_id":1},{"customer_id":8,"film_id":1,"staff_id":2},{"customer_id":9,"film_id":1,"staff_id":1}]}' > "$CHECKOUT_DIR/batch-$i" &
+done
+wait
+
+assigned=$(cat "$CHECKOUT_DIR"/* | grep -o '"inventory_id":[0-9]*' | grep -o '[0-9]*' || true)
+duplicated=$(echo "$assigned" | sort | uniq -d | wc -l)
+check_test "No copy assigned twice ($(echo "$assigned" | grep -c . || true) assigned)" "$duplicated" "0"
+
+response=$(post_json "$RENTALS_URL" '{"customer_id":10,"film_id":1,"staff_id":1}')
+status=$(echo "$response" | tail -n1)
+echo "$response" > "$CHECKOUT_DIR/last"
+check_test "No copies left after concurrent checkouts" "$status" "400"
+
+CREATED_IDS=$(cat "$CHECKOUT_DIR"/* | grep -o '"rental_id":[0-9]*' | grep -o '[0-9]*' | paste -sd, - || true)
+if [ -n "$CREATED_IDS" ]; then
+  response=$(post_json "${RENTALS_URL}returns/batch" "{\"rental_ids\":[$CREATED_IDS]}")
+  status=$(echo "$response" | tail -n1)
+  check_test "Return concurrent rentals" "$status" "200"
+fi
+rm -rf "$CHECKOUT_DIR"
+echo ""
+
+# Test 11: una renta nueva no cambia la página que sigue a un cursor
+echo -e "${YELLOW}[11] Testing cursor stability${NC}"
+page_ids() {
+  curl -s "$1" | grep -o '"rental_id":[0-9]*' | grep -o '[0-9]*' | paste -sd, -
+}
+NEXT_CURSOR=$(curl -s "${RENTALS_URL}?limit=5" | grep -o '"next_cursor":"[^"]*"' | cut -d'"' -f4)
+before=$(page_ids "${RENTALS_URL}?limit=5&cursor=${NEXT_CURSOR}")
+response=$(post_json "$RENTALS_URL" '{"customer_id":6,"film_id":4,"staff_id":1}')
+STABLE_ID=$(echo "$response" | grep -o '"rental_id":[0-9]*' | grep -o '[0-9]*' | head -1 || true)
+after=$(page_ids "${RENTALS_URL}?limit=5&cursor=${NEXT_CURSOR}")
+if [ -n "$before" ] && [ "$before" = "$after" ]; then same=0; else same=1; fi
+check_test "Page after cursor unchanged by a new rental" "$same" "0"
+if [ -n "$STABLE_ID" ]; then
+  curl -s -o /dev/null -X PUT "${API_URL}/api/rentals/${STABLE_ID}/return"
+fi
+echo ""
+
 TOTAL=$((TESTS_PASSED + TESTS_FAILED))
 echo -e "${BLUE}═══════════════════════════════════════════${NC}"
 echo -e "${GREEN}  Results${NC}"
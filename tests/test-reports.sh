@@ -55,6 +55,24 @@ has_any_field() {
   return 0
 }
 
+# pasa si el script de python termina bien; recibe los bodies en sys.argv
+check_py() {
+  local label="$1"
+  shift
+  local script="$1"
+  shift
+
+  echo -n "    $label... "
+  if python3 -c "$script" "$@" >/dev/null 2>&1; then
+    echo -e "${GREEN}✓${NC}"
+    TESTS_PASSED=$((TESTS_PASSED + 1))
+  else
+    echo -e "${RED}✗${NC}"
+    TESTS_FAILED=$((TESTS_FAILED + 1))
+  fi
+  return 0
+}
+
 echo -e "${BLUE}═══════════════════════════════════════════${NC}"
 echo -e "${GREEN}  Reports Module Tests${NC}"
 echo -e "${BLUE}═══════════════════════════════════════════${NC}"
@@ -130,7 +148,40 @@ status=$(echo "$resp" | tail -n1)
 check_any "Reject invalid customer" "$status" "404"
 echo ""
 
-echo -e "${YELLOW}[6] JSON Format Validation${NC}"
+echo -e "${YELLOW}[6] Report Windows${NC}"
+live=$(curl -s "${STAFF_REV_URL}?fresh=true")
+rollup=$(curl -s "$STAFF_REV_URL")
+resp=$(get_json "${STAFF_REV_URL}?from=1900-01-01&to=2100-12-31")
+status=$(echo "$resp" | tail -n1)
+windowed=$(echo "$resp" | head -n-1)
+check_any "Get staff revenue for a window" "$status" "200"
+# Una ventana que cubre todas las fechas da los mismos totales por empleado
+check_py "Window over all dates matches live totals" '
+import json, sys
+from decimal import Decimal
+def totals(body):
+    return {row["staff_id"]: (row["total_rentals"], row["total_payments"], Decimal(str(row["total_revenue"])))
+            for row in json.loads(body)["data"]}
+live, windowed = totals(sys.argv[1]), totals(sys.argv[2])
+assert live and live == windowed, (live, windowed)
+' "$live" "$windowed"
+# Las tablas de resumen que mantienen los triggers coinciden con el cálculo en vivo
+check_py "Rollup totals match live totals" '
+import json, sys
+from decimal import Decimal
+def totals(body):
+    return {row["staff_id"]: (row["total_rentals"], row["total_payments"], Decimal(str(row["total_revenue"])))
+            for row in json.loads(body)["data"]}
+live, rollup = totals(sys.argv[1]), totals(sys.argv[2])
+assert live and live == rollup, (live, rollup)
+' "$live" "$rollup"
+
+resp=$(get_json "${STAFF_REV_URL}?from=2005-07-31&to=2005-07-01")
+status=$(echo "$resp" | tail -n1)
+check_any "Reject from after to" "$status" "400"
+echo ""
+
+echo -e "${YELLOW}[7] JSON Format Validation${NC}"
 echo "$body" | python3 -m json.tool >/dev/null 2>&1 && {
   echo -e "  ${GREEN}✓ Valid JSON format${NC}"
   TESTS_PASSED=$((TESTS_PASSED + 1))